@@ -0,0 +1,8 @@
+"""
+python -m src; see src/cli.py.
+"""
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,83 @@
+"""
+Performance benchmarks for Wherewholf.
+
+    python -m src.benchmarks startup
+"""
+from __future__ import annotations
+
+from .type_checking import TYPE_CHECKING
+
+import os
+import statistics
+import subprocess
+import sys
+
+if TYPE_CHECKING:
+    from typing import Dict, List
+
+PROJECT_ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Cumulative microseconds that importing the game engine may take. Worker
+# processes pay this every time they start.
+IMPORT_TIME_BUDGET_US: int = 100000
+STARTUP_MODULE: str = "src.moderator"
+
+
+def _parse_importtime(stderr: str) -> Dict[str, int]:
+    """
+    Map each module imported to its cumulative import time in microseconds,
+    given the output of `python -X importtime`.
+    """
+    cumulative_times: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        fields = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(fields) != 3:
+            continue
+
+        try:
+            cumulative_times[fields[2].strip()] = int(fields[1])
+        except ValueError:
+            # The header line
+            continue
+
+    return cumulative_times
+
+
+def profile_import(module: str=STARTUP_MODULE) -> Dict[str, int]:
+    """
+    Import `module` in a fresh interpreter and return the cumulative import time
+    of every module that got imported along with it.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import %s" % module],
+        capture_output=True, text=True, check=True, cwd=PROJECT_ROOT
+    )
+    return _parse_importtime(completed.stderr)
+
+
+def measure_import_time(module: str=STARTUP_MODULE, runs: int=5) -> float:
+    """
+    Median cumulative time, in microseconds, to import `module` in a fresh
+    interpreter.
+    """
+    return statistics.median(profile_import(module)[module] for _ in range(runs))
+
+
+def startup_benchmark(runs: int=5) -> bool:
+    import_time = measure_import_time(STARTUP_MODULE, runs)
+    print("import %s: %.1fms (budget: %.1fms)" % (
+        STARTUP_MODULE, import_time / 1000, IMPORT_TIME_BUDGET_US / 1000
+    ))
+    return import_time <= IMPORT_TIME_BUDGET_US
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Run WhereWholf benchmarks")
+    parser.add_argument("benchmark", choices=("startup",))
+    parser.add_argument(
+        "--runs", "-r", type=int, default=5,
+        help="The number of times to repeat the measurement."
+    )
+    args = parser.parse_args()
+    sys.exit(0 if startup_benchmark(args.runs) else 1)
@@ -0,0 +1,104 @@
+"""
+Checkpoints of a running experiment, so that a run that dies can pick up
+where it left off instead of starting over. A checkpoint holds everything the
+rest of the run depends on: how many games were played, the tallies and
+statistics so far, and the state of `random`, which seeds unseeded games.
+"""
+from __future__ import annotations
+
+from .defaults import DEFAULT_CHECKPOINT_EVERY
+from .type_checking import TYPE_CHECKING
+
+import json
+import os
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Tuple
+
+CHECKPOINT_FORMAT: str = "wherewholf-checkpoint"
+CHECKPOINT_FORMAT_VERSION: int = 1
+
+
+class IncompatibleCheckpointError(Exception):
+    """
+    Thrown when asked to resume from a checkpoint of a different experiment.
+    """
+    pass
+
+
+class Checkpoint(object):
+    """
+    An experiment (`experiment` says which, and how many games it plays) that
+    has played its first `completed` games.
+    """
+
+    __slots__ = (
+        "experiment", "completed", "tallies", "stats", "tie_tally", "stalls", "random_state"
+    )
+
+    def __init__(
+        self,
+        experiment: Dict[str, Any],
+        completed: int,
+        tallies: Dict[str, int],
+        stats: Optional[Dict[str, Any]],
+        tie_tally: Dict[str, int],
+        stalls: List[Dict[str, Any]],
+        random_state: Tuple[Any, ...]
+    ):
+        self.experiment: Dict[str, Any] = experiment
+        self.completed: int = completed
+        # Game outcomes, keyed by EndGameState name
+        self.tallies: Dict[str, int] = tallies
+        # GameStatsAggregator.to_dict(), if the experiment keeps statistics
+        self.stats: Optional[Dict[str, Any]] = stats
+        self.tie_tally: Dict[str, int] = tie_tally
+        # StalledGame.to_dict() of every game that went over budget
+        self.stalls: List[Dict[str, Any]] = stalls
+        # random.getstate()
+        self.random_state: Tuple[Any, ...] = random_state
+
+    def to_dict(self) -> Dict[str, Any]:
+        version, internal_state, gauss_next = self.random_state
+        return {
+            "format": CHECKPOINT_FORMAT,
+            "version": CHECKPOINT_FORMAT_VERSION,
+            "experiment": self.experiment,
+            "completed": self.completed,
+            "tallies": dict(sorted(self.tallies.items())),
+            "stats": self.stats,
+            "tie_tally": dict(sorted(self.tie_tally.items())),
+            "stalls": self.stalls,
+            "random_state": [version, list(internal_state), gauss_next]
+        }
+
+    def write(self, path: str) -> None:
+        """
+        Write atomically and durably, so that the checkpoint at `path` is
+        always a complete one, even if the process dies while writing.
+        """
+        tmp_path = "%s.tmp%s" % (path, os.getpid())
+        with open(tmp_path, "w") as checkpoint_file:
+            json.dump(self.to_dict(), checkpoint_file, sort_keys=True)
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def read(path: str) -> "Checkpoint":
+        with open(path) as checkpoint_file:
+            raw: Dict[str, Any] = json.load(checkpoint_file)
+
+        if (
+            raw.get("format") != CHECKPOINT_FORMAT
+            or raw.get("version") != CHECKPOINT_FORMAT_VERSION
+        ):
+            raise IncompatibleCheckpointError("%s is not a version %s checkpoint." % (
+                path, CHECKPOINT_FORMAT_VERSION
+            ))
+
+        version, internal_state, gauss_next = raw["random_state"]
+        return Checkpoint(
+            raw["experiment"], raw["completed"], raw["tallies"], raw["stats"], raw["tie_tally"],
+            raw["stalls"], (version, tuple(internal_state), gauss_next)
+        )
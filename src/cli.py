@@ -0,0 +1,908 @@
+"""
+The `python -m src` command line. One command for everything: play a game,
+run an experiment, sweep a grid of configurations, query the games kept in a
+column store, benchmark and profile.
+
+    python -m src play -w 2 -v 6 --seed 1
+    python -m src run -w 2 -v 6 -n 100000 --engine integer --jobs 8 --output run.json
+    python -m src sweep -n 10000 --vary werewolves=1,2,3 --vary aggression=0.1,0.5,0.9
+    python -m src run --config experiment.json --seed 0
+    python -m src run -n 1000000 --seed 0 --checkpoint run.ckpt --resume
+    python -m src run -n 4000 --engine integer --versus suggestibility=0.45
+    python -m src sweep -n 10000 --vary aggression=0.1,0.3,0.5 --columns runs/
+    python -m src query runs/ --by aggression --width 0.2
+    python -m src bench startup
+    python -m src profile -n 10000 --fraction 0.02 --jobs 4 -o run.pstats
+
+Settings can come from a JSON (or, on Python 3.11+, TOML) file given with
+`--config`, keyed like the long options, e.g. {"werewolves": 2, "games": 1000,
+"attributes": {"aggression": 0.5}, "vary": {"villagers": [4, 6, 8]}}. Options
+given on the command line win over the file.
+
+Only what parsing needs is imported up front, so that the command starts fast;
+the game engine is imported by the subcommands that play games.
+"""
+from __future__ import annotations
+
+from argparse import ArgumentParser, ArgumentTypeError
+from .type_checking import TYPE_CHECKING
+
+import json
+import os
+import sys
+
+if TYPE_CHECKING:
+    from argparse import Namespace
+    from collections import Counter
+    from .columnar import ChunkWriter
+    from .experiment import Experiment
+    from .memprofile import MemoryProfiler
+    from .profiling import RawStats
+    from .progress import ProgressMetrics
+    from .shards import ShardResult, ShardSpec
+    from .stats import GameStatsAggregator
+    from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Sequence, Tuple
+
+STDOUT: str = "-"
+# Options of `run` that only work on experiments played in this process
+IN_PROCESS_OPTIONS: Tuple[str, ...] = (
+    "checkpoint", "resume", "status_file", "metrics_port", "stall_report", "memprofile"
+)
+
+
+class ConfigError(Exception):
+    """
+    Thrown when a config file can't be read or holds settings that make no
+    sense.
+    """
+    pass
+
+
+def _whole_number(value: str, smallest: int) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise ArgumentTypeError("expected a whole number, got %r" % value)
+    if number < smallest:
+        raise ArgumentTypeError("expected at least %s, got %s" % (smallest, number))
+    return number
+
+
+def positive_int(value: str) -> int:
+    return _whole_number(value, 1)
+
+
+def non_negative_int(value: str) -> int:
+    return _whole_number(value, 0)
+
+
+def positive_float(value: str) -> float:
+    try:
+        number = float(value)
+    except ValueError:
+        raise ArgumentTypeError("expected a number, got %r" % value)
+    if not number > 0:
+        raise ArgumentTypeError("expected a positive number, got %s" % number)
+    return number
+
+
+def probability(value: str) -> float:
+    try:
+        number = float(value)
+    except ValueError:
+        raise ArgumentTypeError("expected a number, got %r" % value)
+    if not 0 <= number <= 1:
+        raise ArgumentTypeError("expected a number in [0, 1], got %s" % number)
+    return number
+
+
+def fraction(value: str) -> float:
+    number = probability(value)
+    if number == 0:
+        raise ArgumentTypeError("expected a number in (0, 1], got 0")
+    return number
+
+
+def engine(value: str) -> str:
+    from .experiment import ENGINES
+
+    if value not in ENGINES:
+        raise ArgumentTypeError("expected one of %s, got %r" % (", ".join(ENGINES), value))
+    return value
+
+
+def vote_polling(value: str) -> str:
+    from .experiment import VOTE_POLLING
+
+    if value not in VOTE_POLLING:
+        raise ArgumentTypeError("expected one of %s, got %r" % (
+            ", ".join(sorted(VOTE_POLLING)), value
+        ))
+    return value
+
+
+def tie_breaker(value: str) -> str:
+    from .ties import TIE_BREAKERS
+
+    if value not in TIE_BREAKERS:
+        raise ArgumentTypeError("expected one of %s, got %r" % (
+            ", ".join(sorted(TIE_BREAKERS)), value
+        ))
+    return value
+
+
+def rare_outcome(value: str) -> str:
+    from .importance import Tilt
+
+    names: List[str] = [target.name for target in Tilt.TARGETS]
+    if value not in names:
+        raise ArgumentTypeError("expected one of %s, got %r" % (", ".join(names), value))
+    return value
+
+
+# Player attributes that can be set from the command line, and their types
+PLAYER_ATTRIBUTES: Dict[str, Callable[[str], Any]] = {
+    "aggression": probability,
+    "suggestibility": probability,
+    "persuasiveness": probability,
+    "nomination_recency": positive_int,
+}
+# What a sweep can vary besides Player attributes
+GRID_SETTINGS: Dict[str, Callable[[str], Any]] = {
+    "werewolves": positive_int,
+    "villagers": positive_int,
+    "max_revotes": non_negative_int,
+}
+
+
+def attribute_assignment(assignment: str) -> Tuple[str, Any]:
+    """
+    NAME=VALUE, for a Player attribute.
+    """
+    name, equals, value = assignment.partition("=")
+    if not equals:
+        raise ArgumentTypeError("expected NAME=VALUE, got %r" % assignment)
+    if name not in PLAYER_ATTRIBUTES:
+        raise ArgumentTypeError("unknown Player attribute %r, expected one of %s" % (
+            name, ", ".join(sorted(PLAYER_ATTRIBUTES))
+        ))
+    return name, PLAYER_ATTRIBUTES[name](value)
+
+
+def grid_axis(assignment: str) -> Tuple[str, List[Any]]:
+    """
+    NAME=VALUE,VALUE,..., for a Player attribute or one of GRID_SETTINGS.
+    """
+    name, equals, values = assignment.partition("=")
+    parse: Optional[Callable[[str], Any]] = PLAYER_ATTRIBUTES.get(name, GRID_SETTINGS.get(name))
+    if not equals or not values:
+        raise ArgumentTypeError("expected NAME=VALUE,VALUE,..., got %r" % assignment)
+    if parse is None:
+        raise ArgumentTypeError("can't vary %r, expected one of %s" % (
+            name, ", ".join(sorted(set(PLAYER_ATTRIBUTES) | set(GRID_SETTINGS)))
+        ))
+    return name, [parse(value.strip()) for value in values.split(",")]
+
+
+def load_config(path: str) -> Dict[str, Any]:
+    """
+    The settings in a JSON file or, if it ends in .toml, a TOML file.
+    """
+    try:
+        if path.endswith(".toml"):
+            try:
+                import tomllib
+            except ImportError:
+                raise ConfigError("Reading %s needs Python 3.11 or later; use JSON." % path)
+            with open(path, "rb") as toml_file:
+                raw: Any = tomllib.load(toml_file)
+        else:
+            with open(path) as json_file:
+                raw = json.load(json_file)
+    except (OSError, ValueError) as error:
+        raise ConfigError("Can't read %s: %s" % (path, error))
+    if not isinstance(raw, dict):
+        raise ConfigError("%s should hold an object of settings." % path)
+    return raw
+
+
+def game_options(args: Namespace) -> Dict[str, Any]:
+    """
+    What `make_experiment` needs, out of the parsed arguments. Plain values
+    only, so that it can be sent to worker processes.
+    """
+    return {
+        "werewolves": args.werewolves,
+        "villagers": args.villagers,
+        "engine": args.engine,
+        "tie_breaker": args.tie_breaker,
+        "max_revotes": args.max_revotes,
+        "vote_polling": args.vote_polling,
+        "max_steps": args.max_steps,
+        "max_seconds": args.max_seconds,
+        "attributes": dict(args.attributes or ())
+    }
+
+
+def make_experiment(options: Dict[str, Any]) -> Experiment:
+    from .experiment import Experiment, VOTE_POLLING
+    from .ties import TIE_BREAKERS
+    from .watchdog import GameWatchdog
+
+    return Experiment(
+        options["werewolves"], options["villagers"],
+        TIE_BREAKERS[options["tie_breaker"]](options["max_revotes"]),
+        GameWatchdog(options["max_steps"], options["max_seconds"]),
+        options["engine"], VOTE_POLLING[options["vote_polling"]], options["attributes"]
+    )
+
+
+def play_shard(
+    options: Dict[str, Any],
+    spec: ShardSpec,
+    stats: bool,
+    columns: Optional[str]=None,
+    threads: int=1
+) -> ShardResult:
+    return make_experiment(options).play_shard(spec, stats, columns, threads)
+
+
+def _quiet() -> None:
+    import logging
+
+    # Thousands of games make for more log than anyone reads.
+    logging.disable(logging.CRITICAL)
+
+
+def run_experiment(
+    options: Dict[str, Any],
+    games: int,
+    seed: Optional[int]=None,
+    jobs: int=1,
+    stats: bool=False,
+    columns: Optional[str]=None,
+    threads: int=1
+) -> Dict[str, Any]:
+    """
+    Play `games` games seeded from `seed` on, split across `jobs` processes
+    of `threads` threads, and return the merged report (see
+    `shards.merge_shards`). The outcomes are the same for any number of jobs
+    and threads. Every process appends the results of its games to the
+    column store in `columns`, if given.
+    """
+    import random
+    from .shards import merge_shards, plan_shards
+
+    if seed is None:
+        seed = random.getrandbits(32)
+    shards: List[ShardSpec] = plan_shards(
+        make_experiment(options).config, games, min(jobs, games), seed
+    )
+    if jobs == 1:
+        return merge_shards(
+            play_shard(options, shard, stats, columns, threads) for shard in shards
+        )
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(jobs, initializer=_quiet) as pool:
+        return merge_shards(pool.map(
+            play_shard, [options] * len(shards), shards, [stats] * len(shards),
+            [columns] * len(shards), [threads] * len(shards)
+        ))
+
+
+class _Sink(object):
+    """
+    Where reports go: a file, or stdout for STDOUT.
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self.__file: Optional[IO[str]] = None
+
+    def __enter__(self) -> IO[str]:
+        self.__file = sys.stdout if self.path == STDOUT else open(self.path, "w")
+        return self.__file
+
+    def __exit__(self, *exc_info: Any) -> None:
+        assert self.__file is not None
+        if self.__file is sys.stdout:
+            self.__file.flush()
+        else:
+            self.__file.close()
+
+
+def play_command(args: Namespace) -> int:
+    from .results import DeathCause, UNKNOWN_PLAYER
+
+    experiment: Experiment = make_experiment(game_options(args))
+    result = experiment.play_game_for_result(args.seed)
+    players: List[str] = sorted(player.name for player in experiment.make_players())
+    print(json.dumps({
+        "seed": result.seed,
+        "outcome": result.outcome.name,
+        "days": result.days,
+        "skipped_days": result.skipped_days,
+        "deaths": [
+            {
+                # Killed on a night not played out
+                "player": None if player == UNKNOWN_PLAYER else players[player],
+                "cause": DeathCause(cause).name,
+                "werewolf": werewolf
+            } for player, cause, werewolf in result.deaths
+        ]
+    }, indent=2))
+    return 0
+
+
+def in_process_options(args: Namespace) -> List[str]:
+    """
+    The IN_PROCESS_OPTIONS given in `args`.
+    """
+    return [
+        name for name in IN_PROCESS_OPTIONS if getattr(args, name, None) not in (None, False)
+    ]
+
+
+def run_in_process(args: Namespace) -> Dict[str, Any]:
+    """
+    Play the experiment of `args` in this process, with the checkpoints,
+    progress, stall report and memory profile it asks for, and return the
+    report of `run_experiment`.
+    """
+    from collections import Counter
+    from .shards import ShardResult, merge_shards, plan_shards
+
+    experiment: Experiment = make_experiment(game_options(args))
+    # Unseeded games draw their seeds from `random`, whose state checkpoints
+    # keep, so that unseeded runs can be resumed too.
+    spec: ShardSpec = plan_shards(
+        experiment.config, args.games, 1, args.seed if args.seed is not None else 0
+    )[0]
+
+    stats: Optional[GameStatsAggregator] = None
+    if args.stats:
+        from .stats import GameStatsAggregator
+
+        stats = GameStatsAggregator()
+    memprofiler: Optional[MemoryProfiler] = None
+    if args.memprofile:
+        from .memprofile import MemoryProfiler
+
+        memprofiler = MemoryProfiler(args.memprofile_every)
+    progress: Optional[ProgressMetrics] = None
+    if args.status_file or args.metrics_port is not None:
+        from .progress import ProgressMetrics
+
+        progress = ProgressMetrics(
+            args.games, args.status_file, args.metrics_port, args.progress_interval
+        )
+    results: Optional[ChunkWriter] = None
+    if args.columns:
+        from .columnar import ColumnStore
+
+        # Named like the chunks of `run_experiment`, so that either run of the
+        # same seeded experiment overwrites the other's.
+        results = ColumnStore(args.columns).writer(
+            spec.writer_name if args.seed is not None else "unseeded-" + os.urandom(8).hex()
+        )
+
+    wins: Counter = experiment.run(
+        args.games, memprofiler, args.seed, stats, progress, args.checkpoint,
+        args.checkpoint_every, args.resume, results
+    )
+
+    if args.stall_report:
+        with open(args.stall_report, "w") as stall_file:
+            json.dump({
+                "experiment": experiment.config,
+                "stalls": [stall.to_dict() for stall in experiment.stalls]
+            }, stall_file, indent=2)
+    if memprofiler:
+        memprofiler.write_report(args.memprofile_report)
+        print(memprofiler.summary(), file=sys.stderr)
+    report: Dict[str, Any] = merge_shards([ShardResult(
+        spec, Counter({outcome.name: count for outcome, count in wins.items()}), stats
+    )])
+    report["experiment"] = dict(report["experiment"], seed=args.seed)
+    return report
+
+
+def run_command(args: Namespace) -> int:
+    from .shards import IncompatibleShardsError
+
+    options: Dict[str, Any] = game_options(args)
+    report: Dict[str, Any]
+    try:
+        if args.merge:
+            from .shards import ShardResult, find_shard_files, merge_shards
+
+            report = merge_shards(ShardResult.read(path) for path in find_shard_files(args.merge))
+        elif args.rare_outcome:
+            from .importance import Tilt
+            from .results import EndGameState
+
+            report = make_experiment(options).run_tilted(
+                Tilt(EndGameState[args.rare_outcome], args.tilt_strength), args.games, args.seed
+            ).summary()
+        elif args.versus:
+            other: Dict[str, Any] = dict(
+                options, attributes=dict(options["attributes"], **dict(args.versus))
+            )
+            report = make_experiment(options).run_paired(
+                make_experiment(other), args.games, args.seed, args.antithetic
+            ).summary()
+        elif args.shards is not None:
+            from .shards import plan_shards
+
+            experiment: Experiment = make_experiment(options)
+            spec: ShardSpec = plan_shards(
+                experiment.config, args.games, args.shards,
+                args.seed if args.seed is not None else 0
+            )[args.shard]
+            os.makedirs(args.shard_dir, exist_ok=True)
+            report = {"shard_file": experiment.run_shard(spec, args.shard_dir)}
+        elif in_process_options(args):
+            report = run_in_process(args)
+        else:
+            report = run_experiment(
+                options, args.games, args.seed, args.jobs, args.stats, args.columns,
+                args.threads
+            )
+    except IncompatibleShardsError as error:
+        print(error, file=sys.stderr)
+        return 1
+    with _Sink(args.output) as sink:
+        json.dump(report, sink, indent=2)
+        sink.write("\n")
+    return 0
+
+
+def grid(axes: Sequence[Tuple[str, List[Any]]]) -> Iterator[Dict[str, Any]]:
+    """
+    Every combination of the values of `axes`, in order. A later axis for
+    the same setting replaces an earlier one.
+    """
+    from itertools import product
+
+    merged: Dict[str, List[Any]] = dict(axes)
+    for values in product(*merged.values()):
+        yield dict(zip(merged.keys(), values))
+
+
+def sweep_command(args: Namespace) -> int:
+    base: Dict[str, Any] = game_options(args)
+    with _Sink(args.output) as sink:
+        for cell in grid(args.vary or []):
+            options: Dict[str, Any] = dict(base, attributes=dict(base["attributes"]))
+            for name, value in cell.items():
+                if name in PLAYER_ATTRIBUTES:
+                    options["attributes"][name] = value
+                else:
+                    options[name] = value
+            report = run_experiment(
+                options, args.games, args.seed, args.jobs, args.stats, args.columns,
+                args.threads
+            )
+            sink.write(json.dumps(dict(report, cell=cell), sort_keys=True) + "\n")
+            sink.flush()
+    return 0
+
+
+def bench_command(args: Namespace) -> int:
+    from .benchmarks import IMPORT_TIME_BUDGET_US, STARTUP_MODULE, measure_import_time
+
+    report: Dict[str, Any] = {}
+    ok: bool = True
+    if args.benchmark in ("startup", "all"):
+        import_time: float = measure_import_time(STARTUP_MODULE, args.runs)
+        ok = import_time <= IMPORT_TIME_BUDGET_US
+        report["startup"] = {
+            "module": STARTUP_MODULE,
+            "import_us": import_time,
+            "budget_us": IMPORT_TIME_BUDGET_US,
+            "within_budget": ok
+        }
+    if args.benchmark in ("workload", "all"):
+        from . import perf_workload
+
+        report["workload"] = perf_workload.run(args.runs, args.games)
+    with _Sink(args.output) as sink:
+        json.dump(report, sink, indent=2)
+        sink.write("\n")
+    return 0 if ok else 1
+
+
+def profile_shard(
+    options: Dict[str, Any], spec: ShardSpec, first_game: int, fraction: float
+) -> Tuple[RawStats, int]:
+    """
+    The profile of a shard of an experiment, and how many games it sampled.
+    """
+    from .profiling import GameProfiler
+
+    profiler = GameProfiler(fraction, first_game)
+    profiler.run(make_experiment(options), spec.games, spec.seed_start)
+    return profiler.raw_stats(), profiler.profiled
+
+
+def profile_command(args: Namespace) -> int:
+    import random
+    from .profiling import collapsed_stacks, merge_profiles, phase_times, write_collapsed
+    from .shards import plan_shards
+
+    options: Dict[str, Any] = game_options(args)
+    seed: int = args.seed if args.seed is not None else random.getrandbits(32)
+    shards: List[ShardSpec] = plan_shards(
+        make_experiment(options).config, args.games, min(args.jobs, args.games), seed
+    )
+    jobs: List[Tuple[Dict[str, Any], ShardSpec, int, float]] = [
+        (options, shard, shard.seed_start - seed, args.fraction) for shard in shards
+    ]
+    if args.jobs == 1:
+        profiles: List[Tuple[RawStats, int]] = [profile_shard(*job) for job in jobs]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(args.jobs, initializer=_quiet) as pool:
+            profiles = list(pool.map(profile_shard, *zip(*jobs)))
+
+    stats = merge_profiles(raw for raw, _ in profiles)
+    stats.dump_stats(args.output)
+    stacks: Dict[str, float] = collapsed_stacks(stats)
+    write_collapsed(stacks, args.collapsed or "%s.collapsed" % os.path.splitext(args.output)[0])
+
+    times: Dict[str, float] = phase_times(stacks)
+    total: float = sum(times.values())
+    print("Profiled %s of %s games" % (sum(profiled for _, profiled in profiles), args.games))
+    for phase, seconds in times.items():
+        print("  %-16s %8.3fs %5.1f%%" % (phase, seconds, 100 * seconds / total if total else 0))
+    stats.sort_stats(args.sort).print_stats(args.limit)
+    return 0
+
+
+def query_command(args: Namespace) -> int:
+    from .columnar import ColumnStore, attribute_bucket, outcome_counts
+
+    store = ColumnStore(args.store)
+    key: Callable[[Dict[str, Any]], Any]
+    if args.by in PLAYER_ATTRIBUTES:
+        key = attribute_bucket(args.by, args.width)
+    elif args.by is None:
+        key = lambda config: None
+    else:
+        by: str = args.by
+        key = lambda config: config.get(by)
+    groups: Dict[Any, Counter] = outcome_counts(store, key)
+    with _Sink(args.output) as sink:
+        for group, counts in sorted(groups.items(), key=lambda item: str(item[0])):
+            games: int = sum(counts.values())
+            sink.write(json.dumps({
+                "group": group,
+                "games": games,
+                "tallies": dict(sorted(counts.items())),
+                "win_rates": {outcome: count / games for outcome, count in sorted(counts.items())}
+            }, sort_keys=True) + "\n")
+    return 0
+
+
+COMMANDS: Dict[str, Callable[[Namespace], int]] = {
+    "play": play_command,
+    "run": run_command,
+    "sweep": sweep_command,
+    "bench": bench_command,
+    "profile": profile_command,
+    "query": query_command,
+}
+
+
+def build_parser() -> Tuple[ArgumentParser, Dict[str, ArgumentParser]]:
+    from .defaults import (
+        DEFAULT_CHECKPOINT_EVERY, DEFAULT_FRACTION, DEFAULT_INTERVAL, DEFAULT_MAX_REVOTES,
+        DEFAULT_MAX_SECONDS, DEFAULT_MAX_STEPS, DEFAULT_STRENGTH
+    )
+
+    game = ArgumentParser(add_help=False)
+    game.add_argument(
+        "--config", "-c", default=None, help="Read settings from this JSON or TOML file."
+    )
+    game.add_argument(
+        "--werewolves", "-w", type=positive_int, default=2,
+        help="The number of werewolves in games."
+    )
+    game.add_argument(
+        "--villagers", "-v", type=positive_int, default=4,
+        help="The number of villagers in games."
+    )
+    game.add_argument(
+        "--engine", "-e", type=engine, default="objects",
+        help="Play with player objects (objects) or the faster integer engine (integer)."
+    )
+    game.add_argument(
+        "--attribute", "-a", dest="attributes", type=attribute_assignment, action="append",
+        metavar="NAME=VALUE", help="Set a Player attribute, e.g. aggression=0.5. Repeatable."
+    )
+    game.add_argument(
+        "--tie-breaker", type=tie_breaker, default="random",
+        help="What to do when the village is still tied after --max-revotes revotes: lynch "
+        "one of the tied at random (random), no one (no-lynch), or hold a runoff (runoff)."
+    )
+    game.add_argument(
+        "--max-revotes", type=non_negative_int, default=DEFAULT_MAX_REVOTES,
+        help="How many times the village votes again to break a tie."
+    )
+    game.add_argument(
+        "--vote-polling", type=vote_polling, default="auto",
+        help="Poll every voter (everyone), or stop once the vote is decided "
+        "(until-decided). auto stops early in large games only."
+    )
+    game.add_argument(
+        "--max-steps", type=positive_int, default=DEFAULT_MAX_STEPS,
+        help="Abort games that take more than this many steps."
+    )
+    game.add_argument(
+        "--max-seconds", type=positive_float, default=DEFAULT_MAX_SECONDS,
+        help="Abort games that take more than this many seconds. Off by default, so that "
+        "which games are aborted does not depend on the machine."
+    )
+
+    seeded = ArgumentParser(add_help=False)
+    seeded.add_argument(
+        "--seed", "-s", type=non_negative_int, default=None,
+        help="Seed the games, starting from this number, so they can be replayed."
+    )
+
+    games = ArgumentParser(add_help=False)
+    games.add_argument(
+        "--games", "-n", type=positive_int, default=100, help="The number of games to play."
+    )
+
+    experiment = ArgumentParser(add_help=False)
+    experiment.add_argument(
+        "--jobs", "-j", type=positive_int, default=1,
+        help="Play in this many processes. Seeded results don't depend on it."
+    )
+    experiment.add_argument(
+        "--threads", "-t", type=positive_int, default=1,
+        help="Play on this many threads in every process. Only faster on free-threaded "
+        "Python; seeded results don't depend on it."
+    )
+    experiment.add_argument(
+        "--stats", action="store_true",
+        help="Report statistics on game length, survival, lynchings and ties."
+    )
+    experiment.add_argument(
+        "--columns", default=None, metavar="DIRECTORY",
+        help="Also keep the result of every game in this column store; see query."
+    )
+
+    output = ArgumentParser(add_help=False)
+    output.add_argument(
+        "--output", "-o", default=STDOUT, help="Write the report here; - for stdout."
+    )
+
+    parser = ArgumentParser(prog="python -m src", description="Play and study WhereWholf")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    commands: Dict[str, ArgumentParser] = {}
+    commands["play"] = subparsers.add_parser(
+        "play", parents=[game, seeded], help="Play one game and show how it went."
+    )
+    commands["run"] = subparsers.add_parser(
+        "run", parents=[game, seeded, games, experiment, output],
+        help="Run an experiment and report the outcomes."
+    )
+    run: ArgumentParser = commands["run"]
+    run.add_argument(
+        "--checkpoint", default=None, metavar="FILE",
+        help="Keep a checkpoint of the experiment in this file."
+    )
+    run.add_argument(
+        "--checkpoint-every", type=positive_int, default=DEFAULT_CHECKPOINT_EVERY,
+        help="Write the checkpoint every this many games."
+    )
+    run.add_argument(
+        "--resume", action="store_true",
+        help="Continue from --checkpoint instead of starting over."
+    )
+    run.add_argument(
+        "--status-file", default=None,
+        help="Keep rewriting this file with the progress of the experiment, as JSON."
+    )
+    run.add_argument(
+        "--metrics-port", type=non_negative_int, default=None,
+        help="Serve the progress of the experiment as Prometheus metrics on "
+        "http://127.0.0.1:PORT/metrics."
+    )
+    run.add_argument(
+        "--progress-interval", type=positive_float, default=DEFAULT_INTERVAL,
+        help="Seconds between rewrites of --status-file."
+    )
+    run.add_argument(
+        "--stall-report", default=None,
+        help="Write the seed, roster and phase of every aborted game to this file."
+    )
+    run.add_argument(
+        "--memprofile", action="store_true",
+        help="Trace memory allocations and report what grows across games."
+    )
+    run.add_argument(
+        "--memprofile-every", type=positive_int, default=100,
+        help="Take a memory snapshot every this many games."
+    )
+    run.add_argument(
+        "--memprofile-report", default="memprofile.json",
+        help="Where to write the memory profile report."
+    )
+    modes = run.add_mutually_exclusive_group()
+    modes.add_argument(
+        "--versus", type=attribute_assignment, action="append", metavar="NAME=VALUE",
+        help="Compare against the same experiment with this Player attribute changed, "
+        "playing paired games on common random numbers. Repeatable."
+    )
+    run.add_argument(
+        "--antithetic", action="store_true",
+        help="With --versus, play every seed's antithetic game too."
+    )
+    modes.add_argument(
+        "--rare-outcome", type=rare_outcome, default=None,
+        help="Estimate how often this outcome (VILLAGERS_WON or WEREWOLVES_WON) happens by "
+        "importance sampling games tilted toward it."
+    )
+    run.add_argument(
+        "--tilt-strength", type=positive_float, default=DEFAULT_STRENGTH,
+        help="With --rare-outcome, how much likelier the players who have to die for it "
+        "are to be picked."
+    )
+    modes.add_argument(
+        "--shards", type=positive_int, default=None,
+        help="Split the experiment into this many shards and run one of them. "
+        "Requires --shard."
+    )
+    run.add_argument(
+        "--shard", type=non_negative_int, default=None,
+        help="The index of the shard to run, in [0, --shards)."
+    )
+    run.add_argument(
+        "--shard-dir", default=".", metavar="DIRECTORY",
+        help="Where shard result files are written."
+    )
+    modes.add_argument(
+        "--merge", nargs="+", default=None, metavar="PATH",
+        help="Merge these shard files (or directories of them) into one report."
+    )
+    commands["sweep"] = subparsers.add_parser(
+        "sweep", parents=[game, seeded, games, experiment, output],
+        help="Run an experiment for every combination of settings, one JSON line each."
+    )
+    commands["sweep"].add_argument(
+        "--vary", type=grid_axis, action="append", metavar="NAME=VALUE,VALUE,...",
+        help="Try every one of these values of a Player attribute, --werewolves, "
+        "--villagers or --max-revotes. Repeatable; every combination is run."
+    )
+    commands["bench"] = subparsers.add_parser(
+        "bench", parents=[output], help="Run the benchmark suite."
+    )
+    commands["bench"].add_argument(
+        "benchmark", nargs="?", choices=("startup", "workload", "all"), default="all"
+    )
+    commands["bench"].add_argument(
+        "--runs", "-r", type=positive_int, default=5, help="Repeat every measurement this often."
+    )
+    commands["bench"].add_argument(
+        "--games", "-n", type=positive_int, default=20, help="Games per workload sample."
+    )
+    commands["profile"] = subparsers.add_parser(
+        "profile", parents=[game, seeded, games],
+        help="Profile a sample of the games of an experiment with cProfile."
+    )
+    commands["profile"].add_argument(
+        "--fraction", "-f", type=fraction, default=DEFAULT_FRACTION,
+        help="Profile this fraction of the games, spread evenly over the experiment."
+    )
+    commands["profile"].add_argument(
+        "--jobs", "-j", type=positive_int, default=1,
+        help="Play in this many processes; their profiles are added up."
+    )
+    commands["profile"].add_argument(
+        "--output", "-o", default="profile.pstats", help="Write the profile to this .pstats file."
+    )
+    commands["profile"].add_argument(
+        "--collapsed", default=None,
+        help="Write the collapsed stacks, by game phase, to this file. Defaults to "
+        "--output with a .collapsed extension."
+    )
+    commands["profile"].add_argument(
+        "--sort", default="cumulative", help="Sort the report by this pstats key."
+    )
+    commands["profile"].add_argument(
+        "--limit", type=positive_int, default=30, help="Report this many functions."
+    )
+    commands["query"] = subparsers.add_parser(
+        "query", parents=[output],
+        help="Tally the outcomes of the games in a column store, by configuration."
+    )
+    commands["query"].add_argument("store", help="The directory of the column store.")
+    commands["query"].add_argument(
+        "--by", default=None,
+        help="Group games by this Player attribute, or by this setting of the experiment "
+        "(werewolves, villagers, max_revotes...)."
+    )
+    commands["query"].add_argument(
+        "--width", type=positive_float, default=0.1,
+        help="Group Player attributes into buckets this wide."
+    )
+    return parser, commands
+
+
+def _config_defaults(command: ArgumentParser, config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The settings of `config` that `command` takes, validated like the options
+    they stand for.
+    """
+    actions: Dict[str, Any] = {action.dest: action for action in command._actions}
+    defaults: Dict[str, Any] = {}
+    for name, value in config.items():
+        action = actions.get(name)
+        if action is None or name == "config":
+            continue
+        try:
+            if name in ("attributes", "versus", "vary"):
+                if not isinstance(value, dict):
+                    raise ArgumentTypeError("expected an object, got %r" % (value,))
+                defaults[name] = [
+                    action.type("%s=%s" % (
+                        key, ",".join(map(str, item)) if isinstance(item, list) else item
+                    )) for key, item in value.items()
+                ]
+            elif action.type is not None:
+                defaults[name] = action.type(str(value))
+            elif action.choices is not None and value not in action.choices:
+                raise ArgumentTypeError("expected one of %s, got %r" % (
+                    ", ".join(map(str, action.choices)), value
+                ))
+            elif action.const is True and not isinstance(value, bool):
+                raise ArgumentTypeError("expected true or false, got %r" % (value,))
+            else:
+                defaults[name] = value
+        except ArgumentTypeError as error:
+            raise ConfigError("%s: %s" % (name, error))
+    return defaults
+
+
+def main(argv: Optional[Sequence[str]]=None) -> int:
+    parser, commands = build_parser()
+    args: Namespace = parser.parse_args(argv)
+    command: ArgumentParser = commands[args.command]
+
+    if getattr(args, "config", None):
+        known: set = {action.dest for sub in commands.values() for action in sub._actions}
+        try:
+            config: Dict[str, Any] = load_config(args.config)
+            unknown: List[str] = sorted(set(config) - known)
+            if unknown:
+                raise ConfigError("Unknown settings: %s" % ", ".join(unknown))
+            command.set_defaults(**_config_defaults(command, config))
+        except ConfigError as error:
+            command.error("%s: %s" % (args.config, error))
+        args = parser.parse_args(argv)
+
+    if getattr(args, "columns", None) and getattr(args, "threads", 1) > 1:
+        command.error("--columns takes a single thread per job; use --jobs instead.")
+    if args.command == "run":
+        in_process: List[str] = in_process_options(args)
+        if args.resume and not args.checkpoint:
+            command.error("--resume requires --checkpoint.")
+        if in_process and (args.jobs > 1 or args.threads > 1):
+            command.error("--%s plays in a single process and thread." % (
+                in_process[0].replace("_", "-")
+            ))
+        if args.versus and args.antithetic and args.games % 2:
+            command.error("--antithetic plays games in pairs; expected an even --games.")
+        if args.versus and args.games < (4 if args.antithetic else 2):
+            command.error("--versus takes at least two paired units of games to compare.")
+        if args.shards is not None and (args.shard is None or args.shard >= args.shards):
+            command.error("--shards requires --shard, in [0, %s)." % args.shards)
+    if args.command != "play":
+        _quiet()
+    return COMMANDS[args.command](args)
@@ -0,0 +1,315 @@
+"""
+A columnar store of per-game results, for experiments too big to keep a JSON
+or CSV line per game. Every field is a column of fixed-width little-endian
+integers, and rows are appended in chunks: a chunk is one raw file per column
+plus a small JSON manifest, written last, so that a chunk without a manifest
+does not exist yet. Writers never share a file, so parallel workers each
+append chunks of their own to the same store.
+
+Columns are read back through memory maps (`numpy.memmap` if NumPy is
+installed, plain `mmap` otherwise), so queries scan them without loading the
+store into memory:
+
+    store = ColumnStore("runs/")
+    outcome_counts(store, attribute_bucket("aggression", 0.1))
+
+Every chunk keeps the experiment configurations of its rows, and the `config`
+column holds the index of a row's configuration in its chunk's list.
+"""
+from __future__ import annotations
+
+from array import array
+from collections import Counter
+from .results import EndGameState
+from .type_checking import TYPE_CHECKING
+
+import json
+import math
+import mmap
+import os
+import sys
+
+if TYPE_CHECKING:
+    from .results import GameResult
+    from typing import (
+        Any, Callable, Dict, Hashable, Iterator, List, Literal, Optional, Sequence, Tuple
+    )
+
+    # The array typecodes of the columns, all of them integers
+    Typecode = Literal["q", "b", "H", "I"]
+
+COLUMNS_FORMAT: str = "wherewholf-columns"
+COLUMNS_FORMAT_VERSION: int = 2
+DEFAULT_CHUNK_ROWS: int = 1 << 16
+# (name, array typecode, NumPy dtype) of every column, in order
+COLUMNS: List[Tuple[str, Typecode, str]] = [
+    # -1 if unseeded
+    ("seed", "q", "<i8"),
+    # EndGameState value
+    ("outcome", "b", "i1"),
+    ("days", "H", "<u2"),
+    # Days, of `days`, not played out because the game was decided already
+    ("skipped_days", "H", "<u2"),
+    ("werewolf_deaths", "H", "<u2"),
+    ("villager_deaths", "H", "<u2"),
+    ("tie_rounds", "I", "<u4"),
+    ("config", "H", "<u2"),
+]
+COLUMN_NAMES: List[str] = [name for name, _, _ in COLUMNS]
+_TYPECODES: Dict[str, Typecode] = {name: typecode for name, typecode, _ in COLUMNS}
+_DTYPES: Dict[str, str] = {name: dtype for name, _, dtype in COLUMNS}
+_LITTLE_ENDIAN: bool = sys.byteorder == "little"
+_MANIFEST_SUFFIX: str = ".json"
+
+
+class ColumnStoreError(Exception):
+    """
+    Thrown when a store holds something other than version
+    COLUMNS_FORMAT_VERSION chunks.
+    """
+    pass
+
+
+def _numpy() -> Any:
+    """
+    NumPy, or None where it is not installed.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class ChunkWriter(object):
+    """
+    Appends rows to a store, `chunk_rows` rows to a chunk. Chunks are named
+    after the writer and the row they start at, so no two writers may share a
+    `name`.
+    """
+
+    def __init__(self, path: str, name: str, chunk_rows: int=DEFAULT_CHUNK_ROWS):
+        if chunk_rows < 1:
+            raise ValueError("Expected a positive number of rows per chunk, got %s." % chunk_rows)
+        self.path: str = path
+        self.name: str = name
+        self.chunk_rows: int = chunk_rows
+        # Rows appended so far, written out or not
+        self.rows: int = 0
+        self.__configs: List[Dict[str, Any]] = []
+        self.__config_ids: Dict[str, int] = {}
+        self.__buffers: Dict[str, array] = {}
+        self.__clear()
+
+    def __clear(self) -> None:
+        self.__configs = []
+        self.__config_ids = {}
+        self.__last_config: Optional[Dict[str, Any]] = None
+        self.__last_config_id: int = 0
+        self.__buffers = {name: array(typecode) for name, typecode, _ in COLUMNS}
+
+    def config_id(self, config: Dict[str, Any]) -> int:
+        """
+        The value of the `config` column for rows of games played with
+        `config`, in the chunk being written.
+        """
+        if config is self.__last_config:
+            return self.__last_config_id
+        key: str = json.dumps(config, sort_keys=True)
+        config_id: Optional[int] = self.__config_ids.get(key)
+        if config_id is None:
+            config_id = self.__config_ids[key] = len(self.__configs)
+            self.__configs.append(config)
+        # Experiments append every game with the same dict.
+        self.__last_config, self.__last_config_id = config, config_id
+        return config_id
+
+    def append(self, result: GameResult, config: Dict[str, Any]) -> None:
+        werewolf_deaths: int = sum(1 for _, _, werewolf in result.deaths if werewolf)
+        buffers: Dict[str, array] = self.__buffers
+        buffers["seed"].append(-1 if result.seed is None else result.seed)
+        buffers["outcome"].append(result.outcome.value)
+        buffers["days"].append(result.days)
+        buffers["skipped_days"].append(result.skipped_days)
+        buffers["werewolf_deaths"].append(werewolf_deaths)
+        buffers["villager_deaths"].append(len(result.deaths) - werewolf_deaths)
+        buffers["tie_rounds"].append(result.tie_rounds)
+        buffers["config"].append(self.config_id(config))
+        self.rows += 1
+        if len(buffers["seed"]) >= self.chunk_rows:
+            self.flush()
+
+    def resume(self, rows: int) -> None:
+        """
+        Carry on after the first `rows` rows of an earlier writer of the same
+        name, e.g. an experiment resumed from a checkpoint. Chunks that writer
+        wrote past them get overwritten, as long as both flush at the same
+        rows.
+        """
+        self.__clear()
+        self.rows = rows
+
+    def flush(self) -> None:
+        """
+        Write the rows appended since the last flush as a chunk, atomically.
+        """
+        count: int = len(self.__buffers["seed"])
+        if not count:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        chunk: str = os.path.join(self.path, "%s-%012d" % (self.name, self.rows - count))
+        for name, buffer in self.__buffers.items():
+            if not _LITTLE_ENDIAN:
+                buffer.byteswap()
+            with open("%s.%s" % (chunk, name), "wb") as column_file:
+                buffer.tofile(column_file)
+        manifest: Dict[str, Any] = {
+            "format": COLUMNS_FORMAT,
+            "version": COLUMNS_FORMAT_VERSION,
+            "rows": count,
+            "columns": _DTYPES,
+            "configs": self.__configs
+        }
+        tmp_path: str = "%s%s.tmp%s" % (chunk, _MANIFEST_SUFFIX, os.getpid())
+        with open(tmp_path, "w") as manifest_file:
+            json.dump(manifest, manifest_file, sort_keys=True)
+        os.replace(tmp_path, chunk + _MANIFEST_SUFFIX)
+        self.__clear()
+
+    def __enter__(self) -> "ChunkWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.flush()
+
+
+class Chunk(object):
+    """
+    A chunk of `rows` rows whose column files start with `path`.
+    """
+
+    def __init__(self, path: str, rows: int, configs: List[Dict[str, Any]]):
+        self.path: str = path
+        self.rows: int = rows
+        self.configs: List[Dict[str, Any]] = configs
+
+    @staticmethod
+    def read(manifest_path: str) -> "Chunk":
+        with open(manifest_path) as manifest_file:
+            raw: Dict[str, Any] = json.load(manifest_file)
+        if (
+            raw.get("format") != COLUMNS_FORMAT or raw.get("version") != COLUMNS_FORMAT_VERSION
+            or raw.get("columns") != _DTYPES
+        ):
+            raise ColumnStoreError("%s is not a version %s column chunk." % (
+                manifest_path, COLUMNS_FORMAT_VERSION
+            ))
+        return Chunk(manifest_path[:-len(_MANIFEST_SUFFIX)], raw["rows"], raw["configs"])
+
+    def column(self, name: str) -> Any:
+        """
+        The column, memory-mapped: a read-only `numpy.memmap` if NumPy is
+        installed, a memoryview of integers otherwise.
+        """
+        if name not in _TYPECODES:
+            raise KeyError("No column %s; expected one of %s." % (name, COLUMN_NAMES))
+        path: str = "%s.%s" % (self.path, name)
+        numpy = _numpy()
+        if numpy is not None:
+            return numpy.memmap(path, dtype=_DTYPES[name], mode="r", shape=(self.rows,))
+        if not _LITTLE_ENDIAN:
+            values = array(_TYPECODES[name])
+            with open(path, "rb") as column_file:
+                values.fromfile(column_file, self.rows)
+            values.byteswap()
+            return memoryview(values)
+        with open(path, "rb") as column_file:
+            mapped = mmap.mmap(column_file.fileno(), 0, access=mmap.ACCESS_READ)
+        # The map stays open as long as the view does.
+        return memoryview(mapped).cast(_TYPECODES[name])
+
+
+class ColumnStore(object):
+    """
+    The chunks in directory `path`.
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+
+    def writer(self, name: str, chunk_rows: int=DEFAULT_CHUNK_ROWS) -> ChunkWriter:
+        return ChunkWriter(self.path, name, chunk_rows)
+
+    def chunks(self) -> List[Chunk]:
+        if not os.path.isdir(self.path):
+            return []
+        return [
+            Chunk.read(os.path.join(self.path, name)) for name in sorted(os.listdir(self.path))
+            if name.endswith(_MANIFEST_SUFFIX)
+        ]
+
+    def __len__(self) -> int:
+        return sum(chunk.rows for chunk in self.chunks())
+
+    def scan(self, names: Sequence[str]) -> Iterator[Tuple[Chunk, Dict[str, Any]]]:
+        """
+        Every chunk with its columns `names`, memory-mapped.
+        """
+        for chunk in self.chunks():
+            yield chunk, {name: chunk.column(name) for name in names}
+
+
+def outcome_counts(
+    store: ColumnStore, key: Callable[[Dict[str, Any]], Hashable]
+) -> Dict[Hashable, Counter]:
+    """
+    The outcomes of the games in `store`, by EndGameState name, grouped by
+    `key` of the configuration of the games.
+    """
+    numpy = _numpy()
+    # Outcomes are coded from UNKNOWN_CONDITION (-1) up.
+    lowest: int = min(state.value for state in EndGameState)
+    span: int = max(state.value for state in EndGameState) - lowest + 1
+    groups: Dict[Hashable, Counter] = {}
+    for chunk, columns in store.scan(("config", "outcome")):
+        if numpy is not None:
+            codes = columns["config"].astype(numpy.int64) * span + (columns["outcome"] - lowest)
+            flat = numpy.bincount(codes, minlength=len(chunk.configs) * span)
+            counts: Dict[Tuple[int, int], int] = {
+                (config_id, outcome + lowest): int(count)
+                for (config_id, outcome), count in numpy.ndenumerate(flat.reshape(-1, span))
+                if count
+            }
+        else:
+            counts = Counter(zip(columns["config"], columns["outcome"]))
+        for (config_id, outcome), count in counts.items():
+            group: Counter = groups.setdefault(key(chunk.configs[config_id]), Counter())
+            group[EndGameState(outcome).name] += count
+    return groups
+
+
+def win_rates(
+    groups: Dict[Hashable, Counter], outcome: EndGameState=EndGameState.VILLAGERS_WON
+) -> Dict[Hashable, float]:
+    """
+    The rate of `outcome` in every group of `outcome_counts`.
+    """
+    return {
+        group: counts[outcome.name] / sum(counts.values())
+        for group, counts in groups.items() if counts
+    }
+
+
+def attribute_bucket(name: str, width: float) -> Callable[[Dict[str, Any]], Optional[float]]:
+    """
+    A `key` for `outcome_counts` that groups configurations by the Player
+    attribute `name`, rounded down to a multiple of `width`. Configurations
+    that leave the attribute at its default go in the None group.
+    """
+    def key(config: Dict[str, Any]) -> Optional[float]:
+        value: Optional[float] = config.get("player_attributes", {}).get(name)
+        if value is None:
+            return None
+        # Rounded, so that e.g. 0.3 goes with 0.3 and not 0.2 for a width of 0.1
+        return round(math.floor(round(value / width, 9)) * width, 9)
+    return key
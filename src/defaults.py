@@ -0,0 +1,32 @@
+"""
+Defaults of the settings that the command line shows before it plays
+anything. They live here, apart from the modules that use them, so that
+parsing arguments imports nothing else; see `src/cli.py`.
+"""
+from __future__ import annotations
+
+from .type_checking import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Optional
+
+# Games between checkpoints (src/checkpoint.py)
+DEFAULT_CHECKPOINT_EVERY: int = 1000
+# Share of games profiled (src/profiling.py)
+DEFAULT_FRACTION: float = 0.05
+# Seconds between progress reports (src/progress.py)
+DEFAULT_INTERVAL: float = 5.0
+# What the village resolves ties with before falling back, unless told
+# otherwise (src/ties.py).
+DEFAULT_MAX_REVOTES: int = 10
+# A typical game of a dozen players takes less than a hundred steps
+# (src/watchdog.py).
+DEFAULT_MAX_STEPS: int = 10000
+# No time budget unless asked for: whether a game is aborted should not depend
+# on how loaded the machine is.
+DEFAULT_MAX_SECONDS: Optional[float] = None
+# How much likelier tilted games pick the players who have to die for the
+# outcome they are tilted toward (src/importance.py). Stronger tilts see the
+# outcome more often, but the likelihood ratios of the games that get there
+# spread out so much that the estimate gets worse.
+DEFAULT_STRENGTH: float = 2.0
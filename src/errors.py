@@ -9,3 +9,16 @@ class InvalidGameStateError(Exception):
     For when the game has reached an unworkable state.
     """
     pass
+
+class GameBudgetExceededError(Exception):
+    """
+    Thrown when a game takes more steps or more time than its watchdog allows.
+    """
+
+    def __init__(self, phase: str, steps: int, elapsed: float):
+        super().__init__("Budget exceeded during %s after %s steps and %.3fs." % (
+            phase, steps, elapsed
+        ))
+        self.phase: str = phase
+        self.steps: int = steps
+        self.elapsed: float = elapsed
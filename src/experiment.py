@@ -0,0 +1,494 @@
+"""
+Experiments: many games of the same settings, played on either engine, on
+threads or as shards, with statistics, progress, checkpoints and column
+stores on request. `python -m src run` (see `src/cli.py`) is the command line
+to them.
+"""
+from __future__ import annotations
+
+from .game_characters import GameCharacter, Player, SanitizedPlayer, Werewolf, Villager
+from .integer_engine import IntegerGame, Roster
+from .moderator import EndGameState, Moderator
+from .checkpoint import Checkpoint, DEFAULT_CHECKPOINT_EVERY
+from .pubsub import PubSubBroker
+from .ties import RandomTieBreaker, TieBreaker
+from .type_checking import TYPE_CHECKING
+from .watchdog import GameWatchdog
+
+from collections import Counter
+from contextlib import ExitStack
+
+import copy
+import os
+import random
+
+if TYPE_CHECKING:
+    from .columnar import ChunkWriter
+    from .memprofile import MemoryProfiler
+    from .progress import ProgressMetrics
+    from .shards import ShardResult, ShardSpec
+    from .importance import Tilt
+    from .results import GameResult
+    from .rng import GameRandom
+    from .stats import GameStatsAggregator, ImportanceSampledRate, PairedDifference
+    from .watchdog import StalledGame
+    from typing import Any, Dict, List, Optional, Set, Tuple
+
+# Both engines play the same games given the same seeds; see
+# src/integer_engine.py.
+OBJECT_ENGINE: str = "objects"
+INTEGER_ENGINE: str = "integer"
+ENGINES = (OBJECT_ENGINE, INTEGER_ENGINE)
+# Games handed to a thread at a time by Experiment.run_threads
+THREAD_BATCH_GAMES: int = 50
+# Whether every voter gets polled, even once the vote is decided
+VOTE_POLLING: Dict[str, Optional[bool]] = {
+    "auto": None,
+    "everyone": True,
+    "until-decided": False
+}
+
+
+class Experiment(object):
+
+    def __init__(
+        self,
+        werewolf_count: int=2,
+        villager_count: int=4,
+        tie_breaker: Optional[TieBreaker]=None,
+        watchdog: Optional[GameWatchdog]=None,
+        engine: str=OBJECT_ENGINE,
+        everyone_votes: Optional[bool]=None,
+        player_attributes: Optional[Dict[str, float]]=None
+    ):
+        if engine not in ENGINES:
+            raise ValueError("Unknown engine %s, expected one of %s." % (engine, ENGINES))
+        self.engine: str = engine
+        self.everyone_votes: Optional[bool] = everyone_votes
+        self.werewolf_count: int = werewolf_count
+        self.villager_count: int = villager_count
+        # Passed on to every Player, e.g. {"aggression": 0.5}
+        self.player_attributes: Dict[str, float] = dict(player_attributes or {})
+        # Shared by all games so that its tally covers the whole experiment.
+        self.tie_breaker: TieBreaker = tie_breaker if tie_breaker else RandomTieBreaker()
+        self.watchdog: GameWatchdog = watchdog if watchdog else GameWatchdog()
+        # Games aborted for going over the watchdog's budget
+        self.stalls: List[StalledGame] = []
+        self.__roster: Optional[Roster] = None
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        return {
+            "werewolves": self.werewolf_count,
+            "villagers": self.villager_count,
+            "tie_breaker": self.tie_breaker.NAME,
+            "max_revotes": self.tie_breaker.max_revotes,
+            "max_steps": self.watchdog.max_steps,
+            "everyone_votes": self.everyone_votes,
+            "player_attributes": dict(self.player_attributes)
+        }
+    
+    def __make_player(self, role: GameCharacter, count: int) -> Player:
+        return Player.with_attributes(
+            "%s Player #%s" % (role, count), role, self.player_attributes
+        )
+
+    def make_players(self) -> Set[Player]:
+        """
+        Every game gets a fresh set of players so that a game only depends on
+        its seed and not on the games played before it.
+        """
+        players: Set[Player] = set()
+        werewolf_role = Werewolf()
+
+        for i in range(self.werewolf_count):
+            players.add(self.__make_player(werewolf_role, i))
+
+        villager_role = Villager()
+
+        for i in range(self.villager_count):
+            players.add(self.__make_player(villager_role, i))
+
+        return players
+
+    @property
+    def roster(self) -> Roster:
+        """
+        The players of `make_players`, for the integer engine.
+        """
+        if self.__roster is None:
+            players: Set[Player] = self.make_players()
+            self.__roster = Roster.from_players(players)
+            for player in players:
+                SanitizedPlayer.forget(player)
+        return self.__roster
+
+    def play_game(
+        self,
+        seed: Optional[int]=None,
+        log_discriminant: Optional[str]=None,
+        pubsub_broker: Optional[PubSubBroker]=None,
+        antithetic: bool=False
+    ) -> EndGameState:
+        return self.__play_game(seed, log_discriminant, pubsub_broker, antithetic)[0].outcome
+
+    def play_game_for_result(
+        self,
+        seed: Optional[int]=None,
+        log_discriminant: Optional[str]=None,
+        pubsub_broker: Optional[PubSubBroker]=None
+    ) -> GameResult:
+        """
+        Play a game and return the record of what happened in it.
+        """
+        return self.__play_game(seed, log_discriminant, pubsub_broker)[0]
+
+    def __play_game(
+        self,
+        seed: Optional[int]=None,
+        log_discriminant: Optional[str]=None,
+        pubsub_broker: Optional[PubSubBroker]=None,
+        antithetic: bool=False,
+        tilt: Optional[Tilt]=None
+    ) -> Tuple[GameResult, GameRandom]:
+        """
+        Play a game, returning its result and the generator it drew from.
+        """
+        if self.engine == INTEGER_ENGINE:
+            game = IntegerGame(
+                self.roster, seed, pubsub_broker, self.tie_breaker, self.watchdog,
+                self.everyone_votes, antithetic, tilt
+            )
+            game_result: GameResult = game.play_for_result()
+            if game.stall is not None:
+                self.stalls.append(game.stall)
+            return game_result, game.rng
+
+        players: Set[Player] = self.make_players()
+        moderator = Moderator(
+            set(players), log_discriminant, seed, pubsub_broker, self.tie_breaker, self.watchdog,
+            self.everyone_votes, antithetic, tilt
+        )
+        result: GameResult = moderator.play_for_result()
+
+        if moderator.stall is not None:
+            self.stalls.append(moderator.stall)
+
+        for player in players:
+            SanitizedPlayer.forget(player)
+
+        assert moderator.rng is not None
+        return result, moderator.rng
+
+    def run(
+        self,
+        game_iterations=100,
+        memprofiler: Optional[MemoryProfiler]=None,
+        seed: Optional[int]=None,
+        stats: Optional[GameStatsAggregator]=None,
+        progress: Optional[ProgressMetrics]=None,
+        checkpoint_path: Optional[str]=None,
+        checkpoint_every: int=DEFAULT_CHECKPOINT_EVERY,
+        resume: bool=False,
+        results: Optional[ChunkWriter]=None
+    ) -> Counter:
+        """
+        Play `game_iterations` games. If a `seed` is given, the games are seeded
+        with `seed`, `seed + 1`, ... so that they can be replayed. If given,
+        `stats` gets fed the events of every game and `progress` gets
+        published while the games are played.
+
+        If given a `checkpoint_path`, a checkpoint is written there every
+        `checkpoint_every` games and once all games are played. To `resume`
+        from that checkpoint, run the same experiment again: the games already
+        played are not played again, and the result is the same as that of a
+        run that never stopped.
+
+        If given, `results` gets a row for every game (see src/columnar.py).
+        It is flushed with every checkpoint, and at the end.
+        """
+        wins: Counter = Counter()
+        pubsub_broker: Optional[PubSubBroker] = None
+        completed: int = 0
+
+        if resume and checkpoint_path and os.path.exists(checkpoint_path):
+            completed = self.__restore(
+                Checkpoint.read(checkpoint_path), game_iterations, seed, wins, stats
+            )
+            if results is not None:
+                results.resume(completed)
+
+        if stats:
+            pubsub_broker = PubSubBroker()
+            pubsub_broker.subscribers.append(stats)
+
+        config: Dict[str, Any] = self.config
+
+        if memprofiler:
+            memprofiler.start()
+
+        if progress:
+            progress.total_games = game_iterations - completed
+
+        with ExitStack() as context:
+            if progress:
+                context.enter_context(progress)
+            for i in range(completed, game_iterations):
+                game_seed: Optional[int] = None if seed is None else seed + i
+                outcome: EndGameState
+                stalls: int = len(self.stalls)
+                if results is None:
+                    outcome = self.play_game(game_seed, str(i), pubsub_broker)
+                else:
+                    result: GameResult = self.play_game_for_result(
+                        game_seed, str(i), pubsub_broker
+                    )
+                    results.append(result, config)
+                    outcome = result.outcome
+                wins[outcome] += 1
+
+                if memprofiler:
+                    memprofiler.after_game(i + 1)
+                if progress:
+                    progress.after_game(outcome, len(self.stalls) > stalls)
+                played: int = i + 1
+                if checkpoint_path and (
+                    played % checkpoint_every == 0 or played == game_iterations
+                ):
+                    if results is not None:
+                        results.flush()
+                    checkpoint = self.__checkpoint(game_iterations, seed, played, wins, stats)
+                    checkpoint.write(checkpoint_path)
+
+        if memprofiler:
+            memprofiler.stop()
+        if results is not None:
+            results.flush()
+
+        return wins
+
+    def run_threads(
+        self,
+        game_iterations: int=100,
+        threads: int=4,
+        seed: Optional[int]=None,
+        stats: Optional[GameStatsAggregator]=None,
+        batch_games: int=THREAD_BATCH_GAMES
+    ) -> Counter:
+        """
+        Play `game_iterations` games like `run`, on `threads` threads. The
+        games are played in batches of `batch_games` consecutive seeds, each
+        by a copy of this experiment with a watchdog and tie breaker of its
+        own, and the batches are added up in order: the outcomes, tie tally
+        and stalls are the same as those of `run` for any number of threads,
+        and so are the statistics, up to rounding. Unseeded experiments get
+        a random seed.
+
+        Only free-threaded CPython (3.13t and later) plays the games of
+        several threads at once; elsewhere, play in processes for speed (see
+        `src/cli.py`).
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        if seed is None:
+            seed = random.getrandbits(32)
+        if self.engine == INTEGER_ENGINE:
+            # Built once, here, and shared by the copies.
+            self.roster
+
+        wins: Counter = Counter()
+        with ThreadPoolExecutor(threads) as pool:
+            batches = pool.map(
+                lambda start: self.__play_batch(
+                    seed + start, min(batch_games, game_iterations - start), stats is not None
+                ),
+                range(0, game_iterations, batch_games)
+            )
+            for batch, batch_wins, batch_stats in batches:
+                wins.update(batch_wins)
+                self.tie_breaker.tally.update(batch.tie_breaker.tally)
+                self.stalls.extend(batch.stalls)
+                if stats is not None and batch_stats is not None:
+                    stats.merge(batch_stats)
+        return wins
+
+    def __play_batch(
+        self, seed: int, games: int, keep_stats: bool
+    ) -> Tuple[Experiment, Counter, Optional[GameStatsAggregator]]:
+        """
+        Play `games` games from `seed` on in a copy of this experiment that
+        shares no game state with it, and return the copy too.
+        """
+        from .stats import GameStatsAggregator
+
+        batch: Experiment = copy.copy(self)
+        batch.tie_breaker = copy.copy(self.tie_breaker)
+        batch.tie_breaker.tally = Counter()
+        batch.watchdog = copy.copy(self.watchdog)
+        batch.stalls = []
+        stats: Optional[GameStatsAggregator] = GameStatsAggregator() if keep_stats else None
+        return batch, batch.run(games, seed=seed, stats=stats), stats
+
+    def __checkpoint_key(
+        self, game_iterations: int, seed: Optional[int], stats: Optional[GameStatsAggregator]
+    ) -> Dict[str, Any]:
+        """
+        What a checkpoint has to match to be resumed from.
+        """
+        return dict(
+            self.config, engine=self.engine, games=game_iterations, seed=seed,
+            stats=stats is not None
+        )
+
+    def __checkpoint(
+        self,
+        game_iterations: int,
+        seed: Optional[int],
+        completed: int,
+        wins: Counter,
+        stats: Optional[GameStatsAggregator]
+    ) -> Checkpoint:
+        return Checkpoint(
+            self.__checkpoint_key(game_iterations, seed, stats),
+            completed,
+            {outcome.name: count for outcome, count in wins.items()},
+            stats.to_dict() if stats else None,
+            dict(self.tie_breaker.tally),
+            [stall.to_dict() for stall in self.stalls],
+            random.getstate()
+        )
+
+    def __restore(
+        self,
+        checkpoint: Checkpoint,
+        game_iterations: int,
+        seed: Optional[int],
+        wins: Counter,
+        stats: Optional[GameStatsAggregator]
+    ) -> int:
+        """
+        Pick up the tallies, statistics and state of `random` of `checkpoint`.
+        Returns the number of games it has played.
+        """
+        from .checkpoint import IncompatibleCheckpointError
+        from .stats import GameStatsAggregator
+        from .watchdog import StalledGame
+
+        expected: Dict[str, Any] = self.__checkpoint_key(game_iterations, seed, stats)
+        if checkpoint.experiment != expected:
+            raise IncompatibleCheckpointError("The checkpoint is of %s, not of %s." % (
+                checkpoint.experiment, expected
+            ))
+
+        wins.update({EndGameState[name]: count for name, count in checkpoint.tallies.items()})
+        if stats is not None and checkpoint.stats is not None:
+            stats.merge(GameStatsAggregator.from_dict(checkpoint.stats))
+        self.tie_breaker.tally.update(checkpoint.tie_tally)
+        self.stalls.extend(StalledGame(**stall) for stall in checkpoint.stalls)
+        random.setstate(checkpoint.random_state)
+        return checkpoint.completed
+
+    def run_paired(
+        self,
+        other: "Experiment",
+        game_iterations: int=100,
+        seed: Optional[int]=None,
+        antithetic: bool=False,
+        outcome: EndGameState=EndGameState.VILLAGERS_WON
+    ) -> PairedDifference:
+        """
+        Compare how often `outcome` happens in this experiment and in `other`,
+        playing `game_iterations` games of each. Both play the game of seed
+        `seed + i` as their i-th, so that they draw common random numbers. If
+        `antithetic`, games come in pairs: the game of a seed and its
+        antithetic game, so `game_iterations` has to be even. Either way, it
+        takes two units for a confidence interval.
+        """
+        from .stats import PairedDifference
+
+        games_per_unit: int = 2 if antithetic else 1
+        if game_iterations % games_per_unit or game_iterations < 2 * games_per_unit:
+            raise ValueError("Expected %s of at least %s games, got %s." % (
+                "an even number" if antithetic else "a number", 2 * games_per_unit,
+                game_iterations
+            ))
+        paired = PairedDifference(games_per_unit)
+        if seed is None:
+            seed = random.getrandbits(32)
+
+        for i in range(game_iterations // games_per_unit):
+            outcomes: List[List[float]] = [
+                [
+                    float(experiment.play_game(seed + i, str(i), antithetic=flip) == outcome)
+                    for flip in (False, True)[:games_per_unit]
+                ]
+                for experiment in (self, other)
+            ]
+            paired.add(*outcomes)
+
+        return paired
+
+    def run_tilted(
+        self,
+        tilt: Tilt,
+        game_iterations: int=100,
+        seed: Optional[int]=None
+    ) -> ImportanceSampledRate:
+        """
+        Estimate how often `tilt.target` happens by playing `game_iterations`
+        games tilted toward it; see src/importance.py. If a `seed` is given,
+        the games are seeded with `seed`, `seed + 1`, ...
+        """
+        from .rng import TiltedRandom
+        from .stats import ImportanceSampledRate
+
+        rate = ImportanceSampledRate()
+        for i in range(game_iterations):
+            game_seed: Optional[int] = None if seed is None else seed + i
+            result, game_rng = self.__play_game(game_seed, str(i), tilt=tilt)
+            assert isinstance(game_rng, TiltedRandom)
+            rate.add(result.outcome == tilt.target, game_rng.likelihood_ratio)
+
+        return rate
+
+    def run_shard(self, spec: ShardSpec, output_dir: str) -> str:
+        """
+        Play the games of the given shard and write its result file into
+        `output_dir`. Does nothing if that shard has already been written.
+        """
+        from .shards import ShardResult
+
+        path: str = os.path.join(output_dir, spec.filename)
+        if os.path.exists(path) and ShardResult.read(path).spec == spec:
+            return path
+
+        self.play_shard(spec).write(path)
+        return path
+
+    def play_shard(
+        self, spec: ShardSpec, stats: bool=True, columns: Optional[str]=None, threads: int=1
+    ) -> ShardResult:
+        """
+        Play the games of the given shard, keeping statistics if `stats`, on
+        `threads` threads. If given the directory of a column store,
+        `columns`, the shard appends the results of its games to it; that
+        takes a single thread.
+        """
+        from .shards import ShardResult
+        from .stats import GameStatsAggregator
+
+        aggregator: Optional[GameStatsAggregator] = GameStatsAggregator() if stats else None
+        if threads > 1:
+            if columns is not None:
+                raise ValueError("Column stores are written from a single thread.")
+            wins: Counter = self.run_threads(spec.games, threads, spec.seed_start, aggregator)
+        else:
+            results: Optional[ChunkWriter] = None
+            if columns is not None:
+                from .columnar import ColumnStore
+
+                results = ColumnStore(columns).writer(spec.writer_name)
+            wins = self.run(spec.games, seed=spec.seed_start, stats=aggregator, results=results)
+        return ShardResult(
+            spec, Counter({outcome.name: count for outcome, count in wins.items()}), aggregator
+        )
@@ -1,32 +1,51 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
-from collections import Counter
 from src.errors import GameDeadLockError, InvalidGameStateError
 from src.pubsub import PubSubBroker
-from typing import Any, Callable, Dict, Iterable, List, Optional, override, Sequence, Set, Tuple, Type
-from .utils import NominationRecencyTracker, ValueTieCounter, WorldModel
+from . import rng
+from .type_checking import TYPE_CHECKING
+from .utils import NominationRecencyTracker, ValueTieCounter, VoteTally, WorldModel
+from .watchdog import DAY_CONSENSUS, NIGHT, NOMINATIONS, VOTES
 
 import os
-import random
 import logging
+import threading
+
+if TYPE_CHECKING:
+    from .watchdog import GameWatchdog
+    from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Type
+
+    VoteTable = Dict["SanitizedPlayer", Optional["SanitizedPlayer"]]
+    NominationMap = Dict["SanitizedPlayer", "SanitizedPlayer"]
 
 
 CONFIGURED_LOGGERS: Dict[str, Any] = {}
-VoteTable = Dict["SanitizedPlayer", Optional["SanitizedPlayer"]]
-NominationMap = Dict["SanitizedPlayer", "SanitizedPlayer"]
+# Held while configuring a logger, so that games starting together on several
+# threads don't each add a handler.
+CONFIGURED_LOGGERS_LOCK = threading.Lock()
+
+
+DEFAULT_AGGRESSION: float = 0.3
+DEFAULT_SUGGESTIBILITY: float = 0.4
+DEFAULT_PERSUASIVENESS: float = 0.5
+DEFAULT_NOMINATION_RECENCY: int = 3
 
 
 class Player(object):
 
     UNIQUE_PICK_LIMIT = 100
+    # What `with_attributes` takes
+    ATTRIBUTES = ("aggression", "suggestibility", "persuasiveness", "nomination_recency")
 
     def __init__(
         self,
         name: str,
         role: "GameCharacter",
-        aggression: float=0.3,
-        suggestibility: float=0.4,
-        persuasiveness: float=0.5,
-        nomination_recency: int=3
+        aggression: float=DEFAULT_AGGRESSION,
+        suggestibility: float=DEFAULT_SUGGESTIBILITY,
+        persuasiveness: float=DEFAULT_PERSUASIVENESS,
+        nomination_recency: int=DEFAULT_NOMINATION_RECENCY
     ):
         self.name: str = name
         self.role: GameCharacter = role
@@ -52,13 +71,38 @@ class Player(object):
         self.logger = logging.getLogger("Player")
         self.__configure_logger()
 
+    @staticmethod
+    def with_attributes(
+        name: str, role: "GameCharacter", attributes: Dict[str, float]
+    ) -> "Player":
+        """
+        A player with the attributes in `attributes`, by name (e.g.
+        {"aggression": 0.5}), and the defaults for the others.
+        """
+        unknown: List[str] = sorted(set(attributes) - set(Player.ATTRIBUTES))
+        if unknown:
+            raise ValueError("Unknown Player attributes %s, expected some of %s." % (
+                unknown, Player.ATTRIBUTES
+            ))
+        return Player(
+            name, role,
+            attributes.get("aggression", DEFAULT_AGGRESSION),
+            attributes.get("suggestibility", DEFAULT_SUGGESTIBILITY),
+            attributes.get("persuasiveness", DEFAULT_PERSUASIVENESS),
+            int(attributes.get("nomination_recency", DEFAULT_NOMINATION_RECENCY))
+        )
+
     def __player_attr_value_check(self, v: float):
         if v < 0 or v > 1:
             raise ValueError("Attribute should be in the range [0, 1]")
 
     def __configure_logger(self, _cfg: Optional[Dict]=None) -> None:
         global CONFIGURED_LOGGERS
-        if CONFIGURED_LOGGERS.get("Player") is None:
+        if CONFIGURED_LOGGERS.get("Player") is not None:
+            return
+        with CONFIGURED_LOGGERS_LOCK:
+            if CONFIGURED_LOGGERS.get("Player") is not None:
+                return
             cfg = _cfg if _cfg is not None else {}
             log_level = cfg.get("logLevel", os.environ.get("WHEREWHOLF_LOGGER", "INFO"))
             self.logger.setLevel(logging.getLevelName(log_level))
@@ -97,23 +141,24 @@ class Player(object):
 
     @property
     def hive_members(self):
-        return self.world_model.get_hive(type(self.role))
+        return self.world_model.get_hive(character_of(self.role))
 
     def learn_hive_member(self, sanitized_player: "SanitizedPlayer"):
-        self.world_model.map(sanitized_player, type(self.role))
+        self.world_model.map(sanitized_player, character_of(self.role))
     
     def __make_attr_decision(
         self,
         attr: float,
-        decider: Callable[[], float]=random.random
+        decider: Optional[Callable[[], float]]=None
     ) -> bool:
         """
         Where `attr` is a value in the range [0, 1] and `decider` returns a
         value in the same range, this function returns True when `decider`
         returns a value in the range [0, attr]. The distribution can be
-        controlled by passing a different `decider` function.
+        controlled by passing a different `decider` function; by default, it
+        is the game's generator.
         """
-        return decider() <= attr
+        return (decider or rng.current().random)() <= attr
 
     def __is_player_credible(self, player: "SanitizedPlayer") -> bool:
         # Very simple for now
@@ -163,6 +208,13 @@ class Player(object):
             )
         return None
 
+    def skip_vote(self) -> None:
+        """
+        Called instead of `daytime_behavior` when the vote was decided before
+        this player's turn.
+        """
+        self.nominated_this_turn = None
+
     def ask_lynch_nomination(self, players: Sequence["SanitizedPlayer"]) -> Optional["Nomination"]:
         """
         Given the players still alive in the game, get a nomination from this
@@ -205,7 +257,7 @@ class Player(object):
         the result of this vote.
         """
         victim_sanitized = SanitizedPlayer.sanitize(victim)
-        if type(victim.role) is not Werewolf:
+        if not isinstance(victim.role, Werewolf):
             for nominator in final_nominations:
                 if final_nominations[nominator] is victim_sanitized:
                     self.world_model.map(nominator, Werewolf)
@@ -234,6 +286,9 @@ class SanitizedPlayer(object):
     
     __SANITATION_CACHE: Dict[Player, "SanitizedPlayer"] = {}
     __PLAYER_MEMORY: Dict["SanitizedPlayer", Player] = {}
+    # Held while adding to or removing from the caches, which games on other
+    # threads are using. Lookups need no lock.
+    __LOCK = threading.Lock()
     __create_key = object()
 
     def __init__(self, create_key: Any, player: Player):
@@ -258,12 +313,36 @@ class SanitizedPlayer(object):
 
         if exists:
             return exists
-        else:
+        with SanitizedPlayer.__LOCK:
+            exists = SanitizedPlayer.__SANITATION_CACHE.get(player)
+            if exists:
+                return exists
             sanitized: SanitizedPlayer = SanitizedPlayer(cls.__create_key, player)
             SanitizedPlayer.__SANITATION_CACHE[player] = sanitized
             SanitizedPlayer.__PLAYER_MEMORY[sanitized] = player
             return sanitized
 
+    @staticmethod
+    def forget(player: Player) -> None:
+        """
+        Drop `player` from the cache. Do this once a player is done with games
+        for good; otherwise the cache grows with every game played.
+        """
+        with SanitizedPlayer.__LOCK:
+            sanitized: Optional[SanitizedPlayer] = SanitizedPlayer.__SANITATION_CACHE.pop(
+                player, None
+            )
+            if sanitized is not None:
+                del SanitizedPlayer.__PLAYER_MEMORY[sanitized]
+
+    @staticmethod
+    def cache_size() -> int:
+        """
+        How many players are in the cache: sanitized so far and not yet
+        dropped with `forget`.
+        """
+        return len(SanitizedPlayer.__SANITATION_CACHE)
+
     @staticmethod
     def recover_player_identity(splayer: "SanitizedPlayer") -> Player:
         """
@@ -342,6 +421,35 @@ class GameCharacter(ABC):
     def daytime_behavior(self, players: Sequence[SanitizedPlayer]) -> Optional[SanitizedPlayer]:
         pass
 
+    def batch_daytime_behavior(
+        self,
+        voters: Sequence[Player],
+        nominations: Sequence["Nomination"]
+    ) -> Optional[VoteTable]:
+        """
+        Optionally decide the lynch votes of all `voters`, who all play this
+        character, in a single call. This lets a strategy work on the whole
+        roster at once (e.g., drawing all of its random numbers in one go).
+
+        Implementations take over everything `Player.daytime_behavior` would
+        have done for these voters. Return None to have each voter asked
+        individually instead, which is what the base roles do.
+        """
+        return None
+
+    def batch_accept_night_suggestion(
+        self,
+        members: Sequence[Player],
+        voted_for: SanitizedPlayer,
+        suggested_by: SanitizedPlayer
+    ) -> Optional[Sequence[bool]]:
+        """
+        Batch counterpart of `Player.accept_night_suggestion`. Return, in the
+        order of `members`, whether each one accepts the suggestion or None to
+        have each member asked individually.
+        """
+        return None
+
     @abstractmethod
     def __str__(self) -> str:
         return "Generic GameCharacter"
@@ -349,16 +457,15 @@ class GameCharacter(ABC):
 
 class Werewolf(GameCharacter):
 
-    @override
     @property
     def prerequisites(self) -> Set[Type["GameCharacter"]]:
         return set()
 
     def night_action(self, players: Sequence[SanitizedPlayer]) -> Optional[SanitizedPlayer]:
-        return random.choice(players)
+        return rng.current().choice(players)
 
     def daytime_behavior(self, players: Sequence[SanitizedPlayer]) -> Optional[SanitizedPlayer]:
-        return random.choice(players)
+        return rng.current().choice(players)
 
     def __str__(self) -> str:
         return "Werewolf"
@@ -366,17 +473,16 @@ class Werewolf(GameCharacter):
 
 class Villager(GameCharacter):
 
-    @override
     @property
     def prerequisites(self) -> Set[Type[GameCharacter]]:
         return set((Werewolf,))
 
     def night_action(self, players: Sequence[SanitizedPlayer]) -> Optional[SanitizedPlayer]:
-        return random.choice(players)
+        return rng.current().choice(players)
 
     def daytime_behavior(self, players: Sequence[SanitizedPlayer]) -> Optional[SanitizedPlayer]:
         if players:
-            return random.choice(players)
+            return rng.current().choice(players)
         return None
 
     def __str__(self) -> str:
@@ -391,21 +497,45 @@ class Hive(ABC):
     """
 
     def __init__(self, pubsub_broker: Optional[PubSubBroker]=None):
+        self.__alive_players: Optional[List[Player]] = None
         # These are the players included in the hive
-        self.players: Set[Player] = set()
+        self.players = set()
         # Set of _all_ dead players
         self.dead_players: Set[Player] = set()
         self.pubsub_broker: Optional[PubSubBroker] = pubsub_broker
+        # Set by the Moderator to bound the decision loops of this hive.
+        self.watchdog: Optional[GameWatchdog] = None
         self.logger: logging.Logger = logging.getLogger("Hive")
         self.__configure_logger()
 
+    @property
+    def players(self) -> Set[Player]:
+        return self.__players
+
+    @players.setter
+    def players(self, players: Set[Player]) -> None:
+        self.__players: Set[Player] = players
+        self.__alive_players = None
+
     @property
     def can_members_know_each_other(self) -> bool:
         return False
 
+    @property
+    def acts_at_night(self) -> bool:
+        """
+        Whether the moderator should wake this hive up at night and ask for its
+        `night_consensus`.
+        """
+        return False
+
     def __configure_logger(self, _cfg: Optional[Dict]=None) -> None:
         global CONFIGURED_LOGGERS
-        if CONFIGURED_LOGGERS.get("Hive") is None:
+        if CONFIGURED_LOGGERS.get("Hive") is not None:
+            return
+        with CONFIGURED_LOGGERS_LOCK:
+            if CONFIGURED_LOGGERS.get("Hive") is not None:
+                return
             cfg = _cfg if _cfg is not None else {}
             log_level = cfg.get("logLevel", os.environ.get("WHEREWHOLF_LOGGER", "INFO"))
             self.logger.setLevel(logging.getLevelName(log_level))
@@ -420,6 +550,19 @@ class Hive(ABC):
         if self.pubsub_broker:
             self.pubsub_broker.broadcast_message(event_type, body)
 
+    def _step(self, phase: str) -> None:
+        if self.watchdog is not None:
+            self.watchdog.step(phase)
+
+    def _group_by_role(self, players: Iterable[Player]) -> Dict[GameCharacter, List[Player]]:
+        groups: Dict[GameCharacter, List[Player]] = {}
+        for player in players:
+            if player.role in groups:
+                groups[player.role].append(player)
+            else:
+                groups[player.role] = [player]
+        return groups
+
     def _get_most_aggressive(self, n: int=3) -> Tuple[Player, ...]:
         """
         Return the n most aggressive members of this Hive, ordered descending
@@ -432,8 +575,9 @@ class Hive(ABC):
     
     def add_player(self, player: Player) -> None:
         self.players.add(player)
+        self.__alive_players = None
 
-    def add_players(self, players: Set[Player]) -> None:
+    def add_players(self, players: Iterable[Player]) -> None:
         self.players = self.players.union(players)
 
     def notify_player_death(self, player: Player) -> None:
@@ -441,10 +585,23 @@ class Hive(ABC):
             self.__class__.__name__, player
         ))
         self.dead_players.add(player)
+        self.__alive_players = None
 
     @property
-    def alive_players(self) -> Set[Player]:
-        return set(self.players) - self.dead_players
+    def alive_players(self) -> List[Player]:
+        """
+        The players of this hive that are still alive, ordered by name. The
+        order of play must not depend on hashing, or else games can't be
+        reproduced from their seed.
+
+        Don't modify the returned list.
+        """
+        if self.__alive_players is None:
+            self.__alive_players = sorted(
+                (p for p in self.players if p not in self.dead_players),
+                key=lambda p: p.name
+            )
+        return self.__alive_players
 
     @property
     def consensus(self) -> int:
@@ -493,62 +650,120 @@ class WholeGameHive(Hive):
     """
 
     MAX_LOOP_ITERS = 100
+    # Unless told otherwise, votes with at least this many voters stop polling
+    # once the outcome is decided.
+    EARLY_EXIT_MIN_VOTERS = 16
+
+    def __init__(
+        self,
+        pubsub_broker: Optional[PubSubBroker]=None,
+        everyone_votes: Optional[bool]=None
+    ):
+        super().__init__(pubsub_broker)
+        # Whether all voters get polled even after the vote is decided. None
+        # leaves it to the size of the vote; see `polls_until_decided`.
+        self.everyone_votes: Optional[bool] = everyone_votes
+        # The votes of the last day_consensus
+        self.tally: Optional[VoteTally] = None
+        # Times the whole village had to nominate and vote again because the
+        # vote did not reach quorum.
+        self.consensus_retries: int = 0
 
     def night_consensus(self, players: Sequence[SanitizedPlayer]) -> Optional[SanitizedPlayer]:
         raise NotImplementedError("WholeGameHive is for lynching decisions only.")
 
+    def __poll_voters(
+        self,
+        nominations: Sequence[Nomination]
+    ) -> Iterable[Tuple[SanitizedPlayer, Optional[SanitizedPlayer]]]:
+        """
+        Ask the roles that support it for the votes of all their players at
+        once. Everyone else is asked individually.
+        """
+        alive_players = self.alive_players
+        unbatched_roles: Set[GameCharacter] = set()
+        for role, voters in self._group_by_role(alive_players).items():
+            batch_votes: Optional[VoteTable] = role.batch_daytime_behavior(voters, nominations)
+            if batch_votes is None:
+                unbatched_roles.add(role)
+            else:
+                yield from batch_votes.items()
+
+        for player in alive_players:
+            if player.role in unbatched_roles:
+                yield (SanitizedPlayer.sanitize(player), player.daytime_behavior(nominations))
+
     def __gather_votes(self, nominations: Sequence[Nomination]) -> VoteTable:
-        candidates = [nom.nomination for nom in nominations]
-        vote_counter: Counter = ValueTieCounter()
+        alive_players: List[Player] = self.alive_players
+        early_exit: bool = self.polls_until_decided(len(alive_players))
         vote_table: VoteTable = {}
+        tally: Optional[VoteTally] = None
+        stopped_early: bool = False
         deadlock_counter = 0
 
         # Force these players to vote!
-        while len(vote_counter.most_common(1)) == 0:
+        while tally is None or tally.total == 0:
+            self._step(VOTES)
             if deadlock_counter >= WholeGameHive.MAX_LOOP_ITERS:
-                raise GameDeadLockError("Can't gather enough votes. %s" % vote_counter)
+                raise GameDeadLockError("Can't gather enough votes. %s" % tally)
 
-            for player in self.alive_players:
-                voted_for: Optional[SanitizedPlayer] = player.daytime_behavior(nominations)
-                vote_table[SanitizedPlayer.sanitize(player)] = voted_for
+            tally = VoteTally(len(alive_players), self.consensus)
+            for voter, voted_for in self.__poll_voters(nominations):
+                vote_table[voter] = voted_for
+                tally.add(voted_for)
                 if voted_for is not None:
-                    self.logger.info("%s voted to lynch %s." % (player.name, voted_for))
-                    vote_counter[SanitizedPlayer.recover_player_identity(voted_for)] += 1
+                    self.logger.info("%s voted to lynch %s." % (voter.name, voted_for))
+                # Keep going while no one has voted: the whole vote would be
+                # held again rather than decided.
+                if early_exit and tally.total and tally.decided:
+                    stopped_early = tally.remaining > 0
+                    break
             deadlock_counter += 1
 
+        if stopped_early:
+            for player in alive_players:
+                if SanitizedPlayer.sanitize(player) not in vote_table:
+                    player.skip_vote()
+
+        self.tally = tally
         return vote_table
 
     def __gather_nominations(self, players: Sequence[SanitizedPlayer]) -> Sequence[Nomination]:
         aggressive_players: Tuple[Player, ...] = self._get_most_aggressive()
-        candidates: Set[Nomination] = set()
+        # Used as an ordered set; see `alive_players`.
+        candidates: Dict[Nomination, None] = {}
         for ap in aggressive_players:
             candidate: Optional[Nomination] = ap.ask_lynch_nomination(players)
             if candidate is not None:
                 self.logger.info("%s nominated %s for lynching." % (candidate.nominated_by, candidate.nomination))
-                candidates.add(candidate)
+                candidates[candidate] = None
         return list(candidates)
 
-    def __count_votes(self, vote_table: VoteTable) -> List[SanitizedPlayer]:
-        vote_counter = ValueTieCounter()
-        
-        for voter in vote_table:
-            if vote_table[voter] is not None:
-                vote_counter[vote_table[voter]] += 1
-
-        if self.has_reached_consensus(vote_counter.total()):
-            return [t[0] for t in vote_counter.most_common(1)]
-        else:
-            return []
+    def polls_until_decided(self, voters: int) -> bool:
+        """
+        Whether to stop polling voters once the remaining ones can't change the
+        outcome of the vote.
+        """
+        if self.everyone_votes is None:
+            return voters >= WholeGameHive.EARLY_EXIT_MIN_VOTERS
+        return not self.everyone_votes
 
     def day_consensus(self, players: Sequence[SanitizedPlayer]) -> Tuple[NominationMap, VoteTable]:
         vote_table: VoteTable = {}
         nomination_map: NominationMap = {}
-
-        while not self.__count_votes(vote_table): 
+        first_round: bool = True
+        self.tally = None
+
+        while self.tally is None or not self.has_reached_consensus(self.tally.total):
+            self._step(DAY_CONSENSUS)
+            if not first_round:
+                self.consensus_retries += 1
+            first_round = False
             candidates: Sequence[Nomination] = self.__gather_nominations(players)
             nomination_fishing_count = 0
 
             while not candidates:
+                self._step(NOMINATIONS)
                 if nomination_fishing_count >= WholeGameHive.MAX_LOOP_ITERS:
                     raise GameDeadLockError("No one wants to nominate anyone else! Such pacifists!")
 
@@ -574,21 +789,25 @@ class WerewolfHive(Hive):
     def can_members_know_each_other(self) -> bool:
         return True
 
+    @property
+    def acts_at_night(self) -> bool:
+        return True
+
     def night_consensus(self, players: Sequence[SanitizedPlayer]) -> Optional[SanitizedPlayer]:
         consensus_count: int = 0
         suggestion: Optional[SanitizedPlayer] = None
 
         while not self.has_reached_consensus(consensus_count):
-            nominant: Player = random.choice(self._get_most_aggressive())
+            self._step(NIGHT)
+            nominant: Player = rng.current().choice(self._get_most_aggressive())
             suggestion = nominant.night_action(players)
             self.logger.info("%s suggested to kill %s" % (nominant, suggestion))
             # This is the part where hive members discuss amongst themselves if
             # the nominated villager is killed.
-            for hive_member in self.alive_players:
-                if suggestion is not None:
-                    consensus_count += (
-                        1 if hive_member.accept_night_suggestion(suggestion, SanitizedPlayer.sanitize(nominant)) else 0
-                    )
+            if suggestion is not None:
+                consensus_count += self.__count_acceptances(
+                    suggestion, SanitizedPlayer.sanitize(nominant)
+                )
 
             if self.has_reached_consensus(consensus_count):
                 self.logger.info("WEREWOLVES Suggestion accepted")
@@ -603,6 +822,31 @@ class WerewolfHive(Hive):
     def day_consensus(self, players: Sequence[SanitizedPlayer]) -> Tuple[NominationMap, VoteTable]:
         return ({}, {})
 
+    def __count_acceptances(
+        self,
+        suggestion: SanitizedPlayer,
+        suggested_by: SanitizedPlayer
+    ) -> int:
+        alive_players = self.alive_players
+        acceptances: int = 0
+        unbatched_roles: Set[GameCharacter] = set()
+        for role, members in self._group_by_role(alive_players).items():
+            batch: Optional[Sequence[bool]] = role.batch_accept_night_suggestion(
+                members, suggestion, suggested_by
+            )
+            if batch is None:
+                unbatched_roles.add(role)
+            else:
+                acceptances += sum(1 for accepted in batch if accepted)
+
+        for hive_member in alive_players:
+            if hive_member.role in unbatched_roles:
+                acceptances += (
+                    1 if hive_member.accept_night_suggestion(suggestion, suggested_by) else 0
+                )
+
+        return acceptances
+
 
 class VillagerHive(Hive):
 
@@ -617,3 +861,15 @@ CHARACTER_HIVE_MAPPING: Dict[Type["GameCharacter"], Type["Hive"]] = {
     Werewolf: WerewolfHive,
     Villager: VillagerHive
 }
+
+
+def character_of(role: GameCharacter) -> Type[GameCharacter]:
+    """
+    The game role (as opposed to the behavior, see `GameCharacter`) played by
+    `role`. This is what the game rules are concerned with.
+    """
+    for klass in type(role).__mro__:
+        if klass in CHARACTER_HIVE_MAPPING:
+            return klass
+
+    raise InvalidGameStateError("%s does not play any known role." % role)
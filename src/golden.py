@@ -0,0 +1,203 @@
+"""
+Reference outcome distributions that guard refactors and optimizations of the
+engines. For every cell of a small matrix of player counts and attributes,
+the reference file holds the win counts, the game length histogram and the
+lynchings of many games. The same cells played again at fixed seeds, by
+either engine, must then match the reference under chi-square and
+Kolmogorov-Smirnov tests (see `src/tests/golden_tests.py`). The reference is
+played by the object engine, so that the integer engine is checked against
+the engine it stands in for and not against itself.
+
+A change that is meant to change the games has to regenerate the reference:
+
+    python -m src.golden write
+    python -m src.golden check --engine objects
+"""
+from __future__ import annotations
+
+from .stats import GameStatsAggregator, chi_square_homogeneity, ks_two_sample
+from .type_checking import TYPE_CHECKING
+
+import json
+import os
+
+if TYPE_CHECKING:
+    from .experiment import Experiment
+    from typing import Any, Dict, List, Optional
+
+GOLDEN_FILE: str = os.path.join(os.path.dirname(__file__), "tests", "golden_distributions.json")
+GOLDEN_FORMAT: str = "wherewholf-golden"
+GOLDEN_FORMAT_VERSION: int = 1
+# The reference games are seeded apart from the games checked against them.
+REFERENCE_SEED: int = 1000000
+REFERENCE_GAMES: int = 20000
+CHECK_SEED: int = 0
+CHECK_GAMES: int = 400
+# Per test. The checks are deterministic at fixed seeds, so this only bounds
+# how likely a harmless change is to need a new reference.
+DEFAULT_ALPHA: float = 0.001
+# Lynchings go by the character of whoever got lynched.
+LYNCHED_CHARACTERS = ("Werewolf", "Villager")
+
+
+class GoldenCell(object):
+    """
+    A configuration in the matrix: `werewolves` against `villagers`, all with
+    `player_attributes`.
+    """
+
+    __slots__ = ("name", "werewolves", "villagers", "player_attributes")
+
+    def __init__(
+        self,
+        name: str,
+        werewolves: int,
+        villagers: int,
+        player_attributes: Optional[Dict[str, float]]=None
+    ):
+        self.name: str = name
+        self.werewolves: int = werewolves
+        self.villagers: int = villagers
+        self.player_attributes: Dict[str, float] = dict(player_attributes or {})
+
+    def experiment(self, engine: str) -> Experiment:
+        from .experiment import Experiment
+
+        return Experiment(
+            self.werewolves, self.villagers, engine=engine,
+            player_attributes=self.player_attributes
+        )
+
+
+GOLDEN_CELLS: List[GoldenCell] = [
+    GoldenCell("1v5", 1, 5),
+    GoldenCell("2v6", 2, 6),
+    GoldenCell("3v9", 3, 9),
+    GoldenCell("2v6-timid", 2, 6, {"aggression": 0.2}),
+    GoldenCell("2v6-suggestible", 2, 6, {"suggestibility": 0.8}),
+    GoldenCell("2v10-unpersuasive", 2, 10, {"persuasiveness": 0.2, "nomination_recency": 1}),
+]
+
+
+def measure(cell: GoldenCell, engine: str, games: int, seed: int) -> Dict[str, Any]:
+    """
+    Play `games` games of `cell` with seeds from `seed` on, and tally what the
+    reference holds.
+    """
+    experiment: Experiment = cell.experiment(engine)
+    stats = GameStatsAggregator()
+    experiment.run(games, seed=seed, stats=stats)
+    return {
+        "config": experiment.config,
+        "engine": engine,
+        "games": games,
+        "seed": seed,
+        "outcomes": dict(sorted(stats.outcomes.items())),
+        "game_length": list(stats.game_length_histogram.counts),
+        "lynched": {character: stats.lynched[character] for character in LYNCHED_CHARACTERS}
+    }
+
+
+def compare(reference: Dict[str, Any], measured: Dict[str, Any]) -> Dict[str, float]:
+    """
+    P-values of the tests that `measured` games play like the `reference`,
+    by name of the test.
+    """
+    outcomes: List[str] = sorted(reference["outcomes"].keys() | measured["outcomes"].keys())
+    return {
+        "outcomes": chi_square_homogeneity(
+            [reference["outcomes"].get(outcome, 0) for outcome in outcomes],
+            [measured["outcomes"].get(outcome, 0) for outcome in outcomes]
+        ),
+        "game_length_chi_square": chi_square_homogeneity(
+            reference["game_length"], measured["game_length"]
+        ),
+        "game_length_ks": ks_two_sample(reference["game_length"], measured["game_length"]),
+        # Lynchings in a game are not independent of one another, which makes
+        # this one a little too eager.
+        "lynch_accuracy": chi_square_homogeneity(
+            [reference["lynched"][character] for character in LYNCHED_CHARACTERS],
+            [measured["lynched"][character] for character in LYNCHED_CHARACTERS]
+        )
+    }
+
+
+def deviations(
+    reference: Dict[str, Any], measured: Dict[str, Any], alpha: float=DEFAULT_ALPHA
+) -> List[str]:
+    """
+    The tests `measured` fails, if any.
+    """
+    return [
+        "%s (p=%.2g)" % (test, p_value)
+        for test, p_value in sorted(compare(reference, measured).items())
+        if p_value < alpha
+    ]
+
+
+def write_reference(
+    path: str=GOLDEN_FILE, games: int=REFERENCE_GAMES, seed: int=REFERENCE_SEED
+) -> Dict[str, Any]:
+    from .experiment import OBJECT_ENGINE
+
+    reference: Dict[str, Any] = {
+        "format": GOLDEN_FORMAT,
+        "version": GOLDEN_FORMAT_VERSION,
+        "cells": {cell.name: measure(cell, OBJECT_ENGINE, games, seed) for cell in GOLDEN_CELLS}
+    }
+    with open(path, "w") as golden_file:
+        json.dump(reference, golden_file, indent=1, sort_keys=True)
+        golden_file.write("\n")
+    return reference
+
+
+def read_reference(path: str=GOLDEN_FILE) -> Dict[str, Dict[str, Any]]:
+    """
+    The reference of every cell, by name.
+    """
+    with open(path) as golden_file:
+        raw: Dict[str, Any] = json.load(golden_file)
+    if raw.get("format") != GOLDEN_FORMAT or raw.get("version") != GOLDEN_FORMAT_VERSION:
+        raise ValueError("%s is not a version %s golden distribution file." % (
+            path, GOLDEN_FORMAT_VERSION
+        ))
+    return raw["cells"]
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+    from .experiment import ENGINES, INTEGER_ENGINE
+
+    import logging
+    import sys
+
+    parser = ArgumentParser(description="Keep the golden outcome distributions of WhereWholf")
+    parser.add_argument("--file", default=GOLDEN_FILE, help="The golden distribution file.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    write_command = commands.add_parser("write", help="Regenerate the reference.")
+    write_command.add_argument("--games", "-n", type=int, default=REFERENCE_GAMES)
+    check_command = commands.add_parser("check", help="Test an engine against the reference.")
+    check_command.add_argument("--engine", "-e", choices=ENGINES, default=INTEGER_ENGINE)
+    check_command.add_argument("--games", "-n", type=int, default=CHECK_GAMES)
+    check_command.add_argument("--alpha", type=float, default=DEFAULT_ALPHA)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    if args.command == "write":
+        for name, cell_reference in write_reference(args.file, args.games)["cells"].items():
+            print("%-20s %s" % (name, cell_reference["outcomes"]))
+        sys.exit(0)
+
+    references: Dict[str, Dict[str, Any]] = read_reference(args.file)
+    ok: bool = True
+    for cell in GOLDEN_CELLS:
+        measured: Dict[str, Any] = measure(cell, args.engine, args.games, CHECK_SEED)
+        p_values: Dict[str, float] = compare(references[cell.name], measured)
+        failed: List[str] = deviations(references[cell.name], measured, args.alpha)
+        ok = ok and not failed
+        print("%-20s %s%s" % (
+            cell.name,
+            " ".join("%s=%.3f" % item for item in sorted(p_values.items())),
+            "  DEVIATES" if failed else ""
+        ))
+    sys.exit(0 if ok else 1)
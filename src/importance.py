@@ -0,0 +1,47 @@
+"""
+Importance sampling of rare game outcomes. A Tilt makes the players whose
+death brings an outcome closer likelier to be picked, at night and during the
+day; the likelihood ratio every tilted game keeps (see `rng.TiltedRandom`)
+then reweighs how often the outcome happens into an unbiased estimate of how
+often it happens in untilted games.
+"""
+from __future__ import annotations
+
+from .defaults import DEFAULT_STRENGTH
+from .results import EndGameState
+from .type_checking import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Sequence
+
+
+class Tilt(object):
+    """
+    Players on the side that has to lose for `target` to happen get picked
+    `strength` times as likely as everyone else.
+    """
+
+    __slots__ = ("target", "strength")
+
+    TARGETS = (EndGameState.VILLAGERS_WON, EndGameState.WEREWOLVES_WON)
+
+    def __init__(
+        self,
+        target: EndGameState=EndGameState.VILLAGERS_WON,
+        strength: float=DEFAULT_STRENGTH
+    ):
+        if target not in Tilt.TARGETS:
+            raise ValueError("Can only tilt games toward one of %s." % (Tilt.TARGETS,))
+        if strength <= 0:
+            raise ValueError("The strength of a tilt should be positive.")
+        self.target: EndGameState = target
+        self.strength: float = strength
+
+    def weight(self, werewolf: bool) -> float:
+        return self.strength if werewolf == (self.target is EndGameState.VILLAGERS_WON) else 1.0
+
+    def weights(self, werewolves: Sequence[bool]) -> Sequence[float]:
+        return [self.weight(werewolf) for werewolf in werewolves]
+
+    def __str__(self) -> str:
+        return "Tilt(target=%s, strength=%s)" % (self.target.name, self.strength)
@@ -0,0 +1,478 @@
+"""
+A second implementation of the game rules for when throughput matters. Players
+are integer IDs, in name order, and all game state lives in flat arrays: no
+`Player`, `SanitizedPlayer` or `Hive` objects, no hashing of players.
+
+It plays by the same rules as `Moderator` with `Werewolf` and `Villager`
+players and makes the same random draws in the same order, so a game seeded
+the same way plays out exactly the same in either engine. It does not support
+other characters or strategies (e.g., the batch hooks of `GameCharacter`).
+"""
+from __future__ import annotations
+
+from array import array
+from . import rng
+from .errors import GameBudgetExceededError, GameDeadLockError
+from .game_characters import Player, Villager, Werewolf, WholeGameHive
+from .moderator import GAME_END, GAME_START, LYNCH, NIGHT_KILL, TIE, TIE_BREAK, night_kill_decides
+from .results import DeathCause, EndGameState, GameResult, UNKNOWN_PLAYER
+from .rng import GameRandom, TiltedRandom
+from .ties import RandomTieBreaker
+from .type_checking import TYPE_CHECKING
+from .utils import VoteTally
+from .watchdog import DAY, DAY_CONSENSUS, GameWatchdog, NIGHT, NOMINATIONS, StalledGame, VOTES
+from .watchdog import TIE as TIE_PHASE
+
+if TYPE_CHECKING:
+    from .importance import Tilt
+    from .pubsub import PubSubBroker
+    from .ties import TieBreaker
+    from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+    # (nominee, nominator)
+    IntNomination = Tuple[int, int]
+
+NO_PLAYER: int = -1
+# Same as WholeGameHive.MAX_LOOP_ITERS
+MAX_LOOP_ITERS: int = 100
+CHARACTER_NAMES: Tuple[str, str] = (Villager.__name__, Werewolf.__name__)
+
+
+class Roster(object):
+    """
+    The players of a game, by ID. Player `i` is the `i`-th player in name order,
+    which is also their index in `GameResult.deaths`.
+    """
+
+    __slots__ = (
+        "names", "werewolf", "aggression", "suggestibility", "persuasiveness",
+        "recency", "by_aggression"
+    )
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        werewolf: Sequence[bool],
+        aggression: Sequence[float],
+        suggestibility: Sequence[float],
+        persuasiveness: Sequence[float],
+        recency: Sequence[int]
+    ):
+        order: List[int] = sorted(range(len(names)), key=lambda i: names[i])
+        self.names: List[str] = [names[i] for i in order]
+        self.werewolf: bytearray = bytearray(1 if werewolf[i] else 0 for i in order)
+        self.aggression: array = array("d", (aggression[i] for i in order))
+        self.suggestibility: array = array("d", (suggestibility[i] for i in order))
+        self.persuasiveness: array = array("d", (persuasiveness[i] for i in order))
+        self.recency: array = array("l", (recency[i] for i in order))
+        if any(r < 1 for r in self.recency):
+            raise ValueError("Nomination recency must be at least 1.")
+        # Most aggressive first, ties in name order
+        self.by_aggression: array = array("l", sorted(
+            range(len(names)), key=lambda i: -self.aggression[i]
+        ))
+
+    @property
+    def size(self) -> int:
+        return len(self.names)
+
+    @staticmethod
+    def from_players(players: Iterable[Player]) -> "Roster":
+        players = list(players)
+        for player in players:
+            if type(player.role) not in (Werewolf, Villager):
+                raise ValueError("%s plays %s, which the integer engine does not support." % (
+                    player.name, player.role
+                ))
+
+        return Roster(
+            [p.name for p in players],
+            [isinstance(p.role, Werewolf) for p in players],
+            [p.aggression for p in players],
+            [p.suggestibility for p in players],
+            [p.persuasiveness for p in players],
+            [p.nomination_recency.recency for p in players]
+        )
+
+
+class IntegerGame(object):
+    """
+    Plays a single game of the given roster. Takes the same arguments as
+    `Moderator`, save for logging, and fills in the same `result` and `stall`.
+    """
+
+    def __init__(
+        self,
+        roster: Roster,
+        seed: Optional[int]=None,
+        pubsub_broker: Optional[PubSubBroker]=None,
+        tie_breaker: Optional[TieBreaker]=None,
+        watchdog: Optional[GameWatchdog]=None,
+        everyone_votes: Optional[bool]=None,
+        antithetic: bool=False,
+        tilt: Optional[Tilt]=None
+    ):
+        n: int = roster.size
+        self.roster: Roster = roster
+        self.seed: Optional[int] = seed
+        self.antithetic: bool = antithetic
+        self.tilt: Optional[Tilt] = tilt
+        # Set when the game is played
+        self.rng: GameRandom
+        self.pubsub_broker: Optional[PubSubBroker] = pubsub_broker
+        self.tie_breaker: TieBreaker = tie_breaker if tie_breaker else RandomTieBreaker()
+        self.watchdog: GameWatchdog = watchdog if watchdog else GameWatchdog()
+        self.everyone_votes: Optional[bool] = everyone_votes
+        self.stall: Optional[StalledGame] = None
+        self.days: int = 0
+        self.result: GameResult = GameResult(seed=seed, players=n)
+        self.alive: bytearray = bytearray(b"\x01") * n
+        self.werewolf_count: int = sum(roster.werewolf)
+        self.villager_count: int = n - self.werewolf_count
+        self.consensus_retries: int = 0
+        # Player.daytime_behavior bookkeeping
+        self.turns: array = array("l", bytes(array("l").itemsize * n))
+        self.nominated_this_turn: array = array("l", [NO_PLAYER]) * n
+        # suspects[i * n + j] is set once player i believes player j is a
+        # werewolf. That's the only thing a WorldModel ever learns.
+        self.suspects: bytearray = bytearray(n * n)
+        # The last `recency` turns on which player i saw player j nominate,
+        # as a ring buffer per (i, j).
+        self.__ring_size: int = max(roster.recency) if n else 1
+        self.nomination_turns: array = array(
+            "l", bytes(array("l").itemsize * n * n * self.__ring_size)
+        )
+        self.nomination_counts: array = array("l", bytes(array("l").itemsize * n * n))
+
+    def __publish_event(self, event_type: str, body: str) -> None:
+        if self.pubsub_broker:
+            self.pubsub_broker.broadcast_message(event_type, body)
+
+    def __roster_counts(self) -> Dict[str, int]:
+        werewolves: int = sum(self.roster.werewolf)
+        counts: Dict[str, int] = {}
+        if werewolves < self.roster.size:
+            counts[Villager.__name__] = self.roster.size - werewolves
+        if werewolves:
+            counts[Werewolf.__name__] = werewolves
+        return counts
+
+    def __alive_players(self) -> List[int]:
+        alive = self.alive
+        return [i for i in range(self.roster.size) if alive[i]]
+
+    def __consensus(self, alive_count: int) -> int:
+        return 1 if alive_count == 1 else alive_count // 2
+
+    def __most_aggressive(self, werewolves_only: bool, n: int=3) -> List[int]:
+        """
+        Same as `Hive._get_most_aggressive`: the alive players whose aggression
+        is among the `n` highest.
+        """
+        aggression = self.roster.aggression
+        werewolf = self.roster.werewolf
+        alive = self.alive
+        picked: List[int] = []
+        distinct: int = 0
+        last: Optional[float] = None
+        for i in self.roster.by_aggression:
+            if not alive[i] or (werewolves_only and not werewolf[i]):
+                continue
+            if aggression[i] != last:
+                distinct += 1
+                if distinct > n:
+                    break
+                last = aggression[i]
+            picked.append(i)
+        return picked
+
+    def __record_death(self, player: int, cause: DeathCause) -> None:
+        is_werewolf: bool = bool(self.roster.werewolf[player])
+        if is_werewolf:
+            self.werewolf_count -= 1
+        else:
+            self.villager_count -= 1
+        self.result.deaths.append((player, cause, is_werewolf))
+        self.alive[player] = 0
+
+    def __skip_deciding_night(self) -> None:
+        """
+        Same as `Moderator.__skip_deciding_night`.
+        """
+        self.villager_count -= 1
+        self.result.skipped_days += 1
+        self.result.deaths.append((UNKNOWN_PLAYER, DeathCause.NIGHT_KILL, False))
+        self.__publish_event(NIGHT_KILL, Villager.__name__)
+
+    def __play_night(self) -> int:
+        """
+        The werewolves agree on whom to kill, as in `WerewolfHive.night_consensus`.
+        """
+        n: int = self.roster.size
+        werewolf = self.roster.werewolf
+        suggestibility = self.roster.suggestibility
+        # Werewolves know each other.
+        for i in range(n):
+            if werewolf[i]:
+                for j in range(n):
+                    if werewolf[j]:
+                        self.suspects[i * n + j] = 1
+
+        alive_players: List[int] = self.__alive_players()
+        pack: List[int] = [i for i in alive_players if werewolf[i]]
+        prey: List[int] = [i for i in alive_players if not werewolf[i]]
+        consensus: int = self.__consensus(len(pack))
+        while True:
+            self.watchdog.step(NIGHT)
+            nominant: int = self.rng.choice(self.__most_aggressive(True))
+            suggestion: int = self.rng.choice(prey)
+            # Everyone but the nominant decides, in pack order.
+            acceptances: int = 0
+            for member in pack:
+                if member == nominant or self.rng.random() <= suggestibility[member]:
+                    acceptances += 1
+            if acceptances >= consensus:
+                return suggestion
+
+    def __gather_nominations(self, players: Sequence[int]) -> List[IntNomination]:
+        aggression = self.roster.aggression
+        nominations: List[IntNomination] = []
+        for nominator in self.__most_aggressive(False):
+            if self.rng.random() <= aggression[nominator]:
+                without_me: List[int] = [p for p in players if p != nominator]
+                if without_me:
+                    pick: int = self.rng.choice(without_me)
+                    self.nominated_this_turn[nominator] = pick
+                    nominations.append((pick, nominator))
+        return nominations
+
+    def __daytime_behavior(self, voter: int, nominations: Sequence[IntNomination]) -> int:
+        """
+        Same as `Player.daytime_behavior`.
+        """
+        self.turns[voter] += 1
+        turn: int = self.turns[voter]
+
+        conviction_vote: int = self.nominated_this_turn[voter]
+        if conviction_vote != NO_PLAYER:
+            self.nominated_this_turn[voter] = NO_PLAYER
+            return conviction_vote
+
+        n: int = self.roster.size
+        recency: int = self.roster.recency[voter]
+        suggestibility: float = self.roster.suggestibility[voter]
+        ring_size: int = self.__ring_size
+        considered: List[int] = []
+        for nominee, nominator in nominations:
+            pair: int = voter * n + nominator
+            base: int = pair * ring_size
+            count: int = self.nomination_counts[pair]
+            self.nomination_turns[base + count % recency] = turn
+            count += 1
+            self.nomination_counts[pair] = count
+            oldest: int = self.nomination_turns[base + (0 if count <= recency else count % recency)]
+
+            # A nominator that keeps nominating is seen as too pushy...
+            if oldest >= turn - recency and not self.rng.random() <= suggestibility:
+                continue
+            # ...as is one suspected of being a werewolf.
+            if not self.suspects[pair]:
+                considered.append(nominee)
+
+        if len(considered) == 1 and considered[0] == voter:
+            return NO_PLAYER
+
+        without_me: List[int] = [p for p in considered if p != voter]
+        return self.rng.choice(without_me) if without_me else NO_PLAYER
+
+    def __polls_until_decided(self, voters: int) -> bool:
+        if self.everyone_votes is None:
+            return voters >= WholeGameHive.EARLY_EXIT_MIN_VOTERS
+        return not self.everyone_votes
+
+    def __gather_votes(
+        self,
+        voters: Sequence[int],
+        nominations: Sequence[IntNomination]
+    ) -> Tuple[array, VoteTally]:
+        """
+        Same as `WholeGameHive.__gather_votes`. Returns the votes indexed by
+        voter, NO_PLAYER for voters not polled, and the tally.
+        """
+        # Fresh for every gather, like the vote table: votes cast in a round
+        # that fell short of quorum must not count against anyone.
+        votes: array = array("l", [NO_PLAYER]) * self.roster.size
+        early_exit: bool = self.__polls_until_decided(len(voters))
+        consensus: int = self.__consensus(len(voters))
+        tally: Optional[VoteTally] = None
+        # The longest run of voters polled in any round
+        polled: int = 0
+        polls: int = 0
+        while tally is None or tally.total == 0:
+            self.watchdog.step(VOTES)
+            if polls >= MAX_LOOP_ITERS:
+                raise GameDeadLockError("Can't gather enough votes.")
+
+            tally = VoteTally(len(voters), consensus)
+            for voter in voters:
+                vote: int = self.__daytime_behavior(voter, nominations)
+                votes[voter] = vote
+                tally.add(None if vote == NO_PLAYER else vote)
+                if early_exit and tally.total and tally.decided:
+                    break
+            polled = max(polled, len(voters) - tally.remaining)
+            polls += 1
+
+        # Voters never polled don't get to cast the vote they nominated for.
+        for voter in voters[polled:]:
+            self.nominated_this_turn[voter] = NO_PLAYER
+
+        return votes, tally
+
+    def __day_consensus(
+        self,
+        players: Sequence[int]
+    ) -> Tuple[Dict[int, int], List[int], array, VoteTally]:
+        """
+        Same as `WholeGameHive.day_consensus`. Returns the nominations (nominee
+        to nominator), the voters, their votes indexed by voter and the tally.
+        """
+        voters: List[int] = self.__alive_players()
+        votes: array = array("l")
+        consensus: int = self.__consensus(len(voters))
+        nomination_map: Dict[int, int] = {}
+        tally: Optional[VoteTally] = None
+        first_round: bool = True
+
+        while tally is None or tally.total < consensus:
+            self.watchdog.step(DAY_CONSENSUS)
+            if not first_round:
+                self.consensus_retries += 1
+            first_round = False
+
+            nominations: List[IntNomination] = self.__gather_nominations(players)
+            nomination_fishing_count: int = 0
+            while not nominations:
+                self.watchdog.step(NOMINATIONS)
+                if nomination_fishing_count >= MAX_LOOP_ITERS:
+                    raise GameDeadLockError("No one wants to nominate anyone else! Such pacifists!")
+                nominations = self.__gather_nominations(players)
+                nomination_fishing_count += 1
+
+            nomination_map = {}
+            for nominee, nominator in nominations:
+                nomination_map[nominee] = nominator
+            votes, tally = self.__gather_votes(voters, nominations)
+
+        return nomination_map, voters, votes, tally
+
+    def __react_to_lynch_result(
+        self,
+        nomination_map: Dict[int, int],
+        victim: int,
+        voters: Sequence[int],
+        votes: array
+    ) -> None:
+        """
+        Same as `Player.react_to_lynch_result`, for every player still alive.
+        """
+        if self.roster.werewolf[victim]:
+            return
+
+        n: int = self.roster.size
+        suspected: List[int] = [
+            nominee for nominee, nominator in nomination_map.items() if nominator == victim
+        ] + [voter for voter in voters if votes[voter] == victim]
+        for player in self.__alive_players():
+            for suspect in suspected:
+                self.suspects[player * n + suspect] = 1
+
+    def __play_days(self) -> None:
+        while self.villager_count >= self.werewolf_count and self.werewolf_count > 0:
+            self.watchdog.step(DAY)
+            self.days += 1
+            if night_kill_decides(self.villager_count, self.werewolf_count):
+                self.__skip_deciding_night()
+                break
+            # Same substreams as the Moderator's
+            self.rng.restart(2 * self.days)
+
+            victim: int = self.__play_night()
+            self.__record_death(victim, DeathCause.NIGHT_KILL)
+            self.__publish_event(NIGHT_KILL, CHARACTER_NAMES[self.roster.werewolf[victim]])
+
+            if self.villager_count <= self.werewolf_count:
+                break
+
+            self.rng.restart(2 * self.days + 1)
+            nomination_map, voters, votes, tally = self.__day_consensus(self.__alive_players())
+            consensus: List[int] = tally.leaders()
+            revotes: int = 0
+
+            while len(consensus) > 1 and revotes < self.tie_breaker.max_revotes:
+                self.__publish_event(TIE, str(len(consensus)))
+                self.result.tie_rounds += 1
+                revotes += 1
+                self.watchdog.step(TIE_PHASE)
+                nomination_map, voters, votes, tally = self.__day_consensus(consensus)
+                consensus = tally.leaders()
+
+            lynched: int
+            if len(consensus) == 1:
+                if revotes:
+                    self.tie_breaker.resolved_by_revote()
+                lynched = consensus[0]
+            else:
+                self.__publish_event(TIE_BREAK, self.tie_breaker.NAME)
+                choice: Optional[int] = self.tie_breaker.break_tie_among(
+                    [self.roster.persuasiveness[p] for p in consensus]
+                )
+                if choice is None:
+                    continue
+                lynched = consensus[choice]
+
+            self.__react_to_lynch_result(nomination_map, lynched, voters, votes)
+            self.__record_death(lynched, DeathCause.LYNCH)
+            self.__publish_event(LYNCH, CHARACTER_NAMES[self.roster.werewolf[lynched]])
+
+    def __endgame_state(self) -> EndGameState:
+        if self.villager_count <= self.werewolf_count:
+            return EndGameState.WEREWOLVES_WON
+        elif self.werewolf_count == 0:
+            return EndGameState.VILLAGERS_WON
+        return EndGameState.UNKNOWN_CONDITION
+
+    def play(self) -> EndGameState:
+        if self.tilt is None:
+            self.rng = GameRandom(self.seed, self.antithetic)
+        else:
+            weights: Sequence[float] = self.tilt.weights([bool(w) for w in self.roster.werewolf])
+            self.rng = TiltedRandom(weights.__getitem__, self.seed, self.antithetic)
+        rng.use(self.rng)
+
+        if self.pubsub_broker:
+            self.__publish_event(GAME_START, ",".join(
+                "%s=%s" % kv for kv in self.__roster_counts().items()
+            ))
+
+        self.watchdog.start()
+        result: EndGameState
+        try:
+            self.__play_days()
+            result = self.__endgame_state()
+        except GameBudgetExceededError as budget_exceeded:
+            self.stall = StalledGame(
+                self.seed, self.__roster_counts(), self.days, budget_exceeded.phase,
+                budget_exceeded.steps, budget_exceeded.elapsed
+            )
+            result = EndGameState.ABORTED
+
+        self.result.outcome = result
+        self.result.days = self.days
+        self.result.consensus_retries = self.consensus_retries
+        self.__publish_event(GAME_END, "%s %s" % (result.name, self.days))
+        return result
+
+    def play_for_result(self) -> GameResult:
+        self.play()
+        return self.result
@@ -1,7 +1,11 @@
-from .game_characters import GameCharacter, Player, Werewolf, Villager
+from __future__ import annotations
+
+from .game_characters import Player, Werewolf, Villager
 from .moderator import Moderator
+from .type_checking import TYPE_CHECKING
 
-from typing import Set
+if TYPE_CHECKING:
+    from typing import Set
 
 
 if __name__ == "__main__":
@@ -0,0 +1,190 @@
+"""
+Memory use across the games of an experiment. Every so many games, takes a
+`tracemalloc` snapshot and adds up the bytes held by each subsystem (each
+Wherewholf module, logging, and the rest), along with gauges of what is known
+to pile up: loggers, cached SanitizedPlayers, and the live Hives and
+WorldModels with the entries they hold.
+
+In the report, `growth` is the bytes each subsystem gained between the first
+and the last snapshots and `top_sites` the lines that gained the most. Growth
+that keeps rising with the number of games is a leak; the gauges should stay
+flat once the first games are played.
+"""
+from __future__ import annotations
+
+from .game_characters import Hive, SanitizedPlayer
+from .type_checking import TYPE_CHECKING
+from .utils import WorldModel
+
+import gc
+import json
+import logging
+import os
+import tracemalloc
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional
+
+SRC_DIR: str = os.path.dirname(os.path.abspath(__file__))
+LOGGING_DIR: str = os.path.dirname(os.path.abspath(logging.__file__))
+
+
+def game_state_gauges() -> Dict[str, int]:
+    """
+    How many Hives and WorldModels are alive, with the dead players and the
+    players mapped they hold between them. Both are made anew for every game,
+    so these should not grow with the number of games played.
+    """
+    # Only what is reachable counts; cycles awaiting collection don't.
+    gc.collect()
+    gauges: Dict[str, int] = {
+        "hives": 0, "hive_dead_players": 0, "world_models": 0, "world_model_entries": 0
+    }
+    for obj in gc.get_objects():
+        if isinstance(obj, Hive):
+            gauges["hives"] += 1
+            gauges["hive_dead_players"] += len(obj.dead_players)
+        elif isinstance(obj, WorldModel):
+            gauges["world_models"] += 1
+            gauges["world_model_entries"] += len(obj.model_mapping)
+    return gauges
+
+
+def subsystem_of(filename: str) -> str:
+    """
+    Attribute an allocation to a Wherewholf module, to logging, or to "other".
+    """
+    path = os.path.abspath(filename)
+    if path.startswith(SRC_DIR):
+        return os.path.splitext(os.path.relpath(path, SRC_DIR))[0].replace(os.sep, ".")
+    elif path.startswith(LOGGING_DIR):
+        return "logging"
+    return "other"
+
+
+class MemorySample(object):
+
+    __slots__ = ("game", "total", "subsystems", "gauges")
+
+    def __init__(self, game: int, total: int, subsystems: Dict[str, int], gauges: Dict[str, int]):
+        # Number of games played when the snapshot was taken
+        self.game: int = game
+        # Bytes traced, overall and per subsystem
+        self.total: int = total
+        self.subsystems: Dict[str, int] = subsystems
+        # Sizes of the structures known to accumulate across games
+        self.gauges: Dict[str, int] = gauges
+
+
+class MemoryProfiler(object):
+    """
+    Takes a `tracemalloc` snapshot every `every` games and keeps track of how
+    much memory each subsystem holds. Meant to catch things that grow across
+    games, e.g., per-game loggers, the `SanitizedPlayer` caches, or Hives
+    and WorldModels outliving their games.
+    """
+
+    def __init__(self, every: int=100, top: int=10):
+        self.every: int = every
+        self.top: int = top
+        self.samples: List[MemorySample] = []
+        self.top_sites: List[Dict[str, Any]] = []
+        self.__first: Optional[tracemalloc.Snapshot] = None
+        self.__last: Optional[tracemalloc.Snapshot] = None
+        self.__started_tracing: bool = False
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.__started_tracing = True
+        self.__take_sample(0)
+
+    def stop(self) -> None:
+        if self.__last is not None and self.__first is not None:
+            self.top_sites = [
+                {
+                    "site": "%s:%s" % (stat.traceback[0].filename, stat.traceback[0].lineno),
+                    "growth": stat.size_diff,
+                    "size": stat.size,
+                    "count": stat.count
+                } for stat in self.__last.compare_to(self.__first, "lineno")[:self.top]
+            ]
+
+        if self.__started_tracing:
+            tracemalloc.stop()
+            self.__started_tracing = False
+
+    def after_game(self, games_played: int) -> None:
+        if games_played % self.every == 0:
+            self.__take_sample(games_played)
+
+    def __take_sample(self, games_played: int) -> None:
+        snapshot: tracemalloc.Snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__)
+        ))
+        subsystems: Dict[str, int] = {}
+        for stat in snapshot.statistics("filename"):
+            subsystem = subsystem_of(stat.traceback[0].filename)
+            subsystems[subsystem] = subsystems.get(subsystem, 0) + stat.size
+
+        self.samples.append(MemorySample(
+            games_played,
+            sum(subsystems.values()),
+            subsystems,
+            dict(
+                game_state_gauges(),
+                loggers=len(logging.Logger.manager.loggerDict),
+                sanitized_players=SanitizedPlayer.cache_size()
+            )
+        ))
+        if self.__first is None:
+            self.__first = snapshot
+        self.__last = snapshot
+
+    def growth(self) -> Dict[str, int]:
+        """
+        Bytes gained per subsystem between the first and the last samples.
+        """
+        if len(self.samples) < 2:
+            return {}
+
+        first, last = self.samples[0], self.samples[-1]
+        return {
+            subsystem: size - first.subsystems.get(subsystem, 0)
+            for subsystem, size in last.subsystems.items()
+        }
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "every": self.every,
+            "samples": [
+                {
+                    "game": sample.game,
+                    "total": sample.total,
+                    "subsystems": sample.subsystems,
+                    "gauges": sample.gauges
+                } for sample in self.samples
+            ],
+            "growth": self.growth(),
+            "top_sites": self.top_sites
+        }
+
+    def write_report(self, path: str) -> None:
+        with open(path, "w") as report_file:
+            json.dump(self.report(), report_file, separators=(",", ":"))
+
+    def summary(self) -> str:
+        lines: List[str] = ["Memory growth over %s games:" % (
+            self.samples[-1].game if self.samples else 0
+        )]
+        for subsystem, delta in sorted(self.growth().items(), key=lambda kv: -kv[1]):
+            lines.append("  %-20s %+10.1f KiB" % (subsystem, delta / 1024))
+        if self.samples:
+            lines.append("  gauges: %s" % ", ".join(
+                "%s=%s" % kv for kv in sorted(self.samples[-1].gauges.items())
+            ))
+        lines.append("Top allocation sites by growth:")
+        for site in self.top_sites:
+            lines.append("  %+10.1f KiB  %s" % (site["growth"] / 1024, site["site"]))
+        return "\n".join(lines)
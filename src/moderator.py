@@ -1,33 +1,182 @@
-from enum import Enum
-from .game_characters import CHARACTER_HIVE_MAPPING, GameCharacter, Hive, NominationMap, Player, SanitizedPlayer, Werewolf, WholeGameHive, Villager, VoteTable
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Type
-from .utils import ValueTieCounter
+from __future__ import annotations
+
+from .errors import GameBudgetExceededError, InvalidGameStateError
+from . import rng
+from .pubsub import PubSubBroker
+from .results import DeathCause, EndGameState, GameResult, UNKNOWN_PLAYER
+from .rng import GameRandom, TiltedRandom
+from .ties import RandomTieBreaker, TieBreaker
+from .game_characters import CHARACTER_HIVE_MAPPING, character_of, CONFIGURED_LOGGERS, CONFIGURED_LOGGERS_LOCK, GameCharacter, Hive, Player, SanitizedPlayer, Werewolf, WholeGameHive, Villager
+from .type_checking import TYPE_CHECKING
+from .utils import configure_logger as configure_utils_logger
+from .watchdog import DAY as DAY_PHASE, GameWatchdog, StalledGame, TIE as TIE_PHASE
 
 import logging
 import math
 
-class EndGameState(Enum):
-    UNKNOWN_CONDITION = -1
-    WEREWOLVES_WON = 1
-    VILLAGERS_WON = 2
-    DRAW = 3
+if TYPE_CHECKING:
+    from .game_characters import NominationMap, VoteTable
+    from .importance import Tilt
+    from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple, Type
+
+# Events published by the Moderator, if given a PubSubBroker. The messages are:
+# GAME_START - the roster, e.g. "Villager=4,Werewolf=2"
+# NIGHT_KILL, LYNCH - the character of the player killed, e.g. "Werewolf"
+# TIE - the number of players tied for lynching
+# TIE_BREAK - the name of the TieBreaker fallback used to resolve a tie
+# GAME_END - the EndGameState name and the number of days, e.g. "VILLAGERS_WON 3"
+GAME_START = "GAME_START"
+NIGHT_KILL = "NIGHT_KILL"
+LYNCH = "LYNCH"
+TIE = "TIE"
+TIE_BREAK = "TIE_BREAK"
+GAME_END = "GAME_END"
+
+
+def night_kill_decides(villager_count: int, werewolf_count: int) -> bool:
+    """
+    Whether a day that starts with these many players alive is won by the
+    werewolves before it gets to the vote. The werewolves kill a villager
+    every night (their hive keeps at it until they agree on a victim), and
+    the game is over once the villagers no longer outnumber them.
+    """
+    return werewolf_count > 0 and villager_count - 1 <= werewolf_count
+
+
+class NightStep(object):
+    """
+    A single entry in a `NightPlan`: the hive of `character` wakes up, its
+    members get to know each other if the hive allows it, and then it acts if
+    it has a night action.
+    """
+
+    __slots__ = ("character", "acts", "members_know_each_other")
+
+    def __init__(
+        self,
+        character: Type[GameCharacter],
+        acts: bool,
+        members_know_each_other: bool
+    ):
+        self.character: Type[GameCharacter] = character
+        self.acts: bool = acts
+        self.members_know_each_other: bool = members_know_each_other
+
+    def __str__(self) -> str:
+        return "%s(acts=%s, know_each_other=%s)" % (
+            self.character.__name__, self.acts, self.members_know_each_other
+        )
+
+    def __repr__(self) -> str:
+        return str(self)
+
+
+class NightPlan(object):
+    """
+    The order in which the hives in play wake up at night. A character wakes up
+    only after all of its `prerequisites` that are in play have woken up.
+
+    Plans only depend on the set of roles in play so they are compiled once per
+    role set and shared by every game with that roster. Use `NightPlan.compile`
+    instead of the constructor.
+    """
+
+    __COMPILED: Dict[FrozenSet[Type[GameCharacter]], "NightPlan"] = {}
+
+    def __init__(self, steps: Sequence[NightStep]):
+        self.steps: Tuple[NightStep, ...] = tuple(steps)
+
+    @classmethod
+    def compile(cls, hives_map: Dict[Type[GameCharacter], Hive]) -> "NightPlan":
+        key: FrozenSet[Type[GameCharacter]] = frozenset(hives_map.keys())
+        plan: Optional[NightPlan] = NightPlan.__COMPILED.get(key)
+
+        if plan is None:
+            plan = NightPlan([
+                NightStep(
+                    character,
+                    hives_map[character].acts_at_night,
+                    hives_map[character].can_members_know_each_other
+                ) for character in NightPlan.__topo_sort(hives_map)
+            ])
+            NightPlan.__COMPILED[key] = plan
+
+        return plan
+
+    @staticmethod
+    def __topo_sort(hives_map: Dict[Type[GameCharacter], Hive]) -> List[Type[GameCharacter]]:
+        # We only need an instance of each character to read its prerequisites.
+        # Prerequisites not in play don't constrain anything.
+        in_play: Set[Type[GameCharacter]] = set(hives_map.keys())
+        prerequisites: Dict[Type[GameCharacter], Set[Type[GameCharacter]]] = {}
+        for character, hive in hives_map.items():
+            some_player: Player = next(iter(hive.players))
+            prerequisites[character] = some_player.role.prerequisites & in_play
+
+        ordering: List[Type[GameCharacter]] = []
+        # Sorted by name so that the plan does not depend on hashing.
+        pending: List[Type[GameCharacter]] = sorted(in_play, key=lambda c: c.__name__)
+        while pending:
+            ready = [c for c in pending if prerequisites[c] <= set(ordering)]
+            if not ready:
+                raise InvalidGameStateError(
+                    "Cyclic prerequisites among characters: %s" % pending
+                )
+            ordering.extend(ready)
+            pending = [c for c in pending if c not in ready]
+
+        return ordering
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
 
 class Moderator(object):
 
-    def __init__(self, players: Set[Player], log_discriminant: Optional[str]=None):
+    def __init__(
+        self,
+        players: Set[Player],
+        log_discriminant: Optional[str]=None,
+        seed: Optional[int]=None,
+        pubsub_broker: Optional[PubSubBroker]=None,
+        tie_breaker: Optional[TieBreaker]=None,
+        watchdog: Optional[GameWatchdog]=None,
+        everyone_votes: Optional[bool]=None,
+        antithetic: bool=False,
+        tilt: Optional[Tilt]=None
+    ):
         self.logger: logging.Logger = logging.getLogger(
             "moderator%s" % (log_discriminant if log_discriminant else "")
         )
         self.__configure_logger()
+        configure_utils_logger()
+        # When given, the game is seeded with this so that it can be replayed.
+        self.seed: Optional[int] = seed
+        # Play the antithetic game of `seed`; see GameRandom.
+        self.antithetic: bool = antithetic
+        # When given, the game is importance sampled; see src/importance.py.
+        self.tilt: Optional[Tilt] = tilt
+        # The generator the game draws from, once it is played
+        self.rng: Optional[GameRandom] = None
+        self.pubsub_broker: Optional[PubSubBroker] = pubsub_broker
+        self.tie_breaker: TieBreaker = tie_breaker if tie_breaker else RandomTieBreaker()
+        self.watchdog: GameWatchdog = watchdog if watchdog else GameWatchdog()
+        # Set if the game goes over the watchdog's budget.
+        self.stall: Optional[StalledGame] = None
+        # The number of nights so far, played or skipped
+        self.days: int = 0
         self.players: Set[Player] = players
-        self.whole_game_hive: WholeGameHive = WholeGameHive()
+        self.whole_game_hive: WholeGameHive = WholeGameHive(everyone_votes=everyone_votes)
         self.whole_game_hive.add_players(self.players)
         self.hives_map: Dict[Type[GameCharacter], Hive] = {}
         self.hives: List[Hive] = [self.whole_game_hive]
 
         for player in players:
-            _type: Type[GameCharacter] = type(player.role)
-            if type(player.role) in self.hives_map:
+            _type: Type[GameCharacter] = character_of(player.role)
+            if _type in self.hives_map:
                 self.hives_map[_type].add_player(player)
             else:
                 new_hive = CHARACTER_HIVE_MAPPING[_type]()
@@ -37,16 +186,36 @@ class Moderator(object):
         
         self.werewolf_count: int = len(self.hives_map[Werewolf].players)
         self.villager_count: int = len(self.players) - self.werewolf_count
+        self.night_plan: NightPlan = NightPlan.compile(self.hives_map)
+        for hive in self.hives:
+            hive.watchdog = self.watchdog
+        # Filled in as the game is played
+        self.result: GameResult = GameResult(seed=seed, players=len(self.players))
+        self.__roster_index: Dict[Player, int] = {
+            player: i for i, player in enumerate(self.whole_game_hive.alive_players)
+        }
 
     def __configure_logger(self, _cfg: Optional[Dict]=None) -> None:
-        cfg = _cfg if _cfg is not None else {}
-        log_level = cfg.get("logLevel", "INFO")
-        self.logger.setLevel(logging.getLevelName(log_level))
+        # Moderators sharing a log discriminant share a logger. Don't stack a
+        # new handler onto it for every game.
+        if CONFIGURED_LOGGERS.get(self.logger.name) is not None:
+            return
+        with CONFIGURED_LOGGERS_LOCK:
+            if CONFIGURED_LOGGERS.get(self.logger.name) is not None:
+                return
+            cfg = _cfg if _cfg is not None else {}
+            log_level = cfg.get("logLevel", "INFO")
+            self.logger.setLevel(logging.getLevelName(log_level))
+
+            log_format = cfg.get("logFormat", "%(asctime)s - %(levelname)s - %(message)s")
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter(log_format))
+            self.logger.addHandler(handler)
+            CONFIGURED_LOGGERS[self.logger.name] = True
 
-        log_format = cfg.get("logFormat", "%(asctime)s - %(levelname)s - %(message)s")
-        handler = logging.StreamHandler()
-        handler.setFormatter(logging.Formatter(log_format))
-        self.logger.addHandler(handler)
+    def __publish_event(self, event_type: str, body: str) -> None:
+        if self.pubsub_broker:
+            self.pubsub_broker.broadcast_message(event_type, body)
 
     def __kill_player(self, player: Player) -> None:
         self.players.remove(player)
@@ -59,66 +228,175 @@ class Moderator(object):
     def __batch_sanitize(self, players: Iterable[Player]) -> Sequence[SanitizedPlayer]:
         return [SanitizedPlayer.sanitize(player) for player in players]
 
-    def __filter_members(self, char_class: Type[GameCharacter]) -> Set[Player]:
+    def __filter_members(self, char_class: Type[GameCharacter]) -> List[Player]:
         """
         Return the list of players with those belonging to the specified class
         _removed_.
         """
-        return self.players - self.hives_map[char_class].players
+        members: Set[Player] = self.hives_map[char_class].players
+        return [p for p in self.whole_game_hive.alive_players if p not in members]
 
-    def __count_votes(self, vote_table: VoteTable) -> List[SanitizedPlayer]:
-        vote_counter = ValueTieCounter()
-        
-        for voter in vote_table:
-            if vote_table[voter] is not None:
-                vote_counter[vote_table[voter]] += 1
+    def __leaders(self) -> List[SanitizedPlayer]:
+        """
+        The players with the most votes in the last vote.
+        """
+        assert self.whole_game_hive.tally is not None
+        return self.whole_game_hive.tally.leaders()
+
+    def __introduce_hive_members(self, hive: Hive) -> None:
+        for member in hive.players:
+            for player in hive.players:
+                member.learn_hive_member(SanitizedPlayer.sanitize(player))
+
+    def __record_death(self, player: Player, cause: DeathCause) -> None:
+        if isinstance(player.role, Villager):
+            self.villager_count -= 1
+        else:
+            self.werewolf_count -= 1
+        self.result.deaths.append((
+            self.__roster_index[player], cause, isinstance(player.role, Werewolf)
+        ))
+        self.__kill_player(player)
+
+    def __skip_deciding_night(self) -> None:
+        """
+        Settle the night that decides the game without playing it: a
+        villager dies, whoever the werewolves would have picked.
+        """
+        self.villager_count -= 1
+        self.result.skipped_days += 1
+        self.result.deaths.append((UNKNOWN_PLAYER, DeathCause.NIGHT_KILL, False))
+        self.__publish_event(NIGHT_KILL, Villager.__name__)
+
+    def __play_night(self) -> List[Player]:
+        """
+        Execute the night plan and return the players killed during the night.
+        """
+        night_deaths: List[Player] = []
+        for step in self.night_plan:
+            hive: Hive = self.hives_map[step.character]
+            self.logger.info("%s wakes up!" % step.character.__name__)
 
-        return [t[0] for t in vote_counter.most_common(1)]
+            if step.members_know_each_other:
+                self.__introduce_hive_members(hive)
+
+            if step.acts:
+                victim: Optional[SanitizedPlayer] = hive.night_consensus(
+                    self.__batch_sanitize(self.__filter_members(step.character))
+                )
+                if victim is not None:
+                    dead_player = SanitizedPlayer.recover_player_identity(victim)
+                    self.logger.info("The %s hive killed %s, a %s!" % (
+                        step.character.__name__, victim.name, dead_player.role
+                    ))
+                    night_deaths.append(dead_player)
+                    self.__record_death(dead_player, DeathCause.NIGHT_KILL)
+                    self.__publish_event(NIGHT_KILL, character_of(dead_player.role).__name__)
+
+        return night_deaths
 
     def play(self) -> "EndGameState":
-        # Ideally we want this to topo-sort the included characters and then
-        # play them based on that but right now we only have Werewolves and
-        # Villagers, so f*ck that fancy algorithmic shit.
-        ww_hive: Hive = self.hives_map[Werewolf]
+        # Characters draw from `rng.current()`, never from the global `random`:
+        # seeding that would race with games on other threads.
+        if self.tilt is None:
+            self.rng = GameRandom(self.seed, self.antithetic)
+        else:
+            # Characters pick among both players and sanitized players.
+            weights: Dict[Any, float] = {}
+            for player in self.players:
+                weight: float = self.tilt.weight(character_of(player.role) is Werewolf)
+                weights[player] = weights[SanitizedPlayer.sanitize(player)] = weight
+            self.rng = TiltedRandom(weights.__getitem__, self.seed, self.antithetic)
+        rng.use(self.rng)
+
+        if self.pubsub_broker:
+            self.__publish_event(GAME_START, ",".join(
+                "%s=%s" % kv for kv in self.__roster().items()
+            ))
+
+        self.watchdog.start()
+        result: EndGameState
+        try:
+            self.__play_days()
+            result = self.__endgame_state()
+        except GameBudgetExceededError as budget_exceeded:
+            self.stall = StalledGame(
+                self.seed, self.__roster(), self.days, budget_exceeded.phase,
+                budget_exceeded.steps, budget_exceeded.elapsed
+            )
+            self.logger.warning("%s, aborting." % self.stall)
+            result = EndGameState.ABORTED
+
+        self.result.outcome = result
+        self.result.days = self.days
+        self.result.consensus_retries = self.whole_game_hive.consensus_retries
+        self.__publish_event(GAME_END, "%s %s" % (result.name, self.days))
+        return result
+
+    def __roster(self) -> Dict[str, int]:
+        return {
+            character.__name__: len(hive.players)
+            for character, hive in sorted(self.hives_map.items(), key=lambda kv: kv[0].__name__)
+        }
+
+    def __play_days(self) -> None:
+        game_random: Optional[GameRandom] = self.rng
+        # Set up by play()
+        assert game_random is not None
         while self.__game_on():
+            self.watchdog.step(DAY_PHASE)
+            self.days += 1
+            if night_kill_decides(self.villager_count, self.werewolf_count):
+                self.logger.info("The werewolves are bound to win tonight.")
+                self.__skip_deciding_night()
+                break
+            # Every night and day draws from its own substream, so that games
+            # of the same seed draw the same numbers in every phase, however
+            # differently the phases before went.
+            game_random.restart(2 * self.days)
             self.logger.info("The village goes to sleep...")
-            self.logger.info("Werewolves wake up!")
-            # Inform the werewolves of each others' identities.
-            # In the future, in a more abstracted version of the game, use the
-            # `can_members_know_each_other` property of Hives.
-            for werewolf in ww_hive.players:
-                for player in ww_hive.players:
-                    werewolf.learn_hive_member(SanitizedPlayer.sanitize(player))
-            dead_by_wolf: Optional[SanitizedPlayer] = ww_hive.night_consensus(self.__batch_sanitize(self.__filter_members(Werewolf)))
-
-            if dead_by_wolf is not None:
-                role_of_the_dead = SanitizedPlayer.recover_player_identity(dead_by_wolf).role
+            night_deaths: List[Player] = self.__play_night()
+
+            if night_deaths:
                 self.logger.info("Night has ended and the village awakes...")
-                self.logger.info("The werewolves killed %s, a %s!" % (
-                    dead_by_wolf.name, role_of_the_dead
-                ))
-                
-                if type(role_of_the_dead) == Villager:
-                    self.villager_count -= 1
-                else:
-                    self.werewolf_count -= 1
-                self.__kill_player(SanitizedPlayer.recover_player_identity(dead_by_wolf))
 
                 if self.villager_count <= self.werewolf_count:
                     break
 
                 self.logger.info("Vote now who to lynch...")
-                nomination_map, vote_table = self.whole_game_hive.day_consensus(self.__batch_sanitize(self.players))
-                consensus: List[SanitizedPlayer] = self.__count_votes(vote_table)
+                game_random.restart(2 * self.days + 1)
+                nomination_map, vote_table = self.whole_game_hive.day_consensus(
+                    self.__batch_sanitize(self.whole_game_hive.alive_players)
+                )
+                consensus: List[SanitizedPlayer] = self.__leaders()
+                revotes: int = 0
 
-                while len(consensus) != 1:
+                while len(consensus) > 1 and revotes < self.tie_breaker.max_revotes:
                     self.logger.info("Tie among %s" % str(consensus))
+                    self.__publish_event(TIE, str(len(consensus)))
+                    self.result.tie_rounds += 1
+                    revotes += 1
+                    self.watchdog.step(TIE_PHASE)
                     nomination_map, vote_table = self.whole_game_hive.day_consensus(consensus)
-                    consensus = self.__count_votes(vote_table)
+                    consensus = self.__leaders()
 
-                assert len(consensus) == 1
-                lynched = consensus[0]
-                assert lynched is None or type(lynched) is SanitizedPlayer
+                lynched: Optional[SanitizedPlayer]
+                if len(consensus) == 1:
+                    if revotes:
+                        self.tie_breaker.resolved_by_revote()
+                    lynched = consensus[0]
+                else:
+                    self.logger.info("Still tied among %s, resorting to %s." % (
+                        consensus, self.tie_breaker.NAME
+                    ))
+                    self.__publish_event(TIE_BREAK, self.tie_breaker.NAME)
+                    lynched = self.tie_breaker.break_tie(consensus)
+
+                if lynched is None:
+                    self.logger.info("No one gets lynched today.")
+                    continue
+
+                assert type(lynched) is SanitizedPlayer
                 original_player = SanitizedPlayer.recover_player_identity(lynched)
                 role_of_the_lynched = original_player.role
 
@@ -130,12 +408,17 @@ class Moderator(object):
                         vote_table
                     )
 
-                if type(role_of_the_lynched) == Villager:
-                    self.villager_count -= 1
-                else:
-                    self.werewolf_count -= 1
-                self.__kill_player(original_player)
+                self.__record_death(original_player, DeathCause.LYNCH)
+                self.__publish_event(LYNCH, character_of(role_of_the_lynched).__name__)
+
+    def play_for_result(self) -> GameResult:
+        """
+        Same as `play` but returns the whole record of the game.
+        """
+        self.play()
+        return self.result
 
+    def __endgame_state(self) -> "EndGameState":
         if self.villager_count <= self.werewolf_count:
             self.logger.info("The werewolves won!")
             return EndGameState.WEREWOLVES_WON
@@ -0,0 +1,171 @@
+"""
+The fixed workload `src.perftrack` measures at every revision. It is run as a
+script from the root of the revision's tree, so it only uses what every
+revision has: `Moderator(players, log_discriminant)`, `Experiment.run` and
+`ValueTieCounter`. Games are seeded through `random`.
+
+Prints a JSON object with the samples of every benchmark, one sample per
+repeat, lower being better.
+
+    python src/perf_workload.py --repeats 5 --games 20
+"""
+from __future__ import annotations
+
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+# Same as src.type_checking.TYPE_CHECKING, defined here because this script
+# also runs in trees that predate that module.
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, List, Set, Tuple
+
+# Benchmarks and the unit of their samples
+UNITS: Dict[str, str] = {
+    "moderator_play_small": "s/game",
+    "moderator_play_large": "s/game",
+    "experiment_run": "s/game",
+    "memory_per_game": "B/game",
+    "value_tie_counter_update": "s/op",
+    "value_tie_counter_most_common": "s/op",
+}
+# (werewolves, villagers)
+SMALL_GAME: Tuple[int, int] = (2, 6)
+LARGE_GAME: Tuple[int, int] = (4, 16)
+TIE_COUNTER_KEYS: int = 64
+TIE_COUNTER_OPS: int = 2000
+
+
+def make_players(werewolves: int, villagers: int) -> Set[Any]:
+    from src.game_characters import Player, Villager, Werewolf
+
+    werewolf = Werewolf()
+    villager = Villager()
+    players: Set[Any] = set()
+    for i in range(werewolves):
+        players.add(Player("Werewolf Player #%s" % i, werewolf))
+    for i in range(villagers):
+        players.add(Player("Villager Player #%s" % i, villager))
+    return players
+
+
+def play_seeded(players: Set[Any], seed: int) -> None:
+    from src import game_characters
+    from src.moderator import Moderator
+
+    random.seed(seed)
+    Moderator(set(players), str(seed)).play()
+    # Revisions that cache SanitizedPlayers per Player would otherwise keep
+    # growing across games.
+    forget = getattr(getattr(game_characters, "SanitizedPlayer", None), "forget", None)
+    if forget:
+        for player in players:
+            forget(player)
+
+
+def moderator_play(size: Tuple[int, int], games: int) -> float:
+    players = make_players(*size)
+    started = time.perf_counter()
+    for seed in range(games):
+        play_seeded(players, seed)
+    return (time.perf_counter() - started) / games
+
+
+def moderator_play_small(games: int) -> float:
+    return moderator_play(SMALL_GAME, games)
+
+
+def moderator_play_large(games: int) -> float:
+    return moderator_play(LARGE_GAME, games)
+
+
+def experiment_run(games: int) -> float:
+    from laboratory import Experiment
+
+    experiment = Experiment(*SMALL_GAME)
+    random.seed(0)
+    started = time.perf_counter()
+    experiment.run(games)
+    return (time.perf_counter() - started) / games
+
+
+def memory_per_game(games: int) -> float:
+    """
+    Mean peak of memory allocated while playing a game.
+    """
+    players = make_players(*LARGE_GAME)
+    peaks: int = 0
+    tracemalloc.start()
+    try:
+        for seed in range(games):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            play_seeded(players, seed)
+            peaks += tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    return peaks / games
+
+
+def value_tie_counter_update(games: int) -> float:
+    from src.utils import ValueTieCounter
+
+    counter = ValueTieCounter()
+    keys = ["Player #%s" % (i % TIE_COUNTER_KEYS) for i in range(TIE_COUNTER_OPS)]
+    started = time.perf_counter()
+    for key in keys:
+        counter.update([key])
+    return (time.perf_counter() - started) / TIE_COUNTER_OPS
+
+
+def value_tie_counter_most_common(games: int) -> float:
+    from src.utils import ValueTieCounter
+
+    counter = ValueTieCounter()
+    counter.update("Player #%s" % (i % TIE_COUNTER_KEYS) for i in range(TIE_COUNTER_OPS))
+    started = time.perf_counter()
+    for _ in range(TIE_COUNTER_OPS):
+        counter.most_common(1)
+    return (time.perf_counter() - started) / TIE_COUNTER_OPS
+
+
+BENCHMARKS: Dict[str, Callable[[int], float]] = {
+    "moderator_play_small": moderator_play_small,
+    "moderator_play_large": moderator_play_large,
+    "experiment_run": experiment_run,
+    "memory_per_game": memory_per_game,
+    "value_tie_counter_update": value_tie_counter_update,
+    "value_tie_counter_most_common": value_tie_counter_most_common,
+}
+
+
+def run(repeats: int, games: int) -> Dict[str, Any]:
+    import logging
+
+    # Log formatting is not what is being measured, and old revisions log a lot.
+    logging.disable(logging.CRITICAL)
+    samples: Dict[str, List[float]] = {}
+    errors: Dict[str, str] = {}
+    for name, benchmark in BENCHMARKS.items():
+        try:
+            # Warm up
+            benchmark(1)
+            samples[name] = [benchmark(games) for _ in range(repeats)]
+        except Exception as error:
+            # The benchmarked code may not exist at this revision.
+            errors[name] = "%s: %s" % (type(error).__name__, error)
+    return {"samples": samples, "units": UNITS, "errors": errors}
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Run the performance tracking workload")
+    parser.add_argument("--repeats", "-r", type=int, default=5)
+    parser.add_argument("--games", "-n", type=int, default=20)
+    args = parser.parse_args()
+    sys.path.insert(0, ".")
+    json.dump(run(args.repeats, args.games), sys.stdout)
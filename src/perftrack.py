@@ -0,0 +1,296 @@
+"""
+Tracks the performance of Wherewholf across git revisions. Each revision is
+checked out in its own worktree and runs the fixed workload in
+`src/perf_workload.py`; samples are appended to a local history file, and
+revisions are compared with a Mann-Whitney U test so that only significant
+slowdowns get flagged.
+
+    python -m src.perftrack run HEAD~3 HEAD~2 HEAD~1 HEAD
+    python -m src.perftrack compare HEAD~1 HEAD
+    python -m src.perftrack log moderator_play_small
+"""
+from __future__ import annotations
+
+from .benchmarks import PROJECT_ROOT
+from .type_checking import TYPE_CHECKING
+
+import json
+import math
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Sequence
+
+HISTORY_FILE: str = os.path.join(PROJECT_ROOT, ".perf-history.jsonl")
+WORKLOAD_SCRIPT: str = os.path.join(PROJECT_ROOT, "src", "perf_workload.py")
+# Stands for the working tree, uncommitted changes and all.
+WORKING_TREE: str = "."
+# A slowdown is flagged when it is both significant and at least this large.
+DEFAULT_ALPHA: float = 0.05
+DEFAULT_THRESHOLD: float = 0.05
+# Above this many samples in total, U is taken to be normally distributed.
+EXACT_U_MAX_SAMPLES: int = 40
+
+
+class Regression(object):
+
+    __slots__ = ("benchmark", "old", "new", "p_value")
+
+    def __init__(self, benchmark: str, old: float, new: float, p_value: float):
+        self.benchmark: str = benchmark
+        # Sample medians
+        self.old: float = old
+        self.new: float = new
+        self.p_value: float = p_value
+
+    @property
+    def ratio(self) -> float:
+        return self.new / self.old if self.old else math.inf
+
+    def __str__(self) -> str:
+        return "%s: %.4g -> %.4g (x%.2f, p=%.3f)" % (
+            self.benchmark, self.old, self.new, self.ratio, self.p_value
+        )
+
+
+def _git(*args: str) -> str:
+    return subprocess.run(
+        ["git", *args], capture_output=True, text=True, check=True, cwd=PROJECT_ROOT
+    ).stdout.strip()
+
+
+def _u_counts(m: int, n: int) -> List[int]:
+    """
+    The number of orderings of `m` and `n` samples giving each value of the
+    Mann-Whitney U statistic of the `m` samples, from 0 to m * n.
+    """
+    # counts[j][u] for the first i of the m samples and j of the n samples
+    counts: List[List[int]] = [[1] for _ in range(n + 1)]
+    for i in range(1, m + 1):
+        previous = counts
+        counts = [[1] + [0] * (i * j) for j in range(n + 1)]
+        for j in range(n + 1):
+            for u in range(i * j + 1):
+                # The largest sample is either one of the m, beating all j...
+                total = previous[j][u - j] if 0 <= u - j < len(previous[j]) else 0
+                # ...or one of the n.
+                if j and u < len(counts[j - 1]):
+                    total += counts[j - 1][u]
+                counts[j][u] = total
+    return counts[n]
+
+
+def mann_whitney_greater(new: Sequence[float], old: Sequence[float]) -> float:
+    """
+    One-sided p-value of the Mann-Whitney U test that samples in `new` tend to
+    be greater than samples in `old`. Ties count as half.
+    """
+    m, n = len(new), len(old)
+    if not m or not n:
+        return 1.0
+    u: float = sum((a > b) + 0.5 * (a == b) for a in new for b in old)
+    if m + n <= EXACT_U_MAX_SAMPLES:
+        counts = _u_counts(m, n)
+        return sum(counts[math.ceil(u):]) / sum(counts)
+    mean = m * n / 2
+    deviation = math.sqrt(m * n * (m + n + 1) / 12)
+    return 0.5 * math.erfc((u - 0.5 - mean) / deviation / math.sqrt(2))
+
+
+def find_regressions(
+    old: Dict[str, List[float]],
+    new: Dict[str, List[float]],
+    alpha: float=DEFAULT_ALPHA,
+    threshold: float=DEFAULT_THRESHOLD
+) -> List[Regression]:
+    """
+    Benchmarks that got significantly slower (or bigger) from `old` to `new`
+    samples, by at least `threshold` of their median.
+    """
+    regressions: List[Regression] = []
+    for benchmark in sorted(old.keys() & new.keys()):
+        old_median = statistics.median(old[benchmark])
+        new_median = statistics.median(new[benchmark])
+        if new_median < old_median * (1 + threshold):
+            continue
+        p_value = mann_whitney_greater(new[benchmark], old[benchmark])
+        if p_value < alpha:
+            regressions.append(Regression(benchmark, old_median, new_median, p_value))
+    return regressions
+
+
+def resolve(revision: str) -> str:
+    """
+    The commit `revision` names, or WORKING_TREE.
+    """
+    if revision == WORKING_TREE:
+        return WORKING_TREE
+    return _git("rev-parse", "--verify", "%s^{commit}" % revision)
+
+
+def run_workload(tree: str, repeats: int, games: int) -> Dict[str, Any]:
+    """
+    Run the workload of this tree against the code in `tree`.
+    """
+    with open(WORKLOAD_SCRIPT) as workload:
+        source = workload.read()
+    completed = subprocess.run(
+        [sys.executable, "-c", source, "--repeats", str(repeats), "--games", str(games)],
+        capture_output=True, text=True, check=True, cwd=tree
+    )
+    return json.loads(completed.stdout)
+
+
+def measure_revision(revision: str, repeats: int=5, games: int=20) -> Dict[str, Any]:
+    """
+    Run the workload against `revision`, checked out in a temporary worktree,
+    and return its history entry.
+    """
+    commit: str = resolve(revision)
+    if commit == WORKING_TREE:
+        measured = run_workload(PROJECT_ROOT, repeats, games)
+    else:
+        tree: str = tempfile.mkdtemp(prefix="wherewholf-perf-")
+        try:
+            _git("worktree", "add", "--detach", tree, commit)
+            measured = run_workload(tree, repeats, games)
+        finally:
+            _git("worktree", "remove", "--force", tree)
+            shutil.rmtree(tree, ignore_errors=True)
+
+    measured.update(
+        revision=revision,
+        commit=commit,
+        measured_at=time.time(),
+        machine=platform.node(),
+        python=platform.python_version(),
+        repeats=repeats,
+        games=games
+    )
+    return measured
+
+
+def append_history(entry: Dict[str, Any], path: str=HISTORY_FILE) -> None:
+    with open(path, "a") as history:
+        history.write(json.dumps(entry, sort_keys=True) + "\n")
+
+
+def load_history(path: str=HISTORY_FILE, machine: Optional[str]=None) -> List[Dict[str, Any]]:
+    """
+    History entries, oldest first. Only those measured on `machine`, if given,
+    since timings from different machines do not compare.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path) as history:
+        entries = [json.loads(line) for line in history if line.strip()]
+    return [entry for entry in entries if machine is None or entry["machine"] == machine]
+
+
+def latest_entry(history: Sequence[Dict[str, Any]], revision: str) -> Dict[str, Any]:
+    commit: str = resolve(revision)
+    for entry in reversed(history):
+        if entry["commit"] == commit:
+            return entry
+    raise KeyError("No measurements of %s (%s)" % (revision, commit))
+
+
+def report(old: Dict[str, Any], new: Dict[str, Any], alpha: float, threshold: float) -> bool:
+    """
+    Print how `new` compares to `old`. Returns False if anything regressed.
+    """
+    regressions: Dict[str, Regression] = {
+        regression.benchmark: regression
+        for regression in find_regressions(old["samples"], new["samples"], alpha, threshold)
+    }
+    print("%s -> %s" % (old["revision"], new["revision"]))
+    for benchmark in sorted(old["samples"].keys() | new["samples"].keys()):
+        if benchmark not in old["samples"] or benchmark not in new["samples"]:
+            print("  %-32s only measured at one revision" % benchmark)
+            continue
+        old_median = statistics.median(old["samples"][benchmark])
+        new_median = statistics.median(new["samples"][benchmark])
+        print("  %-32s %12.4g %12.4g %s  x%.2f%s" % (
+            benchmark, old_median, new_median, new["units"].get(benchmark, ""),
+            new_median / old_median if old_median else math.inf,
+            "  SLOWER (p=%.3f)" % regressions[benchmark].p_value
+            if benchmark in regressions else ""
+        ))
+    for entry in (old, new):
+        for benchmark, error in sorted(entry["errors"].items()):
+            print("  %-32s failed at %s: %s" % (benchmark, entry["revision"], error))
+    return not regressions
+
+
+def print_log(history: Sequence[Dict[str, Any]], benchmark: str) -> None:
+    for entry in history:
+        if benchmark not in entry["samples"]:
+            continue
+        samples: List[float] = entry["samples"][benchmark]
+        median: float = statistics.median(samples)
+        line: str = "%s %-12s %12.4g %s" % (
+            entry["commit"][:10], entry["revision"], median, entry["units"][benchmark]
+        )
+        if entry["units"][benchmark] == "s/game" and median:
+            line += " (%.1f games/s)" % (1 / median)
+        print(line)
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Track WhereWholf performance across revisions")
+    parser.add_argument("--history", default=HISTORY_FILE, help="The history file.")
+    parser.add_argument(
+        "--alpha", type=float, default=DEFAULT_ALPHA,
+        help="The significance level of slowdowns."
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=DEFAULT_THRESHOLD,
+        help="The smallest relative slowdown worth flagging."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_command = commands.add_parser(
+        "run", help="Measure revisions, oldest first, and compare each to the one before it."
+    )
+    run_command.add_argument(
+        "revisions", nargs="+", help="Git revisions; '%s' for the working tree." % WORKING_TREE
+    )
+    run_command.add_argument("--repeats", "-r", type=int, default=5)
+    run_command.add_argument("--games", "-n", type=int, default=20)
+    compare_command = commands.add_parser("compare", help="Compare two measured revisions.")
+    compare_command.add_argument("old")
+    compare_command.add_argument("new")
+    log_command = commands.add_parser("log", help="Show a benchmark over the history.")
+    log_command.add_argument("benchmark")
+    args = parser.parse_args()
+
+    ok: bool = True
+    if args.command == "run":
+        entries: List[Dict[str, Any]] = []
+        for revision in args.revisions:
+            entry = measure_revision(revision, args.repeats, args.games)
+            append_history(entry, args.history)
+            entries.append(entry)
+        for old, new in zip(entries, entries[1:]):
+            ok = report(old, new, args.alpha, args.threshold) and ok
+        if len(entries) == 1:
+            for benchmark in sorted(entries[0]["samples"]):
+                print("%s:" % benchmark, end=" ")
+                print_log(entries, benchmark)
+    elif args.command == "compare":
+        history = load_history(args.history, platform.node())
+        ok = report(
+            latest_entry(history, args.old), latest_entry(history, args.new),
+            args.alpha, args.threshold
+        )
+    else:
+        print_log(load_history(args.history, platform.node()), args.benchmark)
+    sys.exit(0 if ok else 1)
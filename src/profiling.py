@@ -0,0 +1,214 @@
+"""
+Profiling of experiments. Only a sample of the games is run under cProfile,
+evenly spread over the experiment so that it is representative, and the rest
+run at full speed. Profiles of several processes add up into one.
+
+Besides the usual .pstats file, profiles are written as collapsed stacks, one
+`frame;frame;... microseconds` line per stack, for flamegraph.pl, speedscope
+and the like. cProfile only records who called whom, so stacks are rebuilt
+from the call graph, splitting the time of a function among its callers in
+proportion. The first frame of every stack is the game phase the stack runs
+in, going by the outermost phase function on it (see PHASE_FUNCTIONS). Tie
+revotes count as nominations and voting, as they are.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from .defaults import DEFAULT_FRACTION
+from .type_checking import TYPE_CHECKING
+
+import cProfile
+import math
+import os
+import pstats
+
+if TYPE_CHECKING:
+    from .experiment import Experiment
+    from .results import EndGameState
+    from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+    # pstats' key for a function: (filename, line, name)
+    Function = Tuple[str, int, str]
+    # What pstats keeps per function: (primitive calls, calls, own time,
+    # cumulative time, {caller: (primitive calls, calls, own time, cumulative time)}).
+    # The times are floats, whatever the type stubs of cProfile say.
+    RawStats = Dict[Function, Tuple[int, int, int, int, Dict[Function, Tuple[int, int, int, int]]]]
+
+NIGHT: str = "night"
+NOMINATIONS: str = "nominations"
+VOTING: str = "voting"
+TIE_BREAK: str = "tie-break"
+LYNCH_REACTIONS: str = "lynch reactions"
+# Everything outside of the phases: setting games up, bookkeeping...
+OTHER: str = "other"
+PHASES = (NIGHT, NOMINATIONS, VOTING, TIE_BREAK, LYNCH_REACTIONS, OTHER)
+# Functions of either engine that start a phase, by name
+PHASE_FUNCTIONS: Dict[str, str] = {
+    "__play_night": NIGHT,
+    "__gather_nominations": NOMINATIONS,
+    "__gather_votes": VOTING,
+    "break_tie": TIE_BREAK,
+    "break_tie_among": TIE_BREAK,
+    "react_to_lynch_result": LYNCH_REACTIONS,
+    "__react_to_lynch_result": LYNCH_REACTIONS,
+}
+# Stacks rebuilt from the call graph that account for less time than this,
+# in seconds, are dropped. There are a lot of them, and they add up to little.
+SMALLEST_STACK: float = 1e-7
+
+
+class GameProfiler(object):
+    """
+    Runs a `fraction` of the games it is given under cProfile, spread evenly:
+    game `i` is profiled when `i * fraction` reaches a whole number, so game 0
+    always is. When profiling a shard of an experiment, `offset` is the index
+    of the shard's first game in the experiment.
+    """
+
+    def __init__(self, fraction: float=DEFAULT_FRACTION, offset: int=0):
+        if not 0 < fraction <= 1:
+            raise ValueError("Expected a fraction of games in (0, 1], got %s." % fraction)
+        self.fraction: float = fraction
+        self.profile: cProfile.Profile = cProfile.Profile()
+        # Index of the next game in the experiment
+        self.game: int = offset
+        self.profiled: int = 0
+
+    def samples(self, game: int) -> bool:
+        return math.floor(game * self.fraction) > math.floor((game - 1) * self.fraction)
+
+    def run(self, experiment: Experiment, games: int, seed: Optional[int]=None) -> Counter:
+        """
+        Play `games` games of `experiment` like `Experiment.run` does,
+        profiling the sampled ones.
+        """
+        wins: Counter = Counter()
+        for i in range(games):
+            game_seed: Optional[int] = None if seed is None else seed + i
+            outcome: EndGameState
+            if self.samples(self.game):
+                self.profiled += 1
+                self.profile.enable()
+                try:
+                    outcome = experiment.play_game(game_seed, str(i))
+                finally:
+                    self.profile.disable()
+            else:
+                outcome = experiment.play_game(game_seed, str(i))
+            wins[outcome] += 1
+            self.game += 1
+        return wins
+
+    def raw_stats(self) -> RawStats:
+        """
+        The profile so far, in a form that can be sent between processes and
+        given to `merge_profiles`.
+        """
+        self.profile.create_stats()
+        return self.profile.stats
+
+
+class _RawProfile(cProfile.Profile):
+    """
+    Lets pstats load stats that came from another process.
+    """
+
+    def __init__(self, stats: RawStats):
+        super().__init__()
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+def merge_profiles(profiles: Iterable[RawStats]) -> pstats.Stats:
+    merged: Optional[pstats.Stats] = None
+    for raw in profiles:
+        if merged is None:
+            merged = pstats.Stats(_RawProfile(raw))
+        else:
+            merged.add(_RawProfile(raw))
+    if merged is None:
+        raise ValueError("No profiles to merge.")
+    return merged
+
+
+def stats_of(stats: pstats.Stats) -> RawStats:
+    """
+    The stats of every function in `stats`, which pstats keeps in an
+    undocumented attribute its type stubs leave out.
+    """
+    raw: RawStats = vars(stats)["stats"]
+    return raw
+
+
+def frame_name(function: Function) -> str:
+    filename, line, name = function
+    if filename == "~":
+        # Built-ins
+        return name.replace(";", ",")
+    return "%s (%s:%s)" % (name, os.path.basename(filename), line)
+
+
+def collapsed_stacks(stats: pstats.Stats) -> Dict[str, float]:
+    """
+    Seconds spent in every stack, by `phase;frame;frame;...`, outermost first.
+    """
+    raw: RawStats = stats_of(stats)
+    callees: Dict[Function, List[Tuple[Function, float]]] = {function: [] for function in raw}
+    roots: List[Function] = []
+    for function, (_, _, _, _, callers) in raw.items():
+        if not callers:
+            roots.append(function)
+        for caller, edge in callers.items():
+            if caller in callees:
+                # The cumulative time of `function` when called by `caller`
+                callees[caller].append((function, edge[3]))
+
+    stacks: Dict[str, float] = {}
+    # (function, stack down to it, phase, share of the function's time, the
+    # functions on the stack)
+    pending: List[Tuple[Function, Tuple[str, ...], Optional[str], float, frozenset]] = [
+        (root, (), None, 1.0, frozenset()) for root in sorted(roots)
+    ]
+    while pending:
+        function, stack, phase, share, on_stack = pending.pop()
+        own_time: float = raw[function][2]
+        if phase is None:
+            phase = PHASE_FUNCTIONS.get(function[2])
+        stack = stack + (frame_name(function),)
+        on_stack = on_stack | {function}
+
+        if own_time * share >= SMALLEST_STACK:
+            key: str = ";".join((phase or OTHER,) + stack)
+            stacks[key] = stacks.get(key, 0.0) + own_time * share
+        for callee, edge_time in callees[function]:
+            callee_time: float = raw[callee][3]
+            # Recursion is already accounted for in the outermost call.
+            if callee in on_stack or callee_time <= 0:
+                continue
+            callee_share: float = share * edge_time / callee_time
+            if callee_time * callee_share >= SMALLEST_STACK:
+                pending.append((callee, stack, phase, callee_share, on_stack))
+    return stacks
+
+
+def phase_times(stacks: Dict[str, float]) -> Dict[str, float]:
+    """
+    Seconds spent in every phase.
+    """
+    times: Dict[str, float] = {phase: 0.0 for phase in PHASES}
+    for stack, seconds in stacks.items():
+        times[stack.partition(";")[0]] += seconds
+    return times
+
+
+def write_collapsed(stacks: Dict[str, float], path: str) -> None:
+    """
+    Write stacks in the collapsed format, in whole microseconds.
+    """
+    with open(path, "w") as collapsed:
+        for stack, seconds in sorted(stacks.items()):
+            microseconds: int = round(seconds * 1e6)
+            if microseconds:
+                collapsed.write("%s %d\n" % (stack, microseconds))
@@ -0,0 +1,233 @@
+"""
+Live progress of a running experiment: games played, games/sec, ETA, the win
+split so far, deadlocks (games the watchdog stalled, and runs that died of
+a GameDeadLockError), timeouts and resident memory. Published as
+Prometheus text on a local HTTP port and as a JSON status file, both from a
+background thread, so the game loop only pays for bumping a few counters.
+"""
+from __future__ import annotations
+
+from .defaults import DEFAULT_INTERVAL
+from .errors import GameDeadLockError
+from .results import EndGameState
+from .type_checking import TYPE_CHECKING
+
+import json
+import os
+import threading
+import time
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+    from types import TracebackType
+    from typing import Any, Dict, List, Optional, Tuple, Type
+
+METRICS_HOST: str = "127.0.0.1"
+RUNNING: str = "running"
+FINISHED: str = "finished"
+FAILED: str = "failed"
+
+
+def resident_memory() -> int:
+    """
+    Resident set size of this process in bytes. Where /proc is missing, the
+    peak resident set size instead.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return 0
+    # Kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ProgressMetrics(object):
+    """
+    Counts the games of an experiment as they finish. Once started, publishes
+    the counts every `interval` seconds to `status_file` and serves them on
+    `port`, if given; port 0 picks a free port.
+    """
+
+    def __init__(
+        self,
+        total_games: int,
+        status_file: Optional[str]=None,
+        port: Optional[int]=None,
+        interval: float=DEFAULT_INTERVAL
+    ):
+        self.total_games: int = total_games
+        self.status_file: Optional[str] = status_file
+        self.port: Optional[int] = port
+        self.interval: float = interval
+        self.games: int = 0
+        # Every outcome is there from the start so that readers never see the
+        # dict change size.
+        self.outcomes: Dict[str, int] = {outcome.name: 0 for outcome in EndGameState}
+        self.deadlocks: int = 0
+        self.state: str = RUNNING
+        self.started: float = time.monotonic()
+        self.__stopped: threading.Event = threading.Event()
+        self.__publisher: Optional[threading.Thread] = None
+        self.__server: Optional[ThreadingHTTPServer] = None
+
+    def after_game(self, outcome: EndGameState, stalled: bool=False) -> None:
+        self.games += 1
+        self.outcomes[outcome.name] += 1
+        if stalled:
+            self.deadlocks += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        elapsed: float = time.monotonic() - self.started
+        games: int = self.games
+        rate: float = games / elapsed if elapsed > 0 else 0.0
+        return {
+            "state": self.state,
+            "games": games,
+            "total_games": self.total_games,
+            "elapsed_seconds": elapsed,
+            "games_per_second": rate,
+            "eta_seconds": (self.total_games - games) / rate if rate else None,
+            "outcomes": dict(self.outcomes),
+            "deadlocks": self.deadlocks,
+            "timeouts": self.outcomes[EndGameState.ABORTED.name],
+            "resident_memory_bytes": resident_memory()
+        }
+
+    def prometheus(self, snapshot: Optional[Dict[str, Any]]=None) -> str:
+        """
+        The snapshot in the Prometheus text exposition format.
+        """
+        if snapshot is None:
+            snapshot = self.snapshot()
+        eta: Any = snapshot["eta_seconds"] if snapshot["eta_seconds"] is not None else "NaN"
+        # (name, type, help, [(labels, value)])
+        metrics: List[Tuple[str, str, str, List[Tuple[str, Any]]]] = [
+            ("games_completed_total", "counter", "Games played so far.", [
+                ("", snapshot["games"])
+            ]),
+            ("games_planned", "gauge", "Games the experiment plays.", [
+                ("", snapshot["total_games"])
+            ]),
+            ("games_per_second", "gauge", "Games played per second so far.", [
+                ("", snapshot["games_per_second"])
+            ]),
+            ("eta_seconds", "gauge", "Seconds left at the rate so far.", [("", eta)]),
+            ("outcomes_total", "counter", "Games played so far, by outcome.", [
+                ('{outcome="%s"}' % outcome, count)
+                for outcome, count in sorted(snapshot["outcomes"].items())
+            ]),
+            (
+                "deadlocks_total", "counter",
+                "Games stalled by the watchdog or ended in a GameDeadLockError.",
+                [("", snapshot["deadlocks"])]
+            ),
+            ("timeouts_total", "counter", "Games aborted for going over budget.", [
+                ("", snapshot["timeouts"])
+            ]),
+            ("resident_memory_bytes", "gauge", "Resident set size.", [
+                ("", snapshot["resident_memory_bytes"])
+            ]),
+            ("elapsed_seconds", "gauge", "Seconds since the experiment started.", [
+                ("", snapshot["elapsed_seconds"])
+            ]),
+            ("running", "gauge", "Whether the experiment is still running.", [
+                ("", int(snapshot["state"] == RUNNING))
+            ]),
+        ]
+        lines: List[str] = []
+        for name, kind, description, samples in metrics:
+            lines.append("# HELP wherewholf_%s %s" % (name, description))
+            lines.append("# TYPE wherewholf_%s %s" % (name, kind))
+            lines.extend(
+                "wherewholf_%s%s %s" % (name, labels, value) for labels, value in samples
+            )
+        return "\n".join(lines) + "\n"
+
+    def write_status(self, snapshot: Optional[Dict[str, Any]]=None) -> None:
+        """
+        Rewrite the status file, atomically so that readers never see half of
+        it.
+        """
+        if self.status_file is None:
+            return
+        temporary: str = "%s.tmp" % self.status_file
+        with open(temporary, "w") as status:
+            json.dump(snapshot if snapshot is not None else self.snapshot(), status, indent=2)
+        os.replace(temporary, self.status_file)
+
+    def start(self) -> None:
+        self.started = time.monotonic()
+        self.state = RUNNING
+        self.__stopped.clear()
+        if self.port is not None:
+            self.__serve()
+        if self.status_file is not None:
+            self.write_status()
+            self.__publisher = threading.Thread(
+                target=self.__publish, name="progress-status", daemon=True
+            )
+            self.__publisher.start()
+
+    def stop(self, state: str=FINISHED) -> None:
+        self.state = state
+        self.__stopped.set()
+        if self.__publisher is not None:
+            self.__publisher.join()
+            self.__publisher = None
+        self.write_status()
+        if self.__server is not None:
+            self.__server.shutdown()
+            self.__server.server_close()
+            self.__server = None
+
+    def __publish(self) -> None:
+        while not self.__stopped.wait(self.interval):
+            self.write_status()
+
+    def __serve(self) -> None:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        progress = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+
+            def do_GET(self) -> None:
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body: bytes = progress.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                # Scrapes are not worth a line on stderr each.
+                pass
+
+        server = ThreadingHTTPServer((METRICS_HOST, self.port or 0), MetricsHandler)
+        server.daemon_threads = True
+        self.port = server.server_address[1]
+        self.__server = server
+        threading.Thread(target=server.serve_forever, name="progress-metrics", daemon=True).start()
+
+    def __enter__(self) -> "ProgressMetrics":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType]
+    ) -> None:
+        if exc_type is not None and issubclass(exc_type, GameDeadLockError):
+            self.deadlocks += 1
+        self.stop(FINISHED if exc_type is None else FAILED)
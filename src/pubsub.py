@@ -1,6 +1,11 @@
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
 from collections import Counter
-from typing import List, Dict
+from .type_checking import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import List, Dict
 
 
 class Subscriber(ABC):
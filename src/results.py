@@ -0,0 +1,181 @@
+"""
+Records of finished games, compact enough to keep one for every game of a long
+experiment.
+"""
+from __future__ import annotations
+
+from enum import Enum
+from .type_checking import TYPE_CHECKING
+
+import struct
+
+if TYPE_CHECKING:
+    from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+    # (index of the player in the name-ordered roster, cause, was a werewolf)
+    Death = Tuple[int, "DeathCause", bool]
+
+# Starts every results file, followed by the version of the layout of its
+# results (uint16, little-endian). Bump the version whenever GameResult.HEADER
+# or GameResult.DEATH changes.
+RESULTS_MAGIC: bytes = b"WWRS"
+RESULTS_FORMAT_VERSION: int = 2
+_FILE_HEADER = struct.Struct("<4sH")
+
+
+class EndGameState(Enum):
+    UNKNOWN_CONDITION = -1
+    WEREWOLVES_WON = 1
+    VILLAGERS_WON = 2
+    DRAW = 3
+    # The game went over its GameWatchdog budget.
+    ABORTED = 4
+
+
+# The player index of a death in a skipped day: someone died, but the day was
+# not played out to say who.
+UNKNOWN_PLAYER: int = 0xFFFF
+
+
+class ResultsFormatError(Exception):
+    """
+    Thrown when reading results that are not in version RESULTS_FORMAT_VERSION
+    of the layout.
+    """
+    pass
+
+
+class DeathCause(Enum):
+    NIGHT_KILL = 1
+    LYNCH = 2
+
+
+class GameResult(object):
+    """
+    What happened in a game, beyond who won.
+
+    The binary layout, little-endian, is a fixed-size header
+
+        seed (int64, -1 if unseeded), outcome (int8), players (uint16),
+        days (uint16), skipped days (uint16), consensus retries (uint32),
+        tie rounds (uint32), number of deaths (uint16)
+
+    followed by a fixed-size record per death, in order
+
+        player index (uint16, UNKNOWN_PLAYER if not played out), cause
+        (uint8), was a werewolf (uint8)
+
+    Files of results (`write_results`) start with RESULTS_MAGIC and the
+    version of this layout.
+    """
+
+    __slots__ = (
+        "outcome", "seed", "players", "days", "deaths", "consensus_retries", "tie_rounds",
+        "skipped_days"
+    )
+
+    HEADER = struct.Struct("<qbHHHIIH")
+    DEATH = struct.Struct("<HBB")
+
+    def __init__(
+        self,
+        outcome: EndGameState=EndGameState.UNKNOWN_CONDITION,
+        seed: Optional[int]=None,
+        players: int=0,
+        days: int=0,
+        deaths: Optional[List[Death]]=None,
+        consensus_retries: int=0,
+        tie_rounds: int=0,
+        skipped_days: int=0
+    ):
+        self.outcome: EndGameState = outcome
+        self.seed: Optional[int] = seed
+        # Number of players in the game
+        self.players: int = players
+        self.days: int = days
+        self.deaths: List[Death] = deaths if deaths is not None else []
+        # Times the village had to nominate and vote again for lack of quorum
+        self.consensus_retries: int = consensus_retries
+        # Times the village had to vote again to break a tie
+        self.tie_rounds: int = tie_rounds
+        # Days, of `days`, that were not played because the game was decided
+        # already. Their deaths are in `deaths`, as UNKNOWN_PLAYER.
+        self.skipped_days: int = skipped_days
+
+    def to_bytes(self) -> bytes:
+        return self.HEADER.pack(
+            -1 if self.seed is None else self.seed,
+            self.outcome.value,
+            self.players,
+            self.days,
+            self.skipped_days,
+            self.consensus_retries,
+            self.tie_rounds,
+            len(self.deaths)
+        ) + b"".join(
+            self.DEATH.pack(player, cause.value, werewolf)
+            for player, cause, werewolf in self.deaths
+        )
+
+    @classmethod
+    def from_bytes(cls, buffer: bytes, offset: int=0) -> "GameResult":
+        seed, outcome, players, days, skipped_days, retries, tie_rounds, death_count = (
+            cls.HEADER.unpack_from(buffer, offset)
+        )
+        offset += cls.HEADER.size
+        deaths: List[Death] = []
+        for _ in range(death_count):
+            player, cause, werewolf = cls.DEATH.unpack_from(buffer, offset)
+            deaths.append((player, DeathCause(cause), bool(werewolf)))
+            offset += cls.DEATH.size
+
+        return GameResult(
+            EndGameState(outcome), None if seed == -1 else seed, players, days,
+            deaths, retries, tie_rounds, skipped_days
+        )
+
+    @property
+    def size(self) -> int:
+        """
+        Size in bytes of this result's binary form.
+        """
+        return self.HEADER.size + self.DEATH.size * len(self.deaths)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, GameResult) and all(
+            getattr(self, attr) == getattr(other, attr) for attr in self.__slots__
+        )
+
+    def __str__(self) -> str:
+        return "%s after %s days (seed=%s, deaths=%s, retries=%s, tie rounds=%s, skipped=%s)" % (
+            self.outcome.name, self.days, self.seed, len(self.deaths),
+            self.consensus_retries, self.tie_rounds, self.skipped_days
+        )
+
+
+def write_results(results_file: BinaryIO, results: List[GameResult]) -> None:
+    """
+    Write a results file: the magic number and format version, then every
+    result in `results`.
+    """
+    results_file.write(_FILE_HEADER.pack(RESULTS_MAGIC, RESULTS_FORMAT_VERSION))
+    for result in results:
+        results_file.write(result.to_bytes())
+
+
+def read_results(results_file: BinaryIO) -> Iterator[GameResult]:
+    buffer: bytes = results_file.read()
+    if len(buffer) < _FILE_HEADER.size:
+        raise ResultsFormatError("Not a results file: too short for its header.")
+    magic, version = _FILE_HEADER.unpack_from(buffer)
+    if magic != RESULTS_MAGIC:
+        raise ResultsFormatError("Not a results file: starts with %r." % magic)
+    if version != RESULTS_FORMAT_VERSION:
+        raise ResultsFormatError("Results file is version %s, expected version %s." % (
+            version, RESULTS_FORMAT_VERSION
+        ))
+    offset: int = _FILE_HEADER.size
+    while offset < len(buffer):
+        result = GameResult.from_bytes(buffer, offset)
+        offset += result.size
+        yield result
@@ -0,0 +1,140 @@
+"""
+Random numbers for games. Every game draws from its own generator, seeded from
+the game's seed, so that a game plays out the same regardless of what ran
+before it.
+
+Game code draws from `current()`, the generator of the game being played.
+
+Games with the same seed but different settings draw common random numbers:
+each phase of a game restarts the generator on a substream of the seed, so
+the draws of two such games line up again after every phase.
+"""
+from __future__ import annotations
+
+from bisect import bisect
+from itertools import accumulate
+from .type_checking import TYPE_CHECKING
+
+import math
+import random
+import threading
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, List, Optional, Sequence, TypeVar
+
+    T = TypeVar("T")
+
+# random() returns multiples of 2 ** -53 in [0, 1); subtracting from this maps
+# them onto each other in reverse order.
+ANTITHETIC_ONE: float = 1.0 - 2.0 ** -53
+
+
+class GameRandom(object):
+    """
+    A Mersenne Twister, like `random`, with cheaper ways to draw what games
+    need. A choice takes a single uniform variate instead of the rejection
+    sampling of `random.choice`.
+
+    Unseeded generators are seeded from the `random` module so that seeding
+    `random` still makes a run reproducible.
+
+    An antithetic generator draws 1 - u wherever the generator with the same
+    seed draws u, so that the two play a negatively correlated pair of games.
+    """
+
+    __slots__ = ("seed", "generator", "random")
+
+    def __init__(self, seed: Optional[int]=None, antithetic: bool=False):
+        self.seed: int = seed if seed is not None else random.getrandbits(64)
+        self.generator: random.Random = random.Random(self.seed)
+        # The bound method of the generator itself: in CPython, nothing hands
+        # out single variates cheaper.
+        self.random: Callable[[], float] = (
+            self.__antithetic_random if antithetic else self.generator.random
+        )
+
+    def __antithetic_random(self) -> float:
+        return ANTITHETIC_ONE - self.generator.random()
+
+    def restart(self, stream: int) -> None:
+        """
+        Continue from the start of substream `stream` of this generator's
+        seed, no matter how much was drawn before.
+        """
+        self.generator.seed((self.seed << 32) ^ stream)
+
+    def randbelow(self, n: int) -> int:
+        """
+        A random integer in [0, n).
+        """
+        return int(self.random() * n)
+
+    def choice(self, seq: Sequence[T]) -> T:
+        return seq[int(self.random() * len(seq))]
+
+    def weighted_index(self, weights: Sequence[float]) -> int:
+        """
+        An index into `weights`, picked with probability proportional to its
+        weight.
+        """
+        cumulative: List[float] = list(accumulate(weights))
+        return bisect(cumulative, self.random() * cumulative[-1], 0, len(cumulative) - 1)
+
+    def getstate(self) -> object:
+        return self.generator.getstate()
+
+
+class TiltedRandom(GameRandom):
+    """
+    A GameRandom whose choices are tilted: an item is picked with probability
+    proportional to `weigh(item)` instead of uniformly. Keeps the log of the
+    likelihood ratio of the choices made, uniform over tilted, so that what a
+    tilted game leads to can be reweighed into what untilted games would.
+    Everything else is drawn the same as by a GameRandom.
+    """
+
+    __slots__ = ("weigh", "log_likelihood_ratio")
+
+    def __init__(
+        self,
+        weigh: Callable[[Any], float],
+        seed: Optional[int]=None,
+        antithetic: bool=False
+    ):
+        super().__init__(seed, antithetic)
+        self.weigh: Callable[[Any], float] = weigh
+        self.log_likelihood_ratio: float = 0.0
+
+    @property
+    def likelihood_ratio(self) -> float:
+        return math.exp(self.log_likelihood_ratio)
+
+    def choice(self, seq: Sequence[T]) -> T:
+        weights: List[float] = [self.weigh(item) for item in seq]
+        picked: int = self.weighted_index(weights)
+        self.log_likelihood_ratio += math.log(sum(weights) / (len(weights) * weights[picked]))
+        return seq[picked]
+
+
+# Every thread plays its own game, so every thread has its own generator.
+# Created on first use, so that importing this module draws nothing.
+_games = threading.local()
+
+
+def current() -> GameRandom:
+    """
+    The generator of the game being played on this thread.
+    """
+    try:
+        return _games.current
+    except AttributeError:
+        _games.current = GameRandom()
+        return _games.current
+
+
+def use(game_random: GameRandom) -> None:
+    """
+    Make `game_random` the generator of the game about to be played on this
+    thread.
+    """
+    _games.current = game_random
@@ -0,0 +1,234 @@
+"""
+Split experiments into shards that can run on separate machines, then merge
+their results. Shards only share files: each writes a self-describing result
+file which can be copied around and merged anywhere.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from .stats import GameStatsAggregator
+from .type_checking import TYPE_CHECKING
+
+import hashlib
+import json
+import os
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SHARD_FORMAT: str = "wherewholf-shard"
+SHARD_FORMAT_VERSION: int = 1
+
+
+class IncompatibleShardsError(Exception):
+    """
+    Thrown when asked to merge shards that do not belong to the same
+    experiment, or that disagree with each other.
+    """
+    pass
+
+
+class ShardSpec(object):
+    """
+    Shard `index` (of `count`) of an experiment plays the games seeded with
+    `seed_start` up to, but not including, `seed_stop`.
+    """
+
+    __slots__ = ("experiment", "index", "count", "seed_start", "seed_stop")
+
+    def __init__(
+        self,
+        experiment: Dict[str, Any],
+        index: int,
+        count: int,
+        seed_start: int,
+        seed_stop: int
+    ):
+        # Everything that determines the outcome of the experiment: the game
+        # configuration, total number of games, base seed, etc.
+        self.experiment: Dict[str, Any] = experiment
+        self.index: int = index
+        self.count: int = count
+        self.seed_start: int = seed_start
+        self.seed_stop: int = seed_stop
+
+    @property
+    def games(self) -> int:
+        return self.seed_stop - self.seed_start
+
+    @property
+    def filename(self) -> str:
+        return "shard-%05d-of-%05d.json" % (self.index, self.count)
+
+    @property
+    def writer_name(self) -> str:
+        """
+        Names the chunks the shard writes into a column store, which may
+        hold the games of several experiments.
+        """
+        digest: str = hashlib.sha1(
+            json.dumps(self.experiment, sort_keys=True).encode()
+        ).hexdigest()
+        return "%s-shard-%05d-of-%05d" % (digest[:12], self.index, self.count)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "experiment": self.experiment,
+            "index": self.index,
+            "count": self.count,
+            "seed_start": self.seed_start,
+            "seed_stop": self.seed_stop
+        }
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, ShardSpec) and self.to_dict() == other.to_dict()
+
+    def __str__(self) -> str:
+        return "shard %s/%s (seeds %s-%s)" % (
+            self.index, self.count, self.seed_start, self.seed_stop
+        )
+
+
+def plan_shards(config: Dict[str, Any], games: int, count: int, seed: int=0) -> List[ShardSpec]:
+    """
+    Deterministically split `games` games, seeded from `seed` onwards, into
+    `count` contiguous seed ranges of (almost) equal size.
+    """
+    if count < 1 or count > max(games, 1):
+        raise ValueError("Can't split %s games into %s shards." % (games, count))
+
+    experiment: Dict[str, Any] = dict(config, games=games, seed=seed, shards=count)
+    base, remainder = divmod(games, count)
+    shards: List[ShardSpec] = []
+    seed_start: int = seed
+    for index in range(count):
+        size = base + (1 if index < remainder else 0)
+        shards.append(ShardSpec(experiment, index, count, seed_start, seed_start + size))
+        seed_start += size
+
+    return shards
+
+
+def summarize(tallies: Counter) -> Dict[str, Any]:
+    games: int = sum(tallies.values())
+    return {
+        "games": games,
+        "win_rates": {
+            outcome: count / games for outcome, count in sorted(tallies.items())
+        } if games else {}
+    }
+
+
+class ShardResult(object):
+
+    def __init__(self, spec: ShardSpec, tallies: Counter, stats: Optional[GameStatsAggregator]=None):
+        self.spec: ShardSpec = spec
+        # Game outcomes, keyed by EndGameState name
+        self.tallies: Counter = tallies
+        self.stats: Optional[GameStatsAggregator] = stats
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "format": SHARD_FORMAT,
+            "version": SHARD_FORMAT_VERSION,
+            "shard": self.spec.to_dict(),
+            "tallies": dict(sorted(self.tallies.items())),
+            "summary": summarize(self.tallies),
+            "stats": self.stats.to_dict() if self.stats else None
+        }
+
+    def write(self, path: str) -> None:
+        """
+        Write atomically, so that a shard file is either complete or absent.
+        """
+        tmp_path = "%s.tmp%s" % (path, os.getpid())
+        with open(tmp_path, "w") as shard_file:
+            json.dump(self.to_dict(), shard_file, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def read(path: str) -> "ShardResult":
+        with open(path) as shard_file:
+            raw: Dict[str, Any] = json.load(shard_file)
+
+        if raw.get("format") != SHARD_FORMAT or raw.get("version") != SHARD_FORMAT_VERSION:
+            raise IncompatibleShardsError("%s is not a version %s shard file." % (
+                path, SHARD_FORMAT_VERSION
+            ))
+
+        spec = ShardSpec(**raw["shard"])
+        tallies: Counter = Counter(raw["tallies"])
+        if sum(tallies.values()) != spec.games:
+            raise IncompatibleShardsError("%s is incomplete: %s games out of %s." % (
+                path, sum(tallies.values()), spec.games
+            ))
+        return ShardResult(
+            spec, tallies,
+            GameStatsAggregator.from_dict(raw["stats"]) if raw.get("stats") else None
+        )
+
+
+def find_shard_files(paths: Iterable[str]) -> List[str]:
+    """
+    Expand directories into the shard files they contain.
+    """
+    found: List[str] = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.startswith("shard-") and name.endswith(".json")
+            )
+        else:
+            found.append(path)
+    return found
+
+
+def merge_shards(results: Iterable[ShardResult]) -> Dict[str, Any]:
+    """
+    Combine shards of the same experiment into one report. The same shard may
+    appear more than once (e.g., copied from several nodes) as long as all the
+    copies agree.
+    """
+    experiment: Any = None
+    merged: Dict[int, ShardResult] = {}
+
+    for result in results:
+        if experiment is None:
+            experiment = result.spec.experiment
+        elif result.spec.experiment != experiment:
+            raise IncompatibleShardsError("%s belongs to a different experiment: %s vs %s" % (
+                result.spec, result.spec.experiment, experiment
+            ))
+
+        existing = merged.get(result.spec.index)
+        if existing is None:
+            merged[result.spec.index] = result
+        elif existing.spec != result.spec or existing.tallies != result.tallies:
+            raise IncompatibleShardsError("Conflicting results for %s." % result.spec)
+
+    if experiment is None:
+        raise IncompatibleShardsError("No shards to merge.")
+
+    tallies: Counter = Counter()
+    # Only meaningful if every shard kept statistics
+    stats: Optional[GameStatsAggregator] = GameStatsAggregator()
+    for index in sorted(merged):
+        tallies.update(merged[index].tallies)
+        shard_stats = merged[index].stats
+        if stats is not None and shard_stats is not None:
+            stats.merge(shard_stats)
+        else:
+            stats = None
+
+    shard_count: int = experiment["shards"]
+    missing: List[int] = [i for i in range(shard_count) if i not in merged]
+    return {
+        "experiment": experiment,
+        "shards_merged": sorted(merged),
+        "shards_missing": missing,
+        "complete": not missing,
+        "tallies": dict(sorted(tallies.items())),
+        "summary": summarize(tallies),
+        "stats": stats.summary() if stats else None
+    }
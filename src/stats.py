@@ -0,0 +1,506 @@
+"""
+Streaming statistics over game outcomes. Everything here takes constant memory
+regardless of the number of games and can be merged with the statistics
+gathered by other workers.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from .moderator import GAME_END, GAME_START, LYNCH, NIGHT_KILL, TIE, TIE_BREAK
+from .pubsub import Subscriber
+from .type_checking import TYPE_CHECKING
+
+import math
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Two-sided 95% quantile of the standard normal distribution
+Z_95: float = 1.959963984540054
+
+
+class RunningMoments(object):
+    """
+    Mean and variance by Welford's algorithm. Merging uses the pairwise update
+    of Chan et al.
+    """
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self, count: int=0, mean: float=0.0, m2: float=0.0):
+        self.count: int = count
+        self.mean: float = mean
+        # Sum of squared deviations from the mean
+        self.m2: float = m2
+
+    def add(self, x: float) -> None:
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def merge(self, other: "RunningMoments") -> None:
+        count = self.count + other.count
+        if count == 0:
+            return
+
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+
+    @property
+    def variance(self) -> float:
+        """
+        Sample variance; NaN when there are fewer than two samples.
+        """
+        return self.m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"count": self.count, "mean": self.mean, "m2": self.m2}
+
+    @staticmethod
+    def from_dict(raw: Dict[str, Any]) -> "RunningMoments":
+        return RunningMoments(raw["count"], raw["mean"], raw["m2"])
+
+
+class PairedDifference(object):
+    """
+    The difference in an outcome between two configurations, each pair of
+    games (or of antithetic game pairs) played on common random numbers.
+    Pairing cancels most of the luck the two configurations share, so the
+    difference needs far fewer games than with independent games; `efficiency`
+    estimates how many times fewer.
+    """
+
+    __slots__ = ("differences", "a", "b", "games_per_unit")
+
+    def __init__(self, games_per_unit: int=1):
+        # One per unit: the difference of the mean outcome of its games
+        self.differences: RunningMoments = RunningMoments()
+        # One per game
+        self.a: RunningMoments = RunningMoments()
+        self.b: RunningMoments = RunningMoments()
+        self.games_per_unit: int = games_per_unit
+
+    def add(self, a: Sequence[float], b: Sequence[float]) -> None:
+        """
+        The outcomes of the games of a unit, in each configuration.
+        """
+        for x in a:
+            self.a.add(x)
+        for x in b:
+            self.b.add(x)
+        self.differences.add(sum(a) / len(a) - sum(b) / len(b))
+
+    def merge(self, other: "PairedDifference") -> None:
+        if other.games_per_unit != self.games_per_unit:
+            raise ValueError("Can't merge paired differences with different units.")
+
+        self.differences.merge(other.differences)
+        self.a.merge(other.a)
+        self.b.merge(other.b)
+
+    @property
+    def difference(self) -> float:
+        return self.differences.mean
+
+    def confidence_interval(self, z: float=Z_95) -> Tuple[float, float]:
+        """
+        NaN at both ends until there are two units to tell the spread from.
+        """
+        if self.differences.count < 2:
+            return (math.nan, math.nan)
+        half_width = z * math.sqrt(self.differences.variance / self.differences.count)
+        return (self.difference - half_width, self.difference + half_width)
+
+    @property
+    def efficiency(self) -> float:
+        """
+        How many times more games independent sampling needs for the same
+        precision: the variance of a difference of independent games over that
+        of the paired units, per game played.
+        """
+        paired_variance = self.differences.variance * self.games_per_unit
+        if paired_variance == 0:
+            return math.inf
+        return (self.a.variance + self.b.variance) / paired_variance
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "units": self.differences.count,
+            "games_per_unit": self.games_per_unit,
+            "a": self.a.mean,
+            "b": self.b.mean,
+            "difference": self.difference,
+            "confidence_interval_95": list(self.confidence_interval()),
+            "efficiency": self.efficiency
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "differences": self.differences.to_dict(),
+            "a": self.a.to_dict(),
+            "b": self.b.to_dict(),
+            "games_per_unit": self.games_per_unit
+        }
+
+    @staticmethod
+    def from_dict(raw: Dict[str, Any]) -> "PairedDifference":
+        paired = PairedDifference(raw["games_per_unit"])
+        paired.differences = RunningMoments.from_dict(raw["differences"])
+        paired.a = RunningMoments.from_dict(raw["a"])
+        paired.b = RunningMoments.from_dict(raw["b"])
+        return paired
+
+
+class ImportanceSampledRate(object):
+    """
+    How often an outcome happens, estimated from importance sampled games:
+    each game counts with the likelihood ratio of its draws, so the estimate is
+    unbiased for games that were not tilted. `efficiency` estimates how many
+    times more untilted games the same precision would take.
+    """
+
+    __slots__ = ("weighted", "hits")
+
+    def __init__(self) -> None:
+        # One per game: its likelihood ratio if the outcome happened, else 0
+        self.weighted: RunningMoments = RunningMoments()
+        # Tilted games in which the outcome happened
+        self.hits: int = 0
+
+    def add(self, hit: bool, likelihood_ratio: float) -> None:
+        self.weighted.add(likelihood_ratio if hit else 0.0)
+        self.hits += hit
+
+    def merge(self, other: "ImportanceSampledRate") -> None:
+        self.weighted.merge(other.weighted)
+        self.hits += other.hits
+
+    @property
+    def estimate(self) -> float:
+        return self.weighted.mean
+
+    @property
+    def standard_error(self) -> float:
+        return math.sqrt(self.weighted.variance / self.weighted.count)
+
+    def confidence_interval(self, z: float=Z_95) -> Tuple[float, float]:
+        half_width = z * self.standard_error
+        return (max(self.estimate - half_width, 0.0), self.estimate + half_width)
+
+    @property
+    def efficiency(self) -> float:
+        """
+        The variance of whether the outcome happens in an untilted game over
+        that of a tilted game's weighted count.
+        """
+        if not self.weighted.variance:
+            return math.nan
+        return self.estimate * (1 - self.estimate) / self.weighted.variance
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "games": self.weighted.count,
+            "hits": self.hits,
+            "estimate": self.estimate,
+            "confidence_interval_95": list(self.confidence_interval()),
+            "relative_error": self.standard_error / self.estimate if self.estimate else math.nan,
+            "efficiency": self.efficiency
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"weighted": self.weighted.to_dict(), "hits": self.hits}
+
+    @staticmethod
+    def from_dict(raw: Dict[str, Any]) -> "ImportanceSampledRate":
+        rate = ImportanceSampledRate()
+        rate.weighted = RunningMoments.from_dict(raw["weighted"])
+        rate.hits = raw["hits"]
+        return rate
+
+
+class Histogram(object):
+    """
+    Counts of integer values in `buckets` buckets of width `width`, starting at
+    0. The last bucket also counts everything beyond it.
+    """
+
+    __slots__ = ("width", "counts")
+
+    def __init__(self, buckets: int=32, width: int=1, counts: Optional[List[int]]=None):
+        self.width: int = width
+        self.counts: List[int] = counts if counts is not None else [0] * buckets
+
+    def add(self, x: int) -> None:
+        self.counts[min(max(x, 0) // self.width, len(self.counts) - 1)] += 1
+
+    def merge(self, other: "Histogram") -> None:
+        if other.width != self.width or len(other.counts) != len(self.counts):
+            raise ValueError("Can't merge histograms with different buckets.")
+
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"width": self.width, "counts": list(self.counts)}
+
+    @staticmethod
+    def from_dict(raw: Dict[str, Any]) -> "Histogram":
+        return Histogram(len(raw["counts"]), raw["width"], list(raw["counts"]))
+
+
+class GameStatsAggregator(Subscriber):
+    """
+    Subscribe this to the PubSubBroker given to Moderators to keep statistics
+    on the games they moderate: game length, survival rate per character,
+    lynch accuracy, how often lynch votes end in a tie and how those ties get
+    broken.
+    """
+
+    def __init__(self) -> None:
+        self.outcomes: Counter = Counter()
+        self.game_length: RunningMoments = RunningMoments()
+        self.game_length_histogram: Histogram = Histogram()
+        # Per character
+        self.players: Counter = Counter()
+        self.survivors: Counter = Counter()
+        self.lynched: Counter = Counter()
+        self.days: int = 0
+        self.ties: int = 0
+        self.days_with_ties: int = 0
+        # Per TieBreaker fallback, how many ties revotes could not break
+        self.tie_breaks: Counter = Counter()
+        # State of the game in progress
+        self.__roster: Counter = Counter()
+        self.__deaths: Counter = Counter()
+        self.__tied_today: bool = False
+
+    def recv_message(self, message_topic: str, message: str) -> None:
+        if message_topic == GAME_START:
+            self.__roster = Counter({
+                character: int(count) for character, count in
+                (entry.split("=") for entry in message.split(","))
+            })
+            self.__deaths = Counter()
+            self.__tied_today = False
+        elif message_topic == NIGHT_KILL:
+            self.__deaths[message] += 1
+            self.__tied_today = False
+        elif message_topic == TIE:
+            self.ties += 1
+            if not self.__tied_today:
+                self.days_with_ties += 1
+                self.__tied_today = True
+        elif message_topic == TIE_BREAK:
+            self.tie_breaks[message] += 1
+        elif message_topic == LYNCH:
+            self.__deaths[message] += 1
+            self.lynched[message] += 1
+        elif message_topic == GAME_END:
+            outcome, days = message.split(" ")
+            self.outcomes[outcome] += 1
+            self.days += int(days)
+            self.game_length.add(int(days))
+            self.game_length_histogram.add(int(days))
+            self.players.update(self.__roster)
+            self.survivors.update(self.__roster - self.__deaths)
+
+    def merge(self, other: "GameStatsAggregator") -> None:
+        self.outcomes.update(other.outcomes)
+        self.game_length.merge(other.game_length)
+        self.game_length_histogram.merge(other.game_length_histogram)
+        self.players.update(other.players)
+        self.survivors.update(other.survivors)
+        self.lynched.update(other.lynched)
+        self.days += other.days
+        self.ties += other.ties
+        self.days_with_ties += other.days_with_ties
+        self.tie_breaks.update(other.tie_breaks)
+
+    @property
+    def games(self) -> int:
+        return self.game_length.count
+
+    def survival_rates(self) -> Dict[str, float]:
+        return {
+            character: self.survivors[character] / count
+            for character, count in sorted(self.players.items())
+        }
+
+    def lynch_accuracy(self) -> float:
+        """
+        Fraction of lynchings that got a werewolf.
+        """
+        lynchings = sum(self.lynched.values())
+        return self.lynched["Werewolf"] / lynchings if lynchings else math.nan
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "games": self.games,
+            "outcomes": dict(sorted(self.outcomes.items())),
+            "game_length_mean": self.game_length.mean,
+            "game_length_variance": self.game_length.variance,
+            "game_length_histogram": list(self.game_length_histogram.counts),
+            "survival_rates": self.survival_rates(),
+            "lynch_accuracy": self.lynch_accuracy(),
+            "ties_per_day": self.ties / self.days if self.days else math.nan,
+            "tie_day_frequency": self.days_with_ties / self.days if self.days else math.nan,
+            "tie_breaks": dict(sorted(self.tie_breaks.items()))
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "outcomes": dict(self.outcomes),
+            "game_length": self.game_length.to_dict(),
+            "game_length_histogram": self.game_length_histogram.to_dict(),
+            "players": dict(self.players),
+            "survivors": dict(self.survivors),
+            "lynched": dict(self.lynched),
+            "days": self.days,
+            "ties": self.ties,
+            "days_with_ties": self.days_with_ties,
+            "tie_breaks": dict(self.tie_breaks)
+        }
+
+    @staticmethod
+    def from_dict(raw: Dict[str, Any]) -> "GameStatsAggregator":
+        aggregator = GameStatsAggregator()
+        aggregator.outcomes = Counter(raw["outcomes"])
+        aggregator.game_length = RunningMoments.from_dict(raw["game_length"])
+        aggregator.game_length_histogram = Histogram.from_dict(raw["game_length_histogram"])
+        aggregator.players = Counter(raw["players"])
+        aggregator.survivors = Counter(raw["survivors"])
+        aggregator.lynched = Counter(raw["lynched"])
+        aggregator.days = raw["days"]
+        aggregator.ties = raw["ties"]
+        aggregator.days_with_ties = raw["days_with_ties"]
+        aggregator.tie_breaks = Counter(raw.get("tie_breaks", {}))
+        return aggregator
+
+
+def chi_square_sf(x: float, dof: int) -> float:
+    """
+    P(X >= x) for X chi-square distributed with `dof` degrees of freedom: the
+    regularized upper incomplete gamma function Q(dof / 2, x / 2).
+    """
+    if x <= 0 or dof <= 0:
+        return 1.0
+    a: float = dof / 2
+    half_x: float = x / 2
+    # e^-x x^a / Gamma(a), in logs since both get huge
+    log_prefactor: float = a * math.log(half_x) - half_x - math.lgamma(a)
+
+    if half_x < a + 1:
+        # The series of P(a, x) converges quickly here.
+        term: float = 1 / a
+        total: float = term
+        n: int = 1
+        while abs(term) > abs(total) * 1e-15:
+            term *= half_x / (a + n)
+            total += term
+            n += 1
+        return max(0.0, 1 - total * math.exp(log_prefactor))
+
+    # Otherwise the continued fraction of Q(a, x), by Lentz's method.
+    tiny: float = 1e-300
+    b: float = half_x + 1 - a
+    c: float = 1 / tiny
+    d: float = 1 / b
+    fraction: float = d
+    for i in range(1, 1000):
+        an: float = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta: float = d * c
+        fraction *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return min(1.0, fraction * math.exp(log_prefactor))
+
+
+def _pool_sparse(a: Sequence[int], b: Sequence[int], smallest: float) -> List[Tuple[int, int]]:
+    """
+    Merge adjacent bins of the histograms `a` and `b` until every bin expects
+    at least `smallest` counts from both, dropping bins that are empty in both.
+    """
+    n, m = sum(a), sum(b)
+    share: float = min(n, m) / (n + m)
+    pooled: List[Tuple[int, int]] = []
+    pending: Tuple[int, int] = (0, 0)
+    for count_a, count_b in zip(a, b):
+        pending = (pending[0] + count_a, pending[1] + count_b)
+        if sum(pending) * share >= smallest:
+            pooled.append(pending)
+            pending = (0, 0)
+    if sum(pending):
+        if pooled:
+            last = pooled.pop()
+            pending = (last[0] + pending[0], last[1] + pending[1])
+        pooled.append(pending)
+    return pooled
+
+
+def chi_square_homogeneity(a: Sequence[int], b: Sequence[int], smallest: float=5.0) -> float:
+    """
+    P-value of the chi-square test that the counts `a` and `b`, bin for bin,
+    come from the same distribution. Bins are pooled with their neighbours
+    until each expects at least `smallest` counts, so `a` and `b` should be
+    ordered, as histograms are.
+    """
+    if len(a) != len(b):
+        raise ValueError("Can't compare counts over different bins.")
+    n, m = sum(a), sum(b)
+    if not n or not m:
+        return 1.0
+    pooled: List[Tuple[int, int]] = _pool_sparse(a, b, smallest)
+    statistic: float = 0.0
+    for count_a, count_b in pooled:
+        total: int = count_a + count_b
+        expected_a: float = total * n / (n + m)
+        expected_b: float = total * m / (n + m)
+        statistic += (count_a - expected_a) ** 2 / expected_a
+        statistic += (count_b - expected_b) ** 2 / expected_b
+    return chi_square_sf(statistic, len(pooled) - 1)
+
+
+def kolmogorov_sf(x: float) -> float:
+    """
+    P(K >= x) for K Kolmogorov distributed.
+    """
+    if x < 0.2:
+        return 1.0
+    total: float = 0.0
+    for k in range(1, 101):
+        term: float = 2 * (-1) ** (k - 1) * math.exp(-2 * k * k * x * x)
+        total += term
+        if abs(term) < 1e-16:
+            break
+    return min(1.0, max(0.0, total))
+
+
+def ks_two_sample(a: Sequence[int], b: Sequence[int]) -> float:
+    """
+    P-value of the two-sample Kolmogorov-Smirnov test that the histograms `a`
+    and `b` come from the same distribution, by the asymptotic distribution
+    with Stephens' correction. Conservative on discrete data like these.
+    """
+    if len(a) != len(b):
+        raise ValueError("Can't compare histograms with different buckets.")
+    n, m = sum(a), sum(b)
+    if not n or not m:
+        return 1.0
+    cumulative_a: int = 0
+    cumulative_b: int = 0
+    distance: float = 0.0
+    for count_a, count_b in zip(a, b):
+        cumulative_a += count_a
+        cumulative_b += count_b
+        distance = max(distance, abs(cumulative_a / n - cumulative_b / m))
+    effective: float = math.sqrt(n * m / (n + m))
+    return kolmogorov_sf((effective + 0.12 + 0.11 / effective) * distance)
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+import unittest
+
+from ..benchmarks import (
+    IMPORT_TIME_BUDGET_US, measure_import_time, PROJECT_ROOT, profile_import, STARTUP_MODULE
+)
+
+
+class StartupTest(unittest.TestCase):
+
+    def test_no_typing_at_runtime(self) -> None:
+        imported = profile_import(STARTUP_MODULE)
+        self.assertIn(STARTUP_MODULE, imported)
+        self.assertNotIn("typing", imported)
+
+    def test_import_has_no_side_effects(self) -> None:
+        completed = subprocess.run(
+            [
+                sys.executable, "-c",
+                "import logging, src.moderator; "
+                "print(sum(len(l.handlers) for l in logging.Logger.manager.loggerDict.values() "
+                "if isinstance(l, logging.Logger)))"
+            ],
+            capture_output=True, text=True, check=True, cwd=PROJECT_ROOT
+        )
+        self.assertEqual("0", completed.stdout.strip())
+
+    @unittest.skipUnless(
+        os.environ.get("WHEREWHOLF_BENCHMARKS"),
+        "Wall-clock benchmark; set WHEREWHOLF_BENCHMARKS=1 to run it."
+    )
+    def test_import_time_budget(self) -> None:
+        self.assertLessEqual(measure_import_time(STARTUP_MODULE, 3), IMPORT_TIME_BUDGET_US)
@@ -0,0 +1,92 @@
+import os
+import random
+import tempfile
+import unittest
+
+from collections import Counter
+from ..checkpoint import Checkpoint, IncompatibleCheckpointError
+from ..experiment import Experiment, INTEGER_ENGINE
+from ..moderator import EndGameState
+from ..stats import GameStatsAggregator
+from ..watchdog import GameWatchdog
+from typing import Any, Dict, Optional, Tuple
+
+
+class Crash(Exception):
+    pass
+
+
+class CrashingExperiment(Experiment):
+    """
+    Dies once it has played `crash_after` games.
+    """
+
+    def __init__(self, crash_after: int, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.crash_after: int = crash_after
+        self.played: int = 0
+
+    def play_game(self, *args: Any, **kwargs: Any) -> EndGameState:
+        if self.played == self.crash_after:
+            raise Crash()
+        self.played += 1
+        return super().play_game(*args, **kwargs)
+
+
+def everything(
+    experiment: Experiment, wins: Counter, stats: GameStatsAggregator
+) -> Tuple[Counter, Dict[str, Any], Dict[str, int], Any]:
+    return (
+        wins, stats.to_dict(), dict(experiment.tie_breaker.tally),
+        # All but how long stalled games took, which is down to the clock
+        [dict(stall.to_dict(), elapsed=None) for stall in experiment.stalls]
+    )
+
+
+class ResumeTest(unittest.TestCase):
+
+    # A tight budget so that some games are aborted, and stalls get restored.
+    SETTINGS: Dict[str, Any] = {"engine": INTEGER_ENGINE, "watchdog": GameWatchdog(12, None)}
+
+    def __resume_matches_uninterrupted_run(self, seed: Optional[int]) -> None:
+        random.seed(43)
+        stats = GameStatsAggregator()
+        uninterrupted = Experiment(**self.SETTINGS)
+        expected = everything(uninterrupted, uninterrupted.run(95, seed=seed, stats=stats), stats)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "checkpoint.json")
+            random.seed(43)
+            crashing = CrashingExperiment(57, **self.SETTINGS)
+            self.assertRaises(
+                Crash, crashing.run, 95, seed=seed, stats=GameStatsAggregator(),
+                checkpoint_path=path, checkpoint_every=10
+            )
+            self.assertEqual(50, Checkpoint.read(path).completed)
+
+            # Whatever the crashed process drew from `random` is lost with it.
+            random.seed(0)
+            stats = GameStatsAggregator()
+            resumed = CrashingExperiment(45, **self.SETTINGS)
+            wins = resumed.run(
+                95, seed=seed, stats=stats, checkpoint_path=path, checkpoint_every=10, resume=True
+            )
+            self.assertEqual(45, resumed.played)
+            self.assertEqual(expected, everything(resumed, wins, stats))
+            self.assertEqual(95, Checkpoint.read(path).completed)
+            self.assertEqual(["checkpoint.json"], os.listdir(directory))
+
+    def test_seeded(self) -> None:
+        self.__resume_matches_uninterrupted_run(1000)
+
+    def test_unseeded(self) -> None:
+        self.__resume_matches_uninterrupted_run(None)
+
+    def test_different_experiment(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "checkpoint.json")
+            Experiment(**self.SETTINGS).run(10, seed=0, checkpoint_path=path)
+            self.assertRaises(
+                IncompatibleCheckpointError, Experiment(**self.SETTINGS).run,
+                20, seed=0, checkpoint_path=path, resume=True
+            )
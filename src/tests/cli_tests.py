@@ -0,0 +1,238 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from argparse import ArgumentTypeError
+from contextlib import redirect_stderr, redirect_stdout
+from ..benchmarks import PROJECT_ROOT
+from ..cli import attribute_assignment, grid, grid_axis, main, positive_int, run_experiment
+from ..experiment import Experiment, INTEGER_ENGINE
+from typing import Any, Dict, List
+
+
+def run_main(argv: List[str]) -> str:
+    output = io.StringIO()
+    with redirect_stdout(output):
+        main(argv)
+    return output.getvalue()
+
+
+def rejects(argv: List[str]) -> bool:
+    errors = io.StringIO()
+    with redirect_stderr(errors):
+        try:
+            main(argv)
+        except SystemExit as exit:
+            return exit.code == 2
+    return False
+
+
+class ArgumentTypesTest(unittest.TestCase):
+
+    def test_validation(self) -> None:
+        self.assertEqual(3, positive_int("3"))
+        self.assertRaises(ArgumentTypeError, positive_int, "0")
+        self.assertRaises(ArgumentTypeError, positive_int, "three")
+        self.assertEqual(("aggression", 0.5), attribute_assignment("aggression=0.5"))
+        self.assertEqual(("nomination_recency", 2), attribute_assignment("nomination_recency=2"))
+        self.assertRaises(ArgumentTypeError, attribute_assignment, "aggression=1.5")
+        self.assertRaises(ArgumentTypeError, attribute_assignment, "charisma=0.5")
+        self.assertEqual(("werewolves", [1, 2]), grid_axis("werewolves=1, 2"))
+        self.assertRaises(ArgumentTypeError, grid_axis, "games=1,2")
+
+    def test_grid(self) -> None:
+        self.assertEqual(
+            [{"a": 1, "b": 3}, {"a": 1, "b": 4}, {"a": 2, "b": 3}, {"a": 2, "b": 4}],
+            list(grid([("a", [1, 2]), ("b", [3, 4])]))
+        )
+        self.assertEqual([{"a": 5}], list(grid([("a", [1, 2]), ("a", [5])])))
+
+    def test_bad_arguments_exit(self) -> None:
+        self.assertTrue(rejects(["run", "--werewolves", "two"]))
+        self.assertTrue(rejects(["run", "--games", "-1"]))
+        self.assertTrue(rejects(["run", "--engine", "quantum"]))
+        self.assertTrue(rejects(["run", "--tie-breaker", "coin"]))
+        self.assertTrue(rejects(["run", "--rare-outcome", "DRAW"]))
+        self.assertTrue(rejects(["sweep", "--vary", "aggression=0.2,2"]))
+        self.assertTrue(rejects(["fly"]))
+        self.assertTrue(rejects(["run", "--resume"]))
+        self.assertTrue(rejects(["run", "--checkpoint", os.devnull, "--jobs", "2"]))
+        self.assertTrue(rejects(["run", "--shards", "2", "--shard", "2"]))
+        self.assertTrue(rejects(["run", "--merge", ".", "--versus", "aggression=0.5"]))
+        for games in ("1", "3"):
+            self.assertTrue(rejects(
+                ["run", "-n", games, "--versus", "aggression=0.5", "--antithetic"]
+            ))
+        self.assertTrue(rejects(["run", "-n", "1", "--versus", "aggression=0.5"]))
+
+
+class CommandsTest(unittest.TestCase):
+
+    def test_run_matches_experiment(self) -> None:
+        report = json.loads(run_main(
+            ["run", "-w", "2", "-v", "6", "-n", "40", "-s", "3", "-e", "integer"]
+        ))
+        wins = Experiment(2, 6, engine=INTEGER_ENGINE).run(40, seed=3)
+        self.assertEqual(
+            {outcome.name: count for outcome, count in wins.items()}, report["tallies"]
+        )
+
+    def test_checkpoint_and_resume(self) -> None:
+        argv: List[str] = ["run", "-n", "40", "-s", "3", "-e", "integer", "--stats"]
+        expected = json.loads(run_main(argv))
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = os.path.join(directory, "run.ckpt")
+            status = os.path.join(directory, "status.json")
+            in_process: List[str] = argv + [
+                "--checkpoint", checkpoint, "--checkpoint-every", "15", "--status-file", status
+            ]
+            first = json.loads(run_main(in_process))
+            # Picks up from the checkpoint, with every game played already.
+            resumed = json.loads(run_main(in_process + ["--resume"]))
+            self.assertTrue(os.path.exists(status))
+        self.assertEqual(expected, first)
+        self.assertEqual(expected, resumed)
+
+    def test_paired_and_sharded_runs(self) -> None:
+        argv: List[str] = ["run", "-n", "30", "-s", "3", "-e", "integer"]
+        paired = json.loads(run_main(argv + ["--versus", "suggestibility=0.45"]))
+        self.assertEqual(
+            Experiment(engine=INTEGER_ENGINE).run_paired(
+                Experiment(engine=INTEGER_ENGINE, player_attributes={"suggestibility": 0.45}),
+                30, seed=3
+            ).summary(),
+            paired
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            shard_dir = os.path.join(directory, "shards")
+            for shard in ("0", "1", "2"):
+                run_main(argv + ["--shards", "3", "--shard", shard, "--shard-dir", shard_dir])
+            merged = json.loads(run_main(["run", "--merge", shard_dir]))
+        self.assertTrue(merged["complete"])
+        self.assertEqual(json.loads(run_main(argv))["tallies"], merged["tallies"])
+
+    def test_jobs_do_not_change_outcomes(self) -> None:
+        options: Dict[str, Any] = {
+            "werewolves": 2, "villagers": 6, "engine": INTEGER_ENGINE, "tie_breaker": "random",
+            "max_revotes": 10, "vote_polling": "auto", "max_steps": 10000, "max_seconds": None,
+            "attributes": {}
+        }
+        inline = run_experiment(options, 30, seed=0, jobs=1, stats=True)
+        pooled = run_experiment(options, 30, seed=0, jobs=3, stats=True)
+        self.assertEqual(inline["tallies"], pooled["tallies"])
+        for exact in ("outcomes", "game_length_histogram", "survival_rates", "lynch_accuracy"):
+            self.assertEqual(inline["stats"][exact], pooled["stats"][exact])
+        self.assertAlmostEqual(
+            inline["stats"]["game_length_variance"], pooled["stats"]["game_length_variance"]
+        )
+        self.assertTrue(pooled["complete"])
+
+    def test_config_file_and_overrides(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            config = os.path.join(directory, "experiment.json")
+            with open(config, "w") as config_file:
+                json.dump({
+                    "werewolves": 1, "villagers": 5, "engine": "integer", "games": 12, "seed": 0,
+                    "attributes": {"aggression": 0.6}, "vary": {"villagers": [4, 5]}
+                }, config_file)
+            output = os.path.join(directory, "sweep.jsonl")
+
+            self.assertEqual("", run_main(
+                ["sweep", "--config", config, "--vary", "aggression=0.1,0.9", "-o", output]
+            ))
+            with open(output) as lines:
+                cells = [json.loads(line) for line in lines]
+
+            run = json.loads(run_main(["run", "--config", config, "-n", "7"]))
+
+            with open(config, "w") as config_file:
+                json.dump({"villagers": "many"}, config_file)
+            self.assertTrue(rejects(["run", "--config", config]))
+            with open(config, "w") as config_file:
+                json.dump({"werewolfs": 2}, config_file)
+            self.assertTrue(rejects(["run", "--config", config]))
+
+        self.assertEqual(
+            [(4, 0.1), (4, 0.9), (5, 0.1), (5, 0.9)],
+            [(c["cell"]["villagers"], c["cell"]["aggression"]) for c in cells]
+        )
+        self.assertEqual({"aggression": 0.9}, cells[1]["experiment"]["player_attributes"])
+        self.assertEqual(12, cells[0]["summary"]["games"])
+        self.assertEqual((1, 5, 7), (
+            run["experiment"]["werewolves"], run["experiment"]["villagers"],
+            run["summary"]["games"]
+        ))
+
+    def test_play(self) -> None:
+        with redirect_stderr(io.StringIO()):
+            game = json.loads(run_main(["play", "-w", "1", "-v", "3", "--seed", "5"]))
+        self.assertIn(game["outcome"], ("WEREWOLVES_WON", "VILLAGERS_WON"))
+        self.assertEqual(5, game["seed"])
+        self.assertTrue(all(
+            death["player"].endswith(("#0", "#1", "#2")) for death in game["deaths"]
+            if death["player"] is not None
+        ))
+        self.assertEqual(
+            game["skipped_days"], sum(death["player"] is None for death in game["deaths"])
+        )
+
+    def test_profile(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run.pstats")
+            report = run_main([
+                "profile", "-n", "20", "-e", "integer", "-f", "0.25", "-j", "2", "-o", path,
+                "--limit", "3"
+            ])
+            self.assertTrue(os.path.getsize(path))
+            with open(os.path.join(directory, "run.collapsed")) as collapsed:
+                phases = {line.split(";")[0] for line in collapsed}
+        self.assertIn("night", phases)
+        self.assertIn("Profiled 5 of 20 games", report)
+        self.assertIn("function calls", report)
+
+    def test_starts_without_the_engine(self) -> None:
+        completed = subprocess.run(
+            [
+                sys.executable, "-c",
+                "import sys, src.cli; print(sorted({'src.experiment', 'src.moderator', 'typing'} "
+                "& set(sys.modules)))"
+            ],
+            capture_output=True, text=True, check=True, cwd=PROJECT_ROOT
+        )
+        self.assertEqual("[]", completed.stdout.strip())
+
+    def test_parses_without_the_engine(self) -> None:
+        completed = subprocess.run(
+            [
+                sys.executable, "-c",
+                "import sys; from src.cli import build_parser; "
+                "build_parser()[0].parse_args(['query', 'runs']); "
+                "print(sorted(name for name in sys.modules if name.startswith('src.') "
+                "or name in ('cProfile', 'pstats', 'typing')))"
+            ],
+            capture_output=True, text=True, check=True, cwd=PROJECT_ROOT
+        )
+        self.assertEqual(
+            "['src.cli', 'src.defaults', 'src.type_checking']", completed.stdout.strip()
+        )
+
+    def test_runs_from_anywhere(self) -> None:
+        arguments: List[str] = ["-n", "10", "-s", "0", "-e", "integer"]
+        reports: List[Dict[str, Any]] = []
+        with tempfile.TemporaryDirectory() as directory:
+            # laboratory.py is the run command under its old name.
+            for command in (
+                [sys.executable, "-m", "src", "run"],
+                [sys.executable, os.path.join(PROJECT_ROOT, "laboratory.py")]
+            ):
+                completed = subprocess.run(
+                    command + arguments, capture_output=True, text=True, check=True,
+                    cwd=directory, env=dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+                )
+                reports.append(json.loads(completed.stdout))
+        self.assertEqual(reports[0], reports[1])
+        self.assertEqual(10, reports[0]["summary"]["games"])
@@ -0,0 +1,201 @@
+import json
+import os
+import tempfile
+import unittest
+
+from collections import Counter
+from ..cli import main
+from ..columnar import (
+    attribute_bucket, Chunk, ColumnStore, ColumnStoreError, outcome_counts, win_rates
+)
+from ..experiment import Experiment, INTEGER_ENGINE
+from ..results import DeathCause, EndGameState, GameResult, UNKNOWN_PLAYER
+from ..shards import plan_shards
+from typing import Any, Dict, List
+
+
+class Crash(Exception):
+    pass
+
+
+class CrashingExperiment(Experiment):
+    """
+    Dies once it has played `crash_after` games.
+    """
+
+    def __init__(self, crash_after: int, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.crash_after: int = crash_after
+        self.played: int = 0
+
+    def play_game_for_result(self, *args: Any, **kwargs: Any) -> GameResult:
+        if self.played == self.crash_after:
+            raise Crash()
+        self.played += 1
+        return super().play_game_for_result(*args, **kwargs)
+
+
+def rows(store: ColumnStore, name: str) -> List[int]:
+    return [value for _, columns in store.scan((name,)) for value in columns[name]]
+
+
+class ChunkWriterTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ColumnStore(self.tmp.name)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_round_trip(self) -> None:
+        results = [
+            GameResult(
+                EndGameState.VILLAGERS_WON, 7, 6, 3,
+                [(0, DeathCause.NIGHT_KILL, False), (4, DeathCause.LYNCH, True)], 0, 2
+            ),
+            GameResult(EndGameState.ABORTED, None, 6, 60000, [], 0, 100000),
+            GameResult(
+                EndGameState.WEREWOLVES_WON, 2 ** 40, 6, 1,
+                [(UNKNOWN_PLAYER, DeathCause.NIGHT_KILL, False)], skipped_days=1
+            )
+        ]
+        with self.store.writer("a", chunk_rows=2) as writer:
+            for result in results:
+                writer.append(result, {"werewolves": 1})
+        # Nothing is left over once the writer is done with.
+        self.assertEqual(2, len(self.store.chunks()))
+        self.assertEqual(3, len(self.store))
+        self.assertEqual([7, -1, 2 ** 40], rows(self.store, "seed"))
+        self.assertEqual([2, 4, 1], rows(self.store, "outcome"))
+        self.assertEqual([3, 60000, 1], rows(self.store, "days"))
+        self.assertEqual([1, 0, 0], rows(self.store, "werewolf_deaths"))
+        self.assertEqual([0, 0, 1], rows(self.store, "skipped_days"))
+        self.assertEqual([1, 0, 1], rows(self.store, "villager_deaths"))
+        self.assertEqual([2, 100000, 0], rows(self.store, "tie_rounds"))
+        self.assertEqual([0, 0, 0], rows(self.store, "config"))
+
+    def test_configs_per_chunk(self) -> None:
+        result = GameResult(EndGameState.WEREWOLVES_WON, 0, 6, 1)
+        with self.store.writer("a", chunk_rows=3) as writer:
+            for config in ({"aggression": 0.1}, {"aggression": 0.5}, {"aggression": 0.1},
+                           {"aggression": 0.5}):
+                # Equal, not the same, dicts
+                writer.append(result, dict(config))
+        first, second = self.store.chunks()
+        self.assertEqual([{"aggression": 0.1}, {"aggression": 0.5}], first.configs)
+        self.assertEqual([{"aggression": 0.5}], second.configs)
+        self.assertEqual([0, 1, 0, 0], rows(self.store, "config"))
+
+    def test_incomplete_chunks_are_invisible(self) -> None:
+        writer = self.store.writer("a")
+        writer.append(GameResult(EndGameState.DRAW, 0, 2, 1), {})
+        self.assertEqual(0, len(self.store))
+        writer.flush()
+        self.assertEqual(1, len(self.store))
+
+    def test_rejects_other_formats(self) -> None:
+        path = os.path.join(self.tmp.name, "old.json")
+        with open(path, "w") as manifest:
+            json.dump({"format": "wherewholf-columns", "version": 1, "rows": 0}, manifest)
+        self.assertRaises(ColumnStoreError, Chunk.read, path)
+        self.assertRaises(ColumnStoreError, self.store.chunks)
+
+
+class ExperimentColumnsTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ColumnStore(self.tmp.name)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_rows_match_games(self) -> None:
+        experiment = Experiment(2, 6, engine=INTEGER_ENGINE)
+        wins: Counter = experiment.run(
+            50, seed=10, results=self.store.writer("run", chunk_rows=16)
+        )
+        self.assertEqual(list(range(10, 60)), rows(self.store, "seed"))
+        self.assertEqual(
+            Counter({outcome.name: count for outcome, count in wins.items()}),
+            outcome_counts(self.store, lambda config: "all")["all"]
+        )
+        replayed = [experiment.play_game_for_result(seed) for seed in range(10, 60)]
+        self.assertEqual([result.days for result in replayed], rows(self.store, "days"))
+        self.assertEqual(
+            [result.tie_rounds for result in replayed], rows(self.store, "tie_rounds")
+        )
+        self.assertEqual(
+            [result.skipped_days for result in replayed], rows(self.store, "skipped_days")
+        )
+        self.assertEqual([experiment.config], self.store.chunks()[0].configs)
+
+    def test_resume_rewrites_the_same_chunks(self) -> None:
+        uninterrupted = ColumnStore(os.path.join(self.tmp.name, "uninterrupted"))
+        Experiment(2, 4, engine=INTEGER_ENGINE).run(
+            95, seed=0, results=uninterrupted.writer("run", chunk_rows=7)
+        )
+
+        resumed = ColumnStore(os.path.join(self.tmp.name, "resumed"))
+        checkpoint = os.path.join(self.tmp.name, "checkpoint.json")
+        settings: Dict[str, Any] = dict(
+            seed=0, checkpoint_path=checkpoint, checkpoint_every=10, resume=True
+        )
+        self.assertRaises(
+            Crash, CrashingExperiment(57, engine=INTEGER_ENGINE).run, 95,
+            results=resumed.writer("run", chunk_rows=7), **settings
+        )
+        CrashingExperiment(45, engine=INTEGER_ENGINE).run(
+            95, results=resumed.writer("run", chunk_rows=7), **settings
+        )
+        self.assertEqual(95, len(resumed))
+        self.assertEqual(rows(uninterrupted, "seed"), rows(resumed, "seed"))
+        self.assertEqual(rows(uninterrupted, "outcome"), rows(resumed, "outcome"))
+
+    def test_shards_write_their_own_chunks(self) -> None:
+        experiment = Experiment(2, 4, engine=INTEGER_ENGINE)
+        for shard in plan_shards(experiment.config, 30, 3, seed=5):
+            experiment.play_shard(shard, stats=False, columns=self.tmp.name)
+        self.assertEqual(3, len(self.store.chunks()))
+        self.assertEqual(list(range(5, 35)), sorted(rows(self.store, "seed")))
+
+
+class QueryTest(unittest.TestCase):
+
+    def test_attribute_bucket(self) -> None:
+        key = attribute_bucket("aggression", 0.1)
+        self.assertEqual(0.3, key({"player_attributes": {"aggression": 0.3}}))
+        self.assertEqual(0.3, key({"player_attributes": {"aggression": 0.39}}))
+        self.assertIsNone(key({"player_attributes": {}}))
+
+    def test_win_rate_by_bucket(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            for aggression in (0.1, 0.15, 0.9):
+                experiment = Experiment(
+                    2, 4, engine=INTEGER_ENGINE, player_attributes={"aggression": aggression}
+                )
+                experiment.run(
+                    20, seed=0, results=ColumnStore(directory).writer(str(aggression))
+                )
+            groups = outcome_counts(ColumnStore(directory), attribute_bucket("aggression", 0.5))
+            self.assertEqual({0.0: 40, 0.5: 20}, {
+                group: sum(counts.values()) for group, counts in groups.items()
+            })
+            rates = win_rates(groups)
+            self.assertEqual(groups[0.5]["VILLAGERS_WON"] / 20, rates[0.5])
+
+    def test_command_line(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            store = os.path.join(directory, "store")
+            report = os.path.join(directory, "report.jsonl")
+            for argv in (
+                ["sweep", "-n", "10", "-s", "0", "-e", "integer", "-j", "2",
+                 "--vary", "villagers=4,6", "--columns", store, "-o", os.devnull],
+                ["query", store, "--by", "villagers", "-o", report]
+            ):
+                self.assertEqual(0, main(argv))
+            with open(report) as lines:
+                groups = [json.loads(line) for line in lines]
+        self.assertEqual([4, 6], [group["group"] for group in groups])
+        self.assertEqual([10, 10], [group["games"] for group in groups])
@@ -1,15 +1,22 @@
+from __future__ import annotations
+
 import random
 import unittest
 
 from typing import List, Tuple
 
 from ..game_characters import (
-    GameCharacter, Hive, Nomination, NominationMap, Player, SanitizedPlayer, Villager, VoteTable,
-    Werewolf, WerewolfHive, WholeGameHive
+    GameCharacter, Hive, Nomination, Player, SanitizedPlayer, Villager, Werewolf, WerewolfHive,
+    WholeGameHive
 )
 from ..errors import InvalidGameStateError
+from ..type_checking import TYPE_CHECKING
 from typing import Dict, Optional, Sequence, Set, Tuple
 
+if TYPE_CHECKING:
+    # Type aliases, only defined for type checkers
+    from ..game_characters import NominationMap, VoteTable
+
 
 class DummyHive(Hive):
     """
@@ -43,6 +50,48 @@ class InspectablePlayer(Player):
         return super().daytime_behavior(players)
 
 
+class BlocVillager(Villager):
+    """
+    Votes as a bloc: everyone lynches the first nominee that is not them.
+    """
+
+    def __init__(self) -> None:
+        self.batch_calls = 0
+
+    def batch_daytime_behavior(
+        self,
+        voters: Sequence[Player],
+        nominations: Sequence[Nomination]
+    ) -> Optional[VoteTable]:
+        self.batch_calls += 1
+        votes: VoteTable = {}
+        for voter in voters:
+            sanitized_voter = SanitizedPlayer.sanitize(voter)
+            votes[sanitized_voter] = next(
+                (nom.nomination for nom in nominations if nom.nomination is not sanitized_voter),
+                None
+            )
+        return votes
+
+
+class PackWerewolf(Werewolf):
+    """
+    Always goes along with the pack.
+    """
+
+    def __init__(self) -> None:
+        self.batch_calls = 0
+
+    def batch_accept_night_suggestion(
+        self,
+        members: Sequence[Player],
+        voted_for: SanitizedPlayer,
+        suggested_by: SanitizedPlayer
+    ) -> Optional[Sequence[bool]]:
+        self.batch_calls += 1
+        return [True] * len(members)
+
+
 def make_singleton_hive(hive: Hive) -> Hive:
     hive.players = set([Player("simba", Villager())])
     return hive
@@ -249,3 +298,61 @@ def _pick_nominator(nomination: SanitizedPlayer, players: Sequence[Player]):
         nominator = random.choice(players)
 
     return nominator
+
+
+class BatchDecisionTest(unittest.TestCase):
+
+    def test_batch_day_votes(self) -> None:
+        bloc = BlocVillager()
+        bloc_members = [InspectablePlayer(name, bloc) for name in ("Chad", "JE", "Gab")]
+        loner = InspectablePlayer("Charles", Villager())
+        christine = Player("Christine", Werewolf(), aggression=1)
+        whole_game_hive: WholeGameHive = WholeGameHive()
+        whole_game_hive.add_players(set(bloc_members + [loner, christine]))
+
+        sanitized = [SanitizedPlayer.sanitize(p) for p in whole_game_hive.players]
+        _, vote_table = whole_game_hive.day_consensus(sanitized)
+
+        self.assertGreater(bloc.batch_calls, 0)
+        self.assertTrue(loner.was_asked_for_daytime)
+        for member in bloc_members:
+            self.assertFalse(member.was_asked_for_daytime)
+            self.assertIn(SanitizedPlayer.sanitize(member), vote_table)
+
+    def test_batch_night_acceptance(self) -> None:
+        pack = PackWerewolf()
+        werewolf_hive: WerewolfHive = WerewolfHive()
+        werewolf_hive.add_players(set(
+            Player(name, pack, suggestibility=0) for name in ("Christine", "Shara", "Josh")
+        ))
+        victim = SanitizedPlayer.sanitize(Player("Chad", Villager()))
+
+        self.assertIs(victim, werewolf_hive.night_consensus([victim]))
+        self.assertEqual(1, pack.batch_calls)
+
+
+class EarlyExitTest(unittest.TestCase):
+
+    def __vote(self, everyone_votes: bool) -> Tuple[InspectablePlayer, Player]:
+        bloc = BlocVillager()
+        bloc_members = [InspectablePlayer(name, bloc, aggression=0) for name in ("A", "B", "C", "D", "E")]
+        loner = InspectablePlayer("Charles", Villager(), aggression=0)
+        christine = Player("Christine", Werewolf(), aggression=1)
+        whole_game_hive: WholeGameHive = WholeGameHive(everyone_votes=everyone_votes)
+        whole_game_hive.add_players(set(bloc_members + [loner, christine]))
+
+        sanitized = [SanitizedPlayer.sanitize(p) for p in whole_game_hive.players]
+        whole_game_hive.day_consensus(sanitized)
+        assert whole_game_hive.tally is not None
+        self.assertEqual(1, len(whole_game_hive.tally.leaders()))
+        return loner, christine
+
+    def test_stop_once_decided(self) -> None:
+        # The bloc votes first and has the majority.
+        loner, christine = self.__vote(False)
+        self.assertFalse(loner.was_asked_for_daytime)
+        self.assertIsNone(christine.nominated_this_turn)
+
+    def test_everyone_votes(self) -> None:
+        loner, _ = self.__vote(True)
+        self.assertTrue(loner.was_asked_for_daytime)
@@ -0,0 +1,53 @@
+import unittest
+
+from ..experiment import ENGINES, INTEGER_ENGINE, OBJECT_ENGINE
+from ..golden import CHECK_GAMES, CHECK_SEED, GOLDEN_CELLS, deviations, measure, read_reference
+from typing import Any, Dict
+
+
+class GoldenDistributionTest(unittest.TestCase):
+    """
+    Both engines must keep playing games like those in the reference. If a
+    change to the games is intended, regenerate it with
+    `python -m src.golden write`.
+    """
+
+    references: Dict[str, Dict[str, Any]]
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.references = read_reference()
+
+    def test_cells_match_reference(self) -> None:
+        self.assertEqual(
+            sorted(cell.name for cell in GOLDEN_CELLS), sorted(self.references.keys())
+        )
+        for cell in GOLDEN_CELLS:
+            self.assertEqual(
+                cell.experiment(ENGINES[0]).config, self.references[cell.name]["config"],
+                "%s is set up differently from its reference" % cell.name
+            )
+            # The integer engine is held to the games of the object engine.
+            self.assertEqual(OBJECT_ENGINE, self.references[cell.name]["engine"])
+
+    def test_engines_match_reference(self) -> None:
+        for cell in GOLDEN_CELLS:
+            measured: Dict[str, Dict[str, Any]] = {
+                engine: measure(cell, engine, CHECK_GAMES, CHECK_SEED) for engine in ENGINES
+            }
+            for engine in ENGINES:
+                with self.subTest(engine=engine, cell=cell.name):
+                    self.assertEqual(
+                        [], deviations(self.references[cell.name], measured[engine])
+                    )
+            # Not just alike: the same games, tally for tally
+            with self.subTest(cell=cell.name):
+                self.assertEqual(
+                    dict(measured[OBJECT_ENGINE], engine=None),
+                    dict(measured[INTEGER_ENGINE], engine=None)
+                )
+
+    def test_catches_different_games(self) -> None:
+        cells = {cell.name: cell for cell in GOLDEN_CELLS}
+        measured = measure(cells["2v6"], ENGINES[-1], CHECK_GAMES, CHECK_SEED)
+        self.assertNotEqual([], deviations(self.references["3v9"], measured))
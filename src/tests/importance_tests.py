@@ -0,0 +1,38 @@
+import unittest
+
+from ..experiment import Experiment, INTEGER_ENGINE
+from ..importance import Tilt
+from ..results import EndGameState
+
+
+class TiltTest(unittest.TestCase):
+
+    def test_weights(self) -> None:
+        toward_villagers = Tilt(EndGameState.VILLAGERS_WON, 3.0)
+        self.assertEqual([3.0, 1.0], toward_villagers.weights([True, False]))
+        toward_werewolves = Tilt(EndGameState.WEREWOLVES_WON, 3.0)
+        self.assertEqual([1.0, 3.0], toward_werewolves.weights([True, False]))
+
+    def test_invalid_tilts(self) -> None:
+        self.assertRaises(ValueError, Tilt, EndGameState.ABORTED)
+        self.assertRaises(ValueError, Tilt, EndGameState.VILLAGERS_WON, 0.0)
+
+
+class RunTiltedTest(unittest.TestCase):
+
+    def test_estimate_matches_untilted_games(self) -> None:
+        experiment = Experiment(engine=INTEGER_ENGINE)
+        untilted = experiment.run(2000, seed=0)[EndGameState.VILLAGERS_WON] / 2000
+
+        rate = experiment.run_tilted(Tilt(EndGameState.VILLAGERS_WON), 2000, seed=0)
+        low, high = rate.confidence_interval()
+        self.assertGreater(rate.hits, untilted * 2000)
+        self.assertLess(low - 0.02, untilted)
+        self.assertLess(untilted, high + 0.02)
+
+    def test_rare_outcome(self) -> None:
+        experiment = Experiment(5, 8, engine=INTEGER_ENGINE)
+        rate = experiment.run_tilted(Tilt(EndGameState.VILLAGERS_WON), 1000, seed=0)
+        self.assertGreater(rate.hits, 30)
+        self.assertLess(rate.estimate, 0.02)
+        self.assertGreater(rate.efficiency, 2)
@@ -0,0 +1,171 @@
+import random
+import unittest
+
+from ..game_characters import Player, SanitizedPlayer, Villager, Werewolf
+from ..importance import Tilt
+from ..integer_engine import IntegerGame, Roster
+from ..moderator import EndGameState, Moderator
+from ..results import GameResult
+from ..rng import TiltedRandom
+from ..pubsub import PubSubBroker, Subscriber
+from ..ties import NoLynchTieBreaker, RandomTieBreaker, RunoffTieBreaker, TieBreaker
+from ..watchdog import GameWatchdog
+from .game_characters_tests import BlocVillager
+from typing import List, Optional, Set, Tuple, Type
+
+
+class EventRecorder(Subscriber):
+
+    def __init__(self) -> None:
+        self.events: List[Tuple[str, str]] = []
+
+    def recv_message(self, message_topic: str, message: str) -> None:
+        self.events.append((message_topic, message))
+
+
+def make_players(
+    rng: random.Random, werewolves: int, villagers: int, suggestibility: float=1.0
+) -> Set[Player]:
+    """
+    Players with all sorts of attributes, so that ties in aggression, pushy
+    nominators and the like all come up. Their suggestibility is at most
+    `suggestibility`.
+    """
+    werewolf = Werewolf()
+    villager = Villager()
+    players: Set[Player] = set()
+    for i in range(werewolves + villagers):
+        players.add(Player(
+            "Player #%s" % i,
+            werewolf if i < werewolves else villager,
+            aggression=rng.choice((0.1, 0.3, 0.5, 0.9)),
+            suggestibility=suggestibility * rng.random(),
+            persuasiveness=rng.random(),
+            nomination_recency=rng.randint(1, 4)
+        ))
+    return players
+
+
+class DifferentialTest(unittest.TestCase):
+    """
+    Both engines draw from generators seeded the same, so they must take the
+    same decisions and leave their generators in the same state.
+    """
+
+    TIE_BREAKERS: Tuple[Type[TieBreaker], ...] = (
+        RandomTieBreaker, NoLynchTieBreaker, RunoffTieBreaker
+    )
+
+    def __play_both(
+        self,
+        seed: int,
+        players: Set[Player],
+        tie_breaker: Type[TieBreaker],
+        max_revotes: int,
+        everyone_votes: Optional[bool]=None,
+        tilt: Optional[Tilt]=None
+    ) -> GameResult:
+        roster = Roster.from_players(players)
+
+        moderator_events = EventRecorder()
+        broker = PubSubBroker()
+        broker.subscribers.append(moderator_events)
+        moderator = Moderator(
+            set(players), "differential", seed, broker, tie_breaker(max_revotes),
+            everyone_votes=everyone_votes, tilt=tilt
+        )
+        moderator_result = moderator.play_for_result()
+        for player in players:
+            SanitizedPlayer.forget(player)
+
+        engine_events = EventRecorder()
+        broker = PubSubBroker()
+        broker.subscribers.append(engine_events)
+        game = IntegerGame(
+            roster, seed, broker, tie_breaker(max_revotes), everyone_votes=everyone_votes,
+            tilt=tilt
+        )
+        engine_result = game.play_for_result()
+
+        self.assertEqual(moderator_result, engine_result, "seed %s" % seed)
+        self.assertEqual(moderator_events.events, engine_events.events, "seed %s" % seed)
+        assert moderator.rng is not None
+        self.assertEqual(moderator.rng.getstate(), game.rng.getstate(), "seed %s" % seed)
+        if tilt is not None:
+            assert isinstance(moderator.rng, TiltedRandom) and isinstance(game.rng, TiltedRandom)
+            self.assertEqual(
+                moderator.rng.log_likelihood_ratio, game.rng.log_likelihood_ratio, "seed %s" % seed
+            )
+        return engine_result
+
+    def test_same_decisions(self) -> None:
+        rng = random.Random(36)
+        for seed in range(150):
+            werewolves = rng.randint(1, 3)
+            self.__play_both(
+                seed,
+                make_players(rng, werewolves, rng.randint(werewolves, 9)),
+                self.TIE_BREAKERS[seed % len(self.TIE_BREAKERS)],
+                rng.randint(0, 3)
+            )
+
+    def test_same_decisions_polling_until_decided(self) -> None:
+        rng = random.Random(37)
+        for seed in range(60):
+            werewolves = rng.randint(1, 5)
+            self.__play_both(
+                seed,
+                make_players(rng, werewolves, rng.randint(werewolves, 20)),
+                self.TIE_BREAKERS[seed % len(self.TIE_BREAKERS)],
+                rng.randint(0, 3),
+                everyone_votes=False
+            )
+
+    def test_same_decisions_after_quorum_retries(self) -> None:
+        # Players too unsuggestible to reach quorum in one go, so that votes
+        # cast in a round short of quorum are around when the next is decided
+        # early.
+        retried: int = 0
+        for seed in range(40):
+            result = self.__play_both(
+                seed, make_players(random.Random(seed), 2, 14, suggestibility=0.3),
+                RandomTieBreaker, 2, everyone_votes=False
+            )
+            retried += result.consensus_retries > 0
+        self.assertGreater(retried, 0)
+
+    def test_same_decisions_tilted(self) -> None:
+        rng = random.Random(41)
+        for seed in range(40):
+            werewolves = rng.randint(1, 3)
+            self.__play_both(
+                seed,
+                make_players(rng, werewolves, rng.randint(werewolves, 9)),
+                self.TIE_BREAKERS[seed % len(self.TIE_BREAKERS)],
+                rng.randint(0, 3),
+                tilt=Tilt(rng.choice(Tilt.TARGETS), rng.choice((0.5, 2.0, 3.0)))
+            )
+
+    def test_same_stalls(self) -> None:
+        players = make_players(random.Random(36), 2, 6)
+        roster = Roster.from_players(players)
+        moderator = Moderator(set(players), "differential", 7, watchdog=GameWatchdog(5, None))
+        moderator.play()
+        for player in players:
+            SanitizedPlayer.forget(player)
+        game = IntegerGame(roster, 7, watchdog=GameWatchdog(5, None))
+        game.play()
+
+        assert moderator.stall is not None and game.stall is not None
+        self.assertEqual(moderator.stall.to_dict(), dict(game.stall.to_dict(), elapsed=moderator.stall.elapsed))
+
+
+class RosterTest(unittest.TestCase):
+
+    def test_players_in_name_order(self) -> None:
+        villager = Villager()
+        roster = Roster.from_players([Player(name, villager) for name in ("c", "a", "b")])
+        self.assertEqual(["a", "b", "c"], roster.names)
+
+    def test_unsupported_characters(self) -> None:
+        self.assertRaises(ValueError, Roster.from_players, [Player("bloc", BlocVillager())])
@@ -0,0 +1,92 @@
+import json
+import os
+import tempfile
+import unittest
+
+from ..game_characters import Player, SanitizedPlayer, Villager, Werewolf
+from ..memprofile import MemoryProfiler, subsystem_of
+from ..moderator import Moderator
+
+from typing import Dict, List, Set
+
+
+def make_players() -> Set[Player]:
+    players: Set[Player] = set()
+    players.add(Player("Christine", Werewolf()))
+    for name in ("Chad", "JE", "Gab", "Charles"):
+        players.add(Player(name, Villager()))
+    return players
+
+
+
+class MemoryProfilerTest(unittest.TestCase):
+
+    def test_subsystem_of(self) -> None:
+        self.assertEqual("moderator", subsystem_of(Moderator.__init__.__code__.co_filename))
+        self.assertEqual("logging", subsystem_of(json.__file__.replace("json", "logging")))
+        self.assertEqual("other", subsystem_of(json.__file__))
+
+    def test_profile_games(self) -> None:
+        profiler = MemoryProfiler(every=2, top=5)
+        profiler.start()
+        for game in range(1, 7):
+            players: Set[Player] = set()
+            players.add(Player("Christine", Werewolf()))
+            players.add(Player("Chad", Villager()))
+            players.add(Player("JE", Villager()))
+            Moderator(players, "memprofile%s" % game).play()
+            profiler.after_game(game)
+        profiler.stop()
+
+        self.assertEqual([0, 2, 4, 6], [sample.game for sample in profiler.samples])
+        self.assertGreater(
+            profiler.samples[-1].gauges["loggers"], profiler.samples[0].gauges["loggers"]
+        )
+        self.assertLessEqual(len(profiler.top_sites), 5)
+        self.assertIn("Memory growth over 6 games", profiler.summary())
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "report.json")
+            profiler.write_report(path)
+            with open(path) as report_file:
+                report = json.load(report_file)
+        self.assertEqual(2, report["every"])
+        self.assertEqual(4, len(report["samples"]))
+        self.assertEqual(profiler.growth(), report["growth"])
+
+    def test_game_state_stays_bounded(self) -> None:
+        gauges = ("hives", "hive_dead_players", "world_models", "world_model_entries")
+        kept: List[Moderator] = []
+
+        def play_game(seed: int) -> Moderator:
+            players = make_players()
+            moderator = Moderator(set(players), seed=seed)
+            moderator.play()
+            for player in players:
+                SanitizedPlayer.forget(player)
+            return moderator
+
+        def play(keep: bool) -> List[Dict[str, int]]:
+            profiler = MemoryProfiler(every=5)
+            profiler.start()
+            for game in range(1, 21):
+                moderator = play_game(game)
+                if keep:
+                    kept.append(moderator)
+                del moderator
+                profiler.after_game(game)
+            profiler.stop()
+            return [
+                {gauge: sample.gauges[gauge] for gauge in gauges}
+                for sample in profiler.samples[1:]
+            ]
+
+        # Nothing of a game outlives it...
+        samples = play(False)
+        for sample in samples[1:]:
+            for gauge in gauges:
+                self.assertLessEqual(sample[gauge], samples[0][gauge], gauge)
+        # ...or else the gauges show it.
+        samples = play(True)
+        for gauge in gauges:
+            self.assertGreater(samples[-1][gauge], samples[0][gauge], gauge)
@@ -1,21 +1,96 @@
 import unittest
 
-from ..game_characters import GameCharacter, Player, Werewolf, Villager
-from ..moderator import Moderator, EndGameState
+from ..errors import InvalidGameStateError
+from ..game_characters import (
+    GameCharacter, Hive, Player, SanitizedPlayer, Villager, VillagerHive,
+    Werewolf, WerewolfHive
+)
+from ..moderator import EndGameState, Moderator, NightPlan, night_kill_decides
 
-from typing import Set
+from typing import Dict, Optional, Sequence, Set, Type
+
+
+def make_players() -> Set[Player]:
+    players: Set[Player] = set()
+    players.add(Player("Christine", Werewolf()))
+    players.add(Player("Shara", Werewolf()))
+    players.add(Player("Chad", Villager()))
+    players.add(Player("JE", Villager()))
+    players.add(Player("Gab", Villager()))
+    players.add(Player("Charles", Villager()))
+    return players
+
+
+class Chicken(GameCharacter):
+
+    @property
+    def prerequisites(self) -> Set[Type[GameCharacter]]:
+        return set((Egg,))
+
+    def night_action(self, players: Sequence[SanitizedPlayer]) -> Optional[SanitizedPlayer]:
+        return None
+
+    def daytime_behavior(self, players: Sequence[SanitizedPlayer]) -> Optional[SanitizedPlayer]:
+        return None
+
+    def __str__(self) -> str:
+        return "Chicken"
+
+
+class Egg(Chicken):
+
+    @property
+    def prerequisites(self) -> Set[Type[GameCharacter]]:
+        return set((Chicken,))
+
+    def __str__(self) -> str:
+        return "Egg"
 
 
 class ModeratorTest(unittest.TestCase):
 
     def test_endgame(self) -> None:
         for _ in range(100):
-            players: Set[Player] = set()
-            players.add(Player("Christine", Werewolf()))
-            players.add(Player("Shara", Werewolf()))
-            players.add(Player("Chad", Villager()))
-            players.add(Player("JE", Villager()))
-            players.add(Player("Gab", Villager()))
-            players.add(Player("Charles", Villager()))
-            mod: Moderator = Moderator(players)
+            mod: Moderator = Moderator(make_players())
             self.assertNotEqual(EndGameState.UNKNOWN_CONDITION, mod.play())
+
+
+    def test_seeded_games_replay(self) -> None:
+        first_run = [Moderator(make_players(), seed=seed).play() for seed in range(20)]
+        second_run = [Moderator(make_players(), seed=seed).play() for seed in range(20)]
+        self.assertEqual(first_run, second_run)
+
+    def test_night_kill_decides(self) -> None:
+        self.assertTrue(night_kill_decides(3, 2))
+        self.assertTrue(night_kill_decides(2, 2))
+        self.assertTrue(night_kill_decides(1, 1))
+        # The village could still lynch its way out.
+        self.assertFalse(night_kill_decides(4, 2))
+        self.assertFalse(night_kill_decides(3, 0))
+
+
+class NightPlanTest(unittest.TestCase):
+
+    def test_prerequisites_wake_up_first(self) -> None:
+        plan: NightPlan = Moderator(make_players()).night_plan
+        self.assertEqual([Werewolf, Villager], [step.character for step in plan])
+
+        werewolf_step, villager_step = plan.steps
+        self.assertTrue(werewolf_step.acts)
+        self.assertTrue(werewolf_step.members_know_each_other)
+        self.assertFalse(villager_step.acts)
+        self.assertFalse(villager_step.members_know_each_other)
+
+    def test_plan_is_shared_across_games(self) -> None:
+        self.assertIs(
+            Moderator(make_players()).night_plan,
+            Moderator(make_players()).night_plan
+        )
+
+    def test_cyclic_prerequisites(self) -> None:
+        hives_map: Dict[Type[GameCharacter], Hive] = {
+            Chicken: VillagerHive(), Egg: WerewolfHive()
+        }
+        hives_map[Chicken].add_player(Player("Colonel", Chicken()))
+        hives_map[Egg].add_player(Player("Benedict", Egg()))
+        self.assertRaises(InvalidGameStateError, NightPlan.compile, hives_map)
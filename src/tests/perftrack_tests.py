@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+
+from ..perf_workload import BENCHMARKS
+from ..perftrack import (
+    _git, _u_counts, append_history, find_regressions, load_history, mann_whitney_greater,
+    measure_revision, resolve
+)
+
+
+class MannWhitneyTest(unittest.TestCase):
+
+    def test_u_distribution(self) -> None:
+        self.assertEqual([1, 1, 2, 1, 1], _u_counts(2, 2))
+        self.assertEqual(252, sum(_u_counts(5, 5)))
+
+    def test_separated_samples(self) -> None:
+        self.assertAlmostEqual(1 / 252, mann_whitney_greater([6, 7, 8, 9, 10], [1, 2, 3, 4, 5]))
+        self.assertEqual(1.0, mann_whitney_greater([1, 2, 3, 4, 5], [6, 7, 8, 9, 10]))
+
+    def test_normal_approximation(self) -> None:
+        self.assertLess(mann_whitney_greater(range(30, 60), range(30)), 1e-9)
+        self.assertAlmostEqual(0.5, mann_whitney_greater(range(30), range(30)), delta=0.05)
+
+
+class FindRegressionsTest(unittest.TestCase):
+
+    def test_significant_slowdown(self) -> None:
+        old = {"play": [1.0, 1.01, 0.99, 1.02, 0.98], "tie": [1.0, 1.01, 0.99, 1.02, 0.98]}
+        new = {"play": [1.5, 1.51, 1.49, 1.52, 1.48], "tie": [0.5, 0.51, 0.49, 0.52, 0.48]}
+        self.assertEqual(["play"], [r.benchmark for r in find_regressions(old, new)])
+
+    def test_noise_and_small_slowdowns(self) -> None:
+        old = {"noisy": [1.0, 2.0, 1.0, 2.0, 1.0], "small": [1.0, 1.01, 0.99, 1.02, 0.98]}
+        new = {"noisy": [2.0, 1.0, 2.0, 1.0, 2.0], "small": [1.02, 1.03, 1.01, 1.04, 1.0]}
+        self.assertEqual([], find_regressions(old, new))
+
+
+class HistoryTest(unittest.TestCase):
+
+    def test_round_trip(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "history.jsonl")
+            self.assertEqual([], load_history(path))
+            append_history({"commit": "a", "machine": "here"}, path)
+            append_history({"commit": "b", "machine": "there"}, path)
+            self.assertEqual(["a", "b"], [entry["commit"] for entry in load_history(path)])
+            self.assertEqual(["a"], [entry["commit"] for entry in load_history(path, "here")])
+
+
+class MeasureRevisionTest(unittest.TestCase):
+
+    def test_measures_in_worktree(self) -> None:
+        worktrees = _git("worktree", "list")
+        entry = measure_revision("HEAD", repeats=2, games=1)
+
+        self.assertEqual(resolve("HEAD"), entry["commit"])
+        self.assertEqual({}, entry["errors"])
+        self.assertEqual(set(BENCHMARKS), set(entry["samples"]))
+        self.assertTrue(all(len(samples) == 2 for samples in entry["samples"].values()))
+        self.assertEqual(worktrees, _git("worktree", "list"))
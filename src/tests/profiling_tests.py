@@ -0,0 +1,80 @@
+import os
+import re
+import tempfile
+import unittest
+
+from ..experiment import Experiment, INTEGER_ENGINE
+from ..profiling import (
+    GameProfiler, LYNCH_REACTIONS, NIGHT, NOMINATIONS, OTHER, VOTING, collapsed_stacks,
+    merge_profiles, phase_times, stats_of, write_collapsed
+)
+
+
+class GameProfilerTest(unittest.TestCase):
+
+    def test_samples_evenly(self) -> None:
+        profiler = GameProfiler(0.25)
+        self.assertEqual([0, 4, 8], [game for game in range(12) if profiler.samples(game)])
+        self.assertEqual(5, sum(GameProfiler(0.05).samples(game) for game in range(100)))
+        # A shard picks up where the games before it left off.
+        shard = GameProfiler(0.25, offset=6)
+        self.assertEqual([8], [game for game in range(6, 12) if shard.samples(game)])
+        self.assertRaises(ValueError, GameProfiler, 0)
+
+    def test_plays_like_run(self) -> None:
+        profiler = GameProfiler(0.1)
+        wins = profiler.run(Experiment(2, 6), 30, seed=5)
+
+        self.assertEqual(Experiment(2, 6).run(30, seed=5), wins)
+        self.assertEqual(3, profiler.profiled)
+        play_game = [
+            stats for function, stats in profiler.raw_stats().items()
+            if function[2] == "play_game"
+        ]
+        self.assertEqual(3, play_game[0][1])
+
+    def test_merge(self) -> None:
+        profiles = []
+        for seed in (0, 100):
+            profiler = GameProfiler(0.5)
+            profiler.run(Experiment(2, 6, engine=INTEGER_ENGINE), 4, seed)
+            profiles.append(profiler.raw_stats())
+        merged = merge_profiles(profiles)
+        play_game = [
+            stats for function, stats in stats_of(merged).items() if function[2] == "play_game"
+        ]
+        self.assertEqual(4, play_game[0][1])
+
+
+class CollapsedStacksTest(unittest.TestCase):
+
+    def test_stacks_by_phase(self) -> None:
+        for engine in ("objects", INTEGER_ENGINE):
+            with self.subTest(engine=engine):
+                profiler = GameProfiler(1.0)
+                profiler.run(Experiment(2, 6, engine=engine), 20, seed=0)
+                stats = merge_profiles([profiler.raw_stats()])
+                stacks = collapsed_stacks(stats)
+                times = phase_times(stacks)
+
+                # The stacks account for (almost) all of the time profiled.
+                total: float = vars(stats)["total_tt"]
+                self.assertAlmostEqual(total, sum(stacks.values()), delta=total * 0.01)
+                for phase in (NIGHT, NOMINATIONS, VOTING, LYNCH_REACTIONS, OTHER):
+                    self.assertGreater(times[phase], 0, phase)
+                # Games, and turning the profiler off after them
+                self.assertEqual(
+                    {"play_game", "<method 'disable' of '_lsprof.Profiler' objects>"},
+                    {stack.split(";")[1].split(" (")[0] for stack in stacks}
+                )
+
+    def test_collapsed_format(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run.collapsed")
+            write_collapsed(
+                {"night;a (x.py:1);b (x.py:2)": 0.0025, "other;a (x.py:1)": 1e-9}, path
+            )
+            with open(path) as collapsed:
+                lines = collapsed.read().splitlines()
+        self.assertEqual(["night;a (x.py:1);b (x.py:2) 2500"], lines)
+        self.assertTrue(all(re.fullmatch(r"[^ ;][^;]*(;[^;]+)* \d+", line) for line in lines))
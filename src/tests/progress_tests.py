@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+import unittest
+import urllib.request
+
+from ..errors import GameDeadLockError
+from ..experiment import Experiment, INTEGER_ENGINE
+from ..progress import FAILED, FINISHED, ProgressMetrics
+from ..results import EndGameState
+from ..watchdog import GameWatchdog
+
+
+class ProgressMetricsTest(unittest.TestCase):
+
+    def test_counts(self) -> None:
+        progress = ProgressMetrics(10)
+        for outcome in (
+            EndGameState.VILLAGERS_WON, EndGameState.ABORTED, EndGameState.VILLAGERS_WON
+        ):
+            progress.after_game(outcome)
+
+        snapshot = progress.snapshot()
+        self.assertEqual(3, snapshot["games"])
+        self.assertEqual(2, snapshot["outcomes"]["VILLAGERS_WON"])
+        self.assertEqual(1, snapshot["timeouts"])
+        self.assertGreater(snapshot["resident_memory_bytes"], 0)
+
+        metrics = progress.prometheus(snapshot)
+        self.assertIn("# TYPE wherewholf_games_completed_total counter\n", metrics)
+        self.assertIn("wherewholf_games_completed_total 3\n", metrics)
+        self.assertIn('wherewholf_outcomes_total{outcome="VILLAGERS_WON"} 2\n', metrics)
+
+    def test_serves_metrics(self) -> None:
+        with ProgressMetrics(10, port=0) as progress:
+            progress.after_game(EndGameState.WEREWOLVES_WON)
+            with urllib.request.urlopen("http://127.0.0.1:%s/metrics" % progress.port) as response:
+                body = response.read().decode()
+        self.assertIn('wherewholf_outcomes_total{outcome="WEREWOLVES_WON"} 1\n', body)
+
+    def test_status_file_of_experiment(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "status.json")
+            progress = ProgressMetrics(30, status_file=path, interval=0.01)
+            wins = Experiment(engine=INTEGER_ENGINE).run(30, seed=0, progress=progress)
+
+            with open(path) as status_file:
+                status = json.load(status_file)
+            self.assertEqual(FINISHED, status["state"])
+            self.assertEqual(30, status["games"])
+            self.assertEqual(
+                {outcome.name: count for outcome, count in wins.items()},
+                {outcome: count for outcome, count in status["outcomes"].items() if count}
+            )
+            self.assertEqual(["status.json"], os.listdir(directory))
+
+    def test_deadlock(self) -> None:
+        progress = ProgressMetrics(10)
+        with self.assertRaises(GameDeadLockError):
+            with progress:
+                raise GameDeadLockError("Such pacifists!")
+        self.assertEqual(1, progress.deadlocks)
+        self.assertEqual(FAILED, progress.state)
+
+    def test_stalled_games(self) -> None:
+        experiment = Experiment(engine=INTEGER_ENGINE, watchdog=GameWatchdog(14, None))
+        progress = ProgressMetrics(30)
+        wins = experiment.run(30, seed=0, progress=progress)
+
+        self.assertGreater(progress.deadlocks, 0)
+        self.assertEqual(len(experiment.stalls), progress.deadlocks)
+        self.assertEqual(wins[EndGameState.ABORTED], progress.snapshot()["timeouts"])
+        self.assertIn(
+            "wherewholf_deadlocks_total %s\n" % progress.deadlocks, progress.prometheus()
+        )
@@ -0,0 +1,99 @@
+import io
+import unittest
+
+from ..game_characters import Player, Villager, Werewolf
+from ..moderator import Moderator
+from ..results import (
+    DeathCause, EndGameState, GameResult, read_results, RESULTS_FORMAT_VERSION, RESULTS_MAGIC,
+    ResultsFormatError, UNKNOWN_PLAYER, write_results
+)
+
+from typing import List, Set
+
+
+def make_players() -> Set[Player]:
+    players: Set[Player] = set()
+    players.add(Player("Christine", Werewolf()))
+    players.add(Player("Shara", Werewolf()))
+    for name in ("Chad", "JE", "Gab", "Charles", "Alvin", "Josh"):
+        players.add(Player(name, Villager()))
+    return players
+
+
+class GameResultTest(unittest.TestCase):
+
+    def test_binary_roundtrip(self) -> None:
+        result = GameResult(
+            EndGameState.VILLAGERS_WON, 42, 6, 2,
+            [(3, DeathCause.NIGHT_KILL, False), (0, DeathCause.LYNCH, True)], 5, 1
+        )
+        packed = result.to_bytes()
+        self.assertEqual(result.size, len(packed))
+        self.assertEqual(GameResult.HEADER.size + 2 * GameResult.DEATH.size, len(packed))
+        self.assertEqual(result, GameResult.from_bytes(packed))
+
+        skipped = GameResult(
+            EndGameState.WEREWOLVES_WON, 1, 4, 1,
+            [(UNKNOWN_PLAYER, DeathCause.NIGHT_KILL, False)], skipped_days=1
+        )
+        self.assertEqual(skipped, GameResult.from_bytes(skipped.to_bytes()))
+
+        unseeded = GameResult(EndGameState.WEREWOLVES_WON)
+        self.assertIsNone(GameResult.from_bytes(unseeded.to_bytes()).seed)
+
+    def test_bulk_storage(self) -> None:
+        results: List[GameResult] = [
+            Moderator(make_players(), seed=seed).play_for_result() for seed in range(20)
+        ]
+        buffer = io.BytesIO()
+        write_results(buffer, results)
+        buffer.seek(0)
+        self.assertEqual(results, list(read_results(buffer)))
+
+    def test_rejects_other_formats(self) -> None:
+        packed: bytes = GameResult(EndGameState.DRAW, 1, 4, 2).to_bytes()
+        version: bytes = RESULTS_FORMAT_VERSION.to_bytes(2, "little")
+        older: bytes = (RESULTS_FORMAT_VERSION - 1).to_bytes(2, "little")
+        for contents in (b"", packed, RESULTS_MAGIC + older + packed, b"WWXX" + version + packed):
+            with self.subTest(contents=contents):
+                with self.assertRaises(ResultsFormatError):
+                    list(read_results(io.BytesIO(contents)))
+
+    def test_moderator_result(self) -> None:
+        for seed in range(20):
+            moderator = Moderator(make_players(), seed=seed)
+            outcome = moderator.play()
+            result = moderator.result
+
+            self.assertEqual(outcome, result.outcome)
+            self.assertEqual(seed, result.seed)
+            self.assertEqual(8, result.players)
+            self.assertEqual(moderator.days, result.days)
+            # The night kill of a skipped day is counted, but nobody is killed.
+            self.assertEqual(
+                8 - len(moderator.players) + result.skipped_days, len(result.deaths)
+            )
+            self.assertEqual(len(result.deaths), len(set(d[0] for d in result.deaths)))
+            self.assertEqual(DeathCause.NIGHT_KILL, result.deaths[0][1])
+            werewolves_dead = sum(1 for d in result.deaths if d[2])
+            if outcome is EndGameState.VILLAGERS_WON:
+                self.assertEqual(2, werewolves_dead)
+            self.assertGreaterEqual(result.tie_rounds, 0)
+            self.assertGreaterEqual(result.consensus_retries, 0)
+
+    def test_forced_endgame(self) -> None:
+        # The first night leaves two villagers to two werewolves, so it is
+        # never played.
+        players: Set[Player] = {
+            Player("Christine", Werewolf()), Player("Shara", Werewolf()),
+            Player("Chad", Villager()), Player("JE", Villager()), Player("Gab", Villager())
+        }
+        moderator = Moderator(players, seed=3)
+        self.assertEqual(EndGameState.WEREWOLVES_WON, moderator.play())
+        self.assertEqual(
+            GameResult(
+                EndGameState.WEREWOLVES_WON, 3, 5, 1,
+                [(UNKNOWN_PLAYER, DeathCause.NIGHT_KILL, False)], skipped_days=1
+            ), moderator.result
+        )
+        self.assertEqual(5, len(moderator.players))
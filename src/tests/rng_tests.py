@@ -0,0 +1,107 @@
+import random
+import unittest
+
+from .. import rng
+from ..game_characters import Player, SanitizedPlayer, Villager, Werewolf
+from ..moderator import Moderator
+from ..rng import ANTITHETIC_ONE, GameRandom, TiltedRandom
+from typing import Set
+
+
+def make_players() -> Set[Player]:
+    werewolf = Werewolf()
+    villager = Villager()
+    players: Set[Player] = set()
+    for i in range(2):
+        players.add(Player("Werewolf #%s" % i, werewolf))
+    for i in range(6):
+        players.add(Player("Villager #%s" % i, villager))
+    return players
+
+
+class GameRandomTest(unittest.TestCase):
+
+    def test_same_seed_same_draws(self) -> None:
+        first = GameRandom(38)
+        second = GameRandom(38)
+        self.assertEqual(
+            [first.random() for _ in range(10)], [second.random() for _ in range(10)]
+        )
+
+    def test_choices_in_range(self) -> None:
+        game_random = GameRandom(38)
+        self.assertEqual(set(range(3)), {game_random.randbelow(3) for _ in range(200)})
+        self.assertEqual({"a", "b"}, {game_random.choice("ab") for _ in range(200)})
+
+    def test_weighted_index(self) -> None:
+        game_random = GameRandom(38)
+        picks = [game_random.weighted_index([1.0, 0.0, 3.0]) for _ in range(4000)]
+        self.assertNotIn(1, picks)
+        self.assertAlmostEqual(0.75, picks.count(2) / len(picks), delta=0.03)
+
+    def test_antithetic(self) -> None:
+        plain = GameRandom(40)
+        antithetic = GameRandom(40, antithetic=True)
+        for _ in range(100):
+            self.assertEqual(ANTITHETIC_ONE, plain.random() + antithetic.random())
+        self.assertEqual(
+            [6 - plain.randbelow(7) for _ in range(20)],
+            [antithetic.randbelow(7) for _ in range(20)]
+        )
+
+    def test_restart(self) -> None:
+        first = GameRandom(40)
+        second = GameRandom(40)
+        for _ in range(10):
+            second.random()
+        first.restart(3)
+        second.restart(3)
+        self.assertEqual(
+            [first.random() for _ in range(10)], [second.random() for _ in range(10)]
+        )
+        second.restart(4)
+        self.assertNotEqual(first.random(), second.random())
+
+    def test_unseeded_follows_random(self) -> None:
+        random.seed(38)
+        first = GameRandom()
+        random.seed(38)
+        self.assertEqual(first.getstate(), GameRandom().getstate())
+
+
+class TiltedRandomTest(unittest.TestCase):
+
+    def test_even_weights_choose_like_game_random(self) -> None:
+        tilted = TiltedRandom(lambda item: 2.0, 41)
+        plain = GameRandom(41)
+        items = "abcdefg"
+        self.assertEqual(
+            [plain.choice(items) for _ in range(50)], [tilted.choice(items) for _ in range(50)]
+        )
+        self.assertAlmostEqual(0.0, tilted.log_likelihood_ratio)
+
+    def test_likelihood_ratio_reweighs_choices(self) -> None:
+        weights = {"a": 1.0, "b": 1.0, "c": 6.0}
+        picks = {"a": 0.0, "b": 0.0, "c": 0.0}
+        trials = 4000
+        for seed in range(trials):
+            tilted = TiltedRandom(weights.__getitem__, seed)
+            picks[tilted.choice("abc")] += tilted.likelihood_ratio
+
+        # Reweighed, every item gets picked a third of the time.
+        for item in "abc":
+            self.assertAlmostEqual(1 / 3, picks[item] / trials, delta=0.04)
+
+
+class GameSeedTest(unittest.TestCase):
+
+    def test_same_seed_same_game(self) -> None:
+        players = make_players()
+        moderator = Moderator(set(players), seed=38)
+        first = moderator.play_for_result()
+        self.assertIs(moderator.rng, rng.current())
+
+        for player in players:
+            SanitizedPlayer.forget(player)
+        random.seed(0)
+        self.assertEqual(first, Moderator(set(players), seed=38).play_for_result())
@@ -0,0 +1,105 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from collections import Counter
+from ..benchmarks import PROJECT_ROOT
+from ..experiment import Experiment
+from ..shards import (
+    find_shard_files, IncompatibleShardsError, merge_shards, plan_shards, ShardResult
+)
+
+
+class PlanShardsTest(unittest.TestCase):
+
+    def test_seed_ranges_cover_all_games(self) -> None:
+        shards = plan_shards({"werewolves": 2}, 10, 3, seed=100)
+        self.assertEqual(
+            [(100, 104), (104, 107), (107, 110)],
+            [(s.seed_start, s.seed_stop) for s in shards]
+        )
+        self.assertEqual(10, sum(s.games for s in shards))
+        self.assertEqual(shards, plan_shards({"werewolves": 2}, 10, 3, seed=100))
+
+    def test_too_many_shards(self) -> None:
+        self.assertRaises(ValueError, plan_shards, {}, 2, 3)
+
+
+class ShardWorkflowTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.nodes = [os.path.join(self.tmp.name, "node%s" % i) for i in range(2)]
+        for node in self.nodes:
+            os.mkdir(node)
+        self.experiment = Experiment(2, 4)
+        self.shards = plan_shards(self.experiment.config, 30, 3, seed=7)
+
+    def tearDown(self) -> None:
+        self.tmp.cleanup()
+
+    def test_merge_matches_single_run(self) -> None:
+        self.experiment.run_shard(self.shards[0], self.nodes[0])
+        self.experiment.run_shard(self.shards[1], self.nodes[0])
+        self.experiment.run_shard(self.shards[2], self.nodes[1])
+
+        report = merge_shards(ShardResult.read(p) for p in find_shard_files(self.nodes))
+        single_run: Counter = self.experiment.run(30, seed=7)
+        self.assertTrue(report["complete"])
+        self.assertEqual(
+            {outcome.name: count for outcome, count in single_run.items()},
+            report["tallies"]
+        )
+        self.assertEqual(30, report["stats"]["games"])
+
+    def test_missing_shard_rerun(self) -> None:
+        for shard in self.shards[:2]:
+            self.experiment.run_shard(shard, self.nodes[0])
+        report = merge_shards(ShardResult.read(p) for p in find_shard_files(self.nodes))
+        self.assertFalse(report["complete"])
+        self.assertEqual([2], report["shards_missing"])
+
+        path = self.experiment.run_shard(self.shards[2], self.nodes[1])
+        with open(path) as shard_file:
+            first_write = shard_file.read()
+        # Same shard on another node, and the same node again.
+        self.experiment.run_shard(self.shards[2], self.nodes[0])
+        self.experiment.run_shard(self.shards[2], self.nodes[1])
+        with open(path) as shard_file:
+            self.assertEqual(first_write, shard_file.read())
+
+        report = merge_shards(ShardResult.read(p) for p in find_shard_files(self.nodes))
+        self.assertTrue(report["complete"])
+        self.assertEqual(30, report["summary"]["games"])
+
+    def test_shards_independent_of_hashing(self) -> None:
+        script = (
+            "from src.experiment import Experiment; from src.shards import plan_shards; "
+            "e = Experiment(2, 4); print(e.run_shard(plan_shards(e.config, 30, 3, seed=7)[1], %r))"
+        )
+        for node, hash_seed in zip(self.nodes, ("1", "2")):
+            subprocess.run(
+                [sys.executable, "-c", script % node],
+                check=True, capture_output=True, cwd=PROJECT_ROOT,
+                env=dict(os.environ, PYTHONHASHSEED=hash_seed)
+            )
+        # Would raise if the two copies disagreed
+        merge_shards(ShardResult.read(p) for p in find_shard_files(self.nodes))
+
+    def test_incompatible_shards(self) -> None:
+        self.experiment.run_shard(self.shards[0], self.nodes[0])
+        other = plan_shards(Experiment(3, 4).config, 30, 3, seed=7)
+        Experiment(3, 4).run_shard(other[1], self.nodes[1])
+        self.assertRaises(
+            IncompatibleShardsError,
+            merge_shards,
+            [ShardResult.read(p) for p in find_shard_files(self.nodes)]
+        )
+
+    def test_conflicting_copies(self) -> None:
+        result = ShardResult(self.shards[0], Counter(WEREWOLVES_WON=self.shards[0].games))
+        tampered = ShardResult(self.shards[0], Counter(VILLAGERS_WON=self.shards[0].games))
+        self.assertRaises(IncompatibleShardsError, merge_shards, [result, tampered])
+        self.assertEqual([0], merge_shards([result, result])["shards_merged"])
@@ -0,0 +1,194 @@
+import math
+import random
+import statistics
+import unittest
+
+from ..experiment import Experiment, INTEGER_ENGINE
+from ..game_characters import Player, Villager, Werewolf
+from ..moderator import Moderator
+from ..pubsub import PubSubBroker
+from ..stats import (
+    GameStatsAggregator, Histogram, ImportanceSampledRate, PairedDifference, RunningMoments,
+    chi_square_homogeneity, chi_square_sf, kolmogorov_sf, ks_two_sample
+)
+
+from typing import Set
+
+
+def play_games(aggregator: GameStatsAggregator, seeds: range) -> None:
+    broker = PubSubBroker()
+    broker.subscribers.append(aggregator)
+    for seed in seeds:
+        players: Set[Player] = set()
+        players.add(Player("Christine", Werewolf()))
+        players.add(Player("Shara", Werewolf()))
+        for name in ("Chad", "JE", "Gab", "Charles", "Alvin", "Josh"):
+            players.add(Player(name, Villager()))
+        Moderator(players, seed=seed, pubsub_broker=broker).play()
+
+
+class RunningMomentsTest(unittest.TestCase):
+
+    def test_matches_batch_computation(self) -> None:
+        samples = [random.uniform(0, 10) for _ in range(200)]
+        moments = RunningMoments()
+        for x in samples:
+            moments.add(x)
+
+        self.assertEqual(200, moments.count)
+        self.assertAlmostEqual(statistics.mean(samples), moments.mean)
+        self.assertAlmostEqual(statistics.variance(samples), moments.variance)
+
+    def test_merge(self) -> None:
+        samples = [random.uniform(0, 10) for _ in range(100)]
+        left, right, whole = RunningMoments(), RunningMoments(), RunningMoments()
+        for i, x in enumerate(samples):
+            (left if i < 30 else right).add(x)
+            whole.add(x)
+        left.merge(right)
+
+        self.assertEqual(whole.count, left.count)
+        self.assertAlmostEqual(whole.mean, left.mean)
+        self.assertAlmostEqual(whole.variance, left.variance)
+        self.assertTrue(math.isnan(RunningMoments().variance))
+
+
+class HistogramTest(unittest.TestCase):
+
+    def test_add_and_merge(self) -> None:
+        histogram = Histogram(buckets=3, width=2)
+        for x in (0, 1, 2, 5, 100):
+            histogram.add(x)
+        self.assertEqual([2, 1, 2], histogram.counts)
+
+        histogram.merge(Histogram.from_dict(histogram.to_dict()))
+        self.assertEqual([4, 2, 4], histogram.counts)
+        self.assertRaises(ValueError, histogram.merge, Histogram(buckets=4, width=2))
+
+
+class PairedDifferenceTest(unittest.TestCase):
+
+    def test_difference_and_interval(self) -> None:
+        paired = PairedDifference()
+        for a, b in ((1, 0), (1, 1), (0, 0), (1, 0)):
+            paired.add([a], [b])
+
+        self.assertAlmostEqual(0.5, paired.difference)
+        low, high = paired.confidence_interval()
+        self.assertAlmostEqual(0.5, (low + high) / 2)
+        self.assertAlmostEqual(1.959963984540054 * math.sqrt(1 / 3 / 4), high - 0.5)
+
+        merged = PairedDifference.from_dict(paired.to_dict())
+        merged.merge(paired)
+        self.assertEqual(8, merged.differences.count)
+        self.assertAlmostEqual(0.5, merged.difference)
+        self.assertRaises(ValueError, merged.merge, PairedDifference(games_per_unit=2))
+
+    def test_too_few_units(self) -> None:
+        paired = PairedDifference()
+        self.assertTrue(all(map(math.isnan, paired.confidence_interval())))
+        paired.add([1], [0])
+        self.assertTrue(all(map(math.isnan, paired.summary()["confidence_interval_95"])))
+
+        experiment = Experiment(engine=INTEGER_ENGINE)
+        for games, antithetic in ((1, True), (3, True), (2, True), (1, False)):
+            self.assertRaises(
+                ValueError, experiment.run_paired, experiment, games, 0, antithetic
+            )
+        self.assertEqual(2, experiment.run_paired(experiment, 4, 0, True).differences.count)
+
+    def test_common_random_numbers_pay_off(self) -> None:
+        experiment = Experiment(engine=INTEGER_ENGINE, player_attributes={"suggestibility": 0.4})
+        same = experiment.run_paired(experiment, 50, seed=40)
+        self.assertEqual(0, same.difference)
+        self.assertEqual(math.inf, same.efficiency)
+
+        other = Experiment(engine=INTEGER_ENGINE, player_attributes={"suggestibility": 0.45})
+        paired = experiment.run_paired(other, 400, seed=40, antithetic=True)
+        self.assertEqual(200, paired.differences.count)
+        self.assertEqual(400, paired.a.count)
+        self.assertGreater(paired.efficiency, 2)
+
+
+class ImportanceSampledRateTest(unittest.TestCase):
+
+    def test_weighted_estimate(self) -> None:
+        rate = ImportanceSampledRate()
+        for hit, likelihood_ratio in ((True, 0.1), (False, 5.0), (True, 0.3), (False, 0.2)):
+            rate.add(hit, likelihood_ratio)
+
+        self.assertEqual(2, rate.hits)
+        self.assertAlmostEqual(0.1, rate.estimate)
+        self.assertEqual(0.0, rate.confidence_interval()[0])
+
+        merged = ImportanceSampledRate.from_dict(rate.to_dict())
+        merged.merge(rate)
+        self.assertEqual(4, merged.hits)
+        self.assertEqual(8, merged.weighted.count)
+        self.assertAlmostEqual(0.1, merged.estimate)
+
+
+class GoodnessOfFitTest(unittest.TestCase):
+
+    def test_chi_square_sf(self) -> None:
+        # Textbook critical values
+        self.assertAlmostEqual(0.05, chi_square_sf(3.841459, 1), places=6)
+        self.assertAlmostEqual(0.01, chi_square_sf(23.209251, 10), places=6)
+        self.assertAlmostEqual(math.exp(-0.5), chi_square_sf(1, 2))
+        self.assertEqual(1.0, chi_square_sf(0, 3))
+
+    def test_kolmogorov_sf(self) -> None:
+        self.assertAlmostEqual(0.05, kolmogorov_sf(1.358099), places=4)
+        self.assertEqual(1.0, kolmogorov_sf(0))
+
+    def test_same_and_different_distributions(self) -> None:
+        rng = random.Random(0)
+        a = Histogram(10)
+        b = Histogram(10)
+        shifted = Histogram(10)
+        for _ in range(2000):
+            a.add(int(rng.triangular(0, 10, 4)))
+            b.add(int(rng.triangular(0, 10, 4)))
+            shifted.add(int(rng.triangular(0, 10, 5)))
+
+        self.assertGreater(chi_square_homogeneity(a.counts, b.counts), 0.001)
+        self.assertGreater(ks_two_sample(a.counts, b.counts), 0.001)
+        self.assertLess(chi_square_homogeneity(a.counts, shifted.counts), 0.001)
+        self.assertLess(ks_two_sample(a.counts, shifted.counts), 0.001)
+
+    def test_sparse_bins_get_pooled(self) -> None:
+        # Either bin alone expects too little to be tested on its own.
+        self.assertEqual(1.0, chi_square_homogeneity([100, 1, 1], [100, 0, 2]))
+        self.assertRaises(ValueError, chi_square_homogeneity, [1, 2], [1])
+
+
+class GameStatsAggregatorTest(unittest.TestCase):
+
+    def test_collects_from_games(self) -> None:
+        aggregator = GameStatsAggregator()
+        play_games(aggregator, range(30))
+        summary = aggregator.summary()
+
+        self.assertEqual(30, summary["games"])
+        self.assertEqual(30, sum(summary["outcomes"].values()))
+        self.assertEqual(30, sum(summary["game_length_histogram"]))
+        self.assertEqual(60, aggregator.players["Werewolf"])
+        self.assertEqual(180, aggregator.players["Villager"])
+        for rate in summary["survival_rates"].values():
+            self.assertTrue(0 <= rate <= 1)
+        self.assertTrue(0 <= summary["lynch_accuracy"] <= 1)
+
+    def test_merge_is_exact(self) -> None:
+        whole = GameStatsAggregator()
+        play_games(whole, range(40))
+        first, second = GameStatsAggregator(), GameStatsAggregator()
+        play_games(first, range(15))
+        play_games(second, range(15, 40))
+        merged = GameStatsAggregator.from_dict(first.to_dict())
+        merged.merge(GameStatsAggregator.from_dict(second.to_dict()))
+
+        expected, actual = whole.summary(), merged.summary()
+        for metric in ("games", "outcomes", "game_length_histogram", "survival_rates", "lynch_accuracy", "ties_per_day"):
+            self.assertEqual(expected[metric], actual[metric])
+        self.assertAlmostEqual(expected["game_length_mean"], actual["game_length_mean"])
+        self.assertAlmostEqual(expected["game_length_variance"], actual["game_length_variance"])
@@ -0,0 +1,105 @@
+import random
+import threading
+import unittest
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from .. import rng
+from ..experiment import ENGINES, Experiment, INTEGER_ENGINE
+from ..game_characters import SanitizedPlayer
+from ..rng import GameRandom
+from ..stats import GameStatsAggregator
+from ..watchdog import GameWatchdog
+from typing import Any, Dict, List
+
+
+def everything(experiment: Experiment, wins: Counter) -> Any:
+    return (
+        wins, dict(experiment.tie_breaker.tally),
+        # All but how long stalled games took, which is down to the clock
+        [dict(stall.to_dict(), elapsed=None) for stall in experiment.stalls]
+    )
+
+
+class ThreadedExperimentTest(unittest.TestCase):
+    """
+    Many games at once on many threads must play out like the same games one
+    after the other.
+    """
+
+    # A tight budget so that some games are aborted, and stalls are kept.
+    SETTINGS: Dict[str, Any] = {"watchdog": GameWatchdog(14, None)}
+
+    def test_same_as_serial(self) -> None:
+        for engine in ENGINES:
+            with self.subTest(engine=engine):
+                serial = Experiment(2, 6, engine=engine, **self.SETTINGS)
+                serial_stats = GameStatsAggregator()
+                expected = everything(serial, serial.run(300, seed=500, stats=serial_stats))
+                self.assertTrue(serial.stalls)
+
+                threaded = Experiment(2, 6, engine=engine, **self.SETTINGS)
+                stats = GameStatsAggregator()
+                wins = threaded.run_threads(300, 8, seed=500, stats=stats, batch_games=7)
+                self.assertEqual(expected, everything(threaded, wins))
+                self.assertEqual(serial_stats.outcomes, stats.outcomes)
+                self.assertEqual(
+                    serial_stats.game_length_histogram.counts, stats.game_length_histogram.counts
+                )
+
+    def test_games_interleaved_on_threads(self) -> None:
+        experiments = [Experiment(3, 9), Experiment(2, 6, engine=INTEGER_ENGINE)]
+        seeds: List[int] = list(range(200))
+        expected = [
+            experiment.play_game_for_result(seed).to_bytes()
+            for seed in seeds for experiment in experiments
+        ]
+        cached: int = SanitizedPlayer.cache_size()
+        # Every game on a thread of its own, with the experiments shared
+        with ThreadPoolExecutor(16) as pool:
+            played = list(pool.map(
+                lambda job: job[1].play_game_for_result(job[0]).to_bytes(),
+                [(seed, experiment) for seed in seeds for experiment in experiments]
+            ))
+        self.assertEqual(expected, played)
+        self.assertEqual(cached, SanitizedPlayer.cache_size())
+
+    def test_serial_and_threaded_at_once(self) -> None:
+        def play(engine: str, seed: int, threads: int) -> Any:
+            experiment = Experiment(2, 6, engine=engine, watchdog=GameWatchdog(14, None))
+            wins: Counter = (
+                experiment.run(120, seed=seed) if threads == 1 else
+                experiment.run_threads(120, threads, seed=seed, batch_games=5)
+            )
+            return everything(experiment, wins)
+
+        jobs = [
+            (engine, seed, threads) for seed in (0, 1000, 2000) for engine in ENGINES
+            for threads in (1, 4)
+        ]
+        expected = [play(engine, seed, 1) for engine, seed, _ in jobs]
+        # Serial runs and thread pools of their own, all at once
+        with ThreadPoolExecutor(len(jobs)) as pool:
+            played = list(pool.map(lambda job: play(*job), jobs))
+        self.assertEqual(expected, played)
+
+    def test_global_random_untouched(self) -> None:
+        state = random.getstate()
+        for experiment in (Experiment(2, 6), Experiment(2, 6, engine=INTEGER_ENGINE)):
+            experiment.play_game_for_result(3)
+        self.assertEqual(state, random.getstate())
+
+    def test_generator_per_thread(self) -> None:
+        mine = GameRandom(1)
+        rng.use(mine)
+        theirs: List[GameRandom] = []
+
+        def play() -> None:
+            theirs.append(rng.current())
+            rng.use(GameRandom(2))
+
+        thread = threading.Thread(target=play)
+        thread.start()
+        thread.join()
+        self.assertIsNot(mine, theirs[0])
+        self.assertIs(mine, rng.current())
@@ -0,0 +1,96 @@
+import random
+import unittest
+
+from ..game_characters import Player, SanitizedPlayer, Villager, Werewolf
+from ..moderator import LYNCH, Moderator, TIE, TIE_BREAK
+from ..pubsub import PubSubBroker, Subscriber
+from ..ties import (
+    NoLynchTieBreaker, RandomTieBreaker, RESOLVED_BY_REVOTE, RunoffTieBreaker, TieBreaker
+)
+from typing import List, Set
+
+
+def make_players() -> Set[Player]:
+    werewolf = Werewolf()
+    villager = Villager()
+    players: Set[Player] = set()
+    for i in range(3):
+        players.add(Player("Werewolf #%s" % i, werewolf))
+    for i in range(6):
+        players.add(Player("Villager #%s" % i, villager))
+    return players
+
+
+class TieRoundCounter(Subscriber):
+    """
+    Keeps the most revotes seen in a single day.
+    """
+
+    def __init__(self) -> None:
+        self.revotes_today = 0
+        self.most_revotes = 0
+        self.tie_breaks: List[str] = []
+
+    def recv_message(self, message_topic: str, message: str) -> None:
+        if message_topic == TIE:
+            self.revotes_today += 1
+            self.most_revotes = max(self.most_revotes, self.revotes_today)
+        elif message_topic in (LYNCH, TIE_BREAK):
+            self.revotes_today = 0
+            if message_topic == TIE_BREAK:
+                self.tie_breaks.append(message)
+
+
+class TieBreakerTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        villager = Villager()
+        self.tied: List[SanitizedPlayer] = [
+            SanitizedPlayer.sanitize(Player("Tied #%s" % i, villager, persuasiveness=p))
+            for i, p in enumerate((0.0, 1.0))
+        ]
+
+    def test_negative_revotes(self) -> None:
+        self.assertRaises(ValueError, RandomTieBreaker, -1)
+
+    def test_random_picks_a_tied_player(self) -> None:
+        tie_breaker = RandomTieBreaker()
+        self.assertIn(tie_breaker.break_tie(self.tied), self.tied)
+        self.assertEqual(1, tie_breaker.tally[RandomTieBreaker.NAME])
+
+    def test_no_lynch(self) -> None:
+        tie_breaker = NoLynchTieBreaker()
+        self.assertIsNone(tie_breaker.break_tie(self.tied))
+        self.assertEqual(1, tie_breaker.tally[NoLynchTieBreaker.NAME])
+
+    def test_runoff_favors_the_persuasive(self) -> None:
+        random.seed(34)
+        tie_breaker = RunoffTieBreaker()
+        lynched = [tie_breaker.break_tie(self.tied) for _ in range(1000)]
+        self.assertGreater(lynched.count(self.tied[0]), 950)
+        self.assertEqual(1000, tie_breaker.tally[RunoffTieBreaker.NAME])
+
+    def __play(self, tie_breaker: TieBreaker, games: int=30) -> TieRoundCounter:
+        counter = TieRoundCounter()
+        broker = PubSubBroker()
+        broker.subscribers.append(counter)
+        for seed in range(games):
+            players = make_players()
+            Moderator(set(players), str(seed), seed, broker, tie_breaker).play()
+            for player in players:
+                SanitizedPlayer.forget(player)
+        return counter
+
+    def test_revotes_are_bounded(self) -> None:
+        tie_breaker = RandomTieBreaker(2)
+        counter = self.__play(tie_breaker)
+        self.assertLessEqual(counter.most_revotes, 2)
+        self.assertEqual(len(counter.tie_breaks), tie_breaker.tally[RandomTieBreaker.NAME])
+        self.assertGreater(tie_breaker.tally[RESOLVED_BY_REVOTE], 0)
+
+    def test_no_revotes(self) -> None:
+        tie_breaker = NoLynchTieBreaker(0)
+        counter = self.__play(tie_breaker)
+        self.assertEqual(0, counter.most_revotes)
+        self.assertEqual(0, tie_breaker.tally[RESOLVED_BY_REVOTE])
+        self.assertGreater(tie_breaker.tally[NoLynchTieBreaker.NAME], 0)
@@ -0,0 +1,78 @@
+import unittest
+
+from ..experiment import INTEGER_ENGINE, OBJECT_ENGINE
+from ..results import EndGameState
+from ..tournament import Strategy, Tournament, parse_strategy, play_rounds, side_score
+from .game_characters_tests import BlocVillager
+from typing import Any, Dict
+
+
+def make_tournament(**kwargs: Any) -> Tournament:
+    strategies = [
+        Strategy("timid", {"aggression": 0.05}),
+        Strategy("pushy", {"aggression": 0.9}),
+        Strategy("pushy too", {"aggression": 0.9}),
+    ]
+    settings: Dict[str, Any] = dict(engine=INTEGER_ENGINE, seed=7, batch_rounds=10, min_rounds=20, max_rounds=200)
+    settings.update(kwargs)
+    return Tournament(strategies, **settings)
+
+
+class TournamentTest(unittest.TestCase):
+
+    def test_side_score(self) -> None:
+        self.assertEqual(1.0, side_score(EndGameState.WEREWOLVES_WON, True))
+        self.assertEqual(0.0, side_score(EndGameState.WEREWOLVES_WON, False))
+        self.assertEqual(1.0, side_score(EndGameState.VILLAGERS_WON, False))
+        self.assertEqual(0.5, side_score(EndGameState.ABORTED, True))
+
+    def test_mirrored_strategies_score_even(self) -> None:
+        base = Strategy("base")
+        self.assertEqual([0.5] * 20, play_rounds(base, base, 2, 6, INTEGER_ENGINE, range(20)))
+
+    def test_close_matchups_get_the_games(self) -> None:
+        tournament = make_tournament().run()
+        rounds = {
+            (tournament.strategies[p.first].name, tournament.strategies[p.second].name): p
+            for p in tournament.pairings
+        }
+
+        self.assertTrue(rounds["timid", "pushy"].settled)
+        self.assertLess(rounds["timid", "pushy"].rounds, 200)
+        self.assertLess(rounds["timid", "pushy"].mean_score, 0.5)
+        # Same strategy under another name: never settled, plays every round.
+        self.assertFalse(rounds["pushy", "pushy too"].settled)
+        self.assertEqual(200, rounds["pushy", "pushy too"].rounds)
+        self.assertEqual("timid", tournament.standings()[-1][0])
+        self.assertAlmostEqual(1500 * 3, sum(tournament.ratings))
+        self.assertEqual(2 * sum(p.rounds for p in tournament.pairings), tournament.games)
+
+    def test_same_result_on_any_number_of_workers(self) -> None:
+        inline = make_tournament(max_rounds=60).run(workers=1)
+        pooled = make_tournament(max_rounds=60).run(workers=2)
+
+        self.assertEqual(inline.ratings, pooled.ratings)
+        self.assertEqual(inline.summary(), pooled.summary())
+
+    def test_strategies_bring_their_own_characters(self) -> None:
+        villager = BlocVillager()
+        bloc = Strategy("bloc", villager=villager)
+        tournament = Tournament(
+            [Strategy("base"), bloc], engine=OBJECT_ENGINE, seed=0, batch_rounds=5,
+            min_rounds=5, max_rounds=5
+        ).run()
+        self.assertEqual(10, tournament.games)
+        self.assertGreater(villager.batch_calls, 0)
+
+        self.assertRaises(
+            ValueError, Tournament([Strategy("base"), bloc], engine=INTEGER_ENGINE).run
+        )
+
+    def test_parse_strategy(self) -> None:
+        strategy = parse_strategy("pushy:aggression=0.9,suggestibility=0.1")
+        self.assertEqual("pushy", strategy.name)
+        self.assertEqual({"aggression": 0.9, "suggestibility": 0.1}, strategy.attributes)
+        self.assertEqual({}, parse_strategy("base").attributes)
+        self.assertRaises(ValueError, parse_strategy, "bad:aggression=lots")
+        self.assertRaises(ValueError, parse_strategy, "bad:charisma=0.5")
+        self.assertRaises(ValueError, Tournament, [Strategy("a"), Strategy("a")])
@@ -0,0 +1,87 @@
+import random
+import unittest
+
+from ..game_characters import Player, SanitizedPlayer, Villager, Werewolf
+from ..moderator import EndGameState, Moderator
+from ..training import DAY, Experience, SelfPlayTrainer, TabularPolicy, observe
+
+from typing import Set
+
+
+class TabularPolicyTest(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.meek = SanitizedPlayer.sanitize(
+            Player("Meek", Villager(), aggression=0.1, persuasiveness=0.1)
+        )
+        self.loud = SanitizedPlayer.sanitize(
+            Player("Loud", Villager(), aggression=0.9, persuasiveness=0.9)
+        )
+
+    def test_fit_and_choose(self) -> None:
+        policy = TabularPolicy(buckets=2)
+        seen = (observe(self.meek, 2), observe(self.loud, 2))
+        experiences = [
+            Experience(DAY, seen, observe(self.loud, 2), 1) for _ in range(10)
+        ] + [
+            Experience(DAY, seen, observe(self.meek, 2), 0) for _ in range(10)
+        ]
+        delta = policy.fit(experiences)
+
+        self.assertGreater(delta, 0)
+        self.assertGreater(policy.value(DAY, observe(self.loud, 2)), 0.5)
+        self.assertLess(policy.value(DAY, observe(self.meek, 2)), 0.5)
+        for _ in range(20):
+            self.assertIs(self.loud, policy.choose(DAY, [self.meek, self.loud]))
+
+        # The table is rebuilt once the policy learns more.
+        self.assertIs(policy.table, policy.table)
+        before = policy.table
+        policy.fit([Experience(DAY, seen, observe(self.meek, 2), 1) for _ in range(200)])
+        self.assertIsNot(before, policy.table)
+        self.assertIs(self.meek, policy.choose(DAY, [self.meek, self.loud]))
+
+        TabularVillager = policy.export(Villager)
+        self.assertTrue(issubclass(TabularVillager, Villager))
+        self.assertIs(self.meek, TabularVillager().daytime_behavior([self.meek, self.loud]))
+        self.assertIsNone(TabularVillager().daytime_behavior([]))
+
+
+class SelfPlayTrainerTest(unittest.TestCase):
+
+    def test_trained_characters_play(self) -> None:
+        trainer = SelfPlayTrainer(seed=0)
+        epochs = trainer.train(games_per_epoch=20, max_epochs=3)
+        self.assertLessEqual(epochs, 3)
+        self.assertEqual(epochs * 20, trainer.games_played)
+
+        exported = trainer.export()
+        TabularWerewolf = exported[Werewolf]
+        TabularVillager = exported[Villager]
+        players: Set[Player] = set()
+        players.add(Player("Christine", TabularWerewolf()))
+        players.add(Player("Shara", TabularWerewolf()))
+        for name in ("Chad", "JE", "Gab", "Charles"):
+            players.add(Player(name, TabularVillager()))
+
+        self.assertNotEqual(EndGameState.UNKNOWN_CONDITION, Moderator(players).play())
+
+    def test_experiences_record_what_was_seen(self) -> None:
+        experiences = SelfPlayTrainer(seed=1).play_game()
+        recorded = experiences[Werewolf] + experiences[Villager]
+        self.assertTrue(recorded)
+        for experience in recorded:
+            self.assertIn(experience.action, experience.observation)
+
+    def test_seeded_training_is_reproducible(self) -> None:
+        state = random.getstate()
+        policies = []
+        for _ in range(2):
+            trainer = SelfPlayTrainer(seed=4)
+            trainer.train(games_per_epoch=10, max_epochs=2)
+            policies.append({
+                character: policy.table for character, policy in trainer.policies.items()
+            })
+        self.assertEqual(policies[0], policies[1])
+        # Drawn from generators of its own, without touching `random`
+        self.assertEqual(state, random.getstate())
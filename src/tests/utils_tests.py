@@ -2,7 +2,7 @@ import unittest
 
 from collections import Counter
 from typing import Any, Iterable, List, Sequence, Tuple
-from ..utils import MarkovChain, NominationRecencyTracker, ValueTieCounter, WorldModel
+from ..utils import MarkovChain, NominationRecencyTracker, ValueTieCounter, VoteTally, WorldModel
 from ..game_characters import Player, SanitizedPlayer, Villager, Werewolf
 
 
@@ -95,6 +95,40 @@ class ValueTieCounterTest(unittest.TestCase):
         self.assertEqual(1, c[charles])
         self.assertEqual(1, c[chad])
 
+class VoteTallyTest(unittest.TestCase):
+
+    def test_leader_decided(self) -> None:
+        tally = VoteTally(5, 2)
+        for vote in ("a", "a", "b"):
+            tally.add(vote)
+            self.assertFalse(tally.decided)
+        tally.add("a")
+        self.assertTrue(tally.decided)
+        self.assertEqual(["a"], tally.leaders())
+
+    def test_quorum_unreachable(self) -> None:
+        tally = VoteTally(5, 4)
+        tally.add("a")
+        tally.add(None)
+        self.assertFalse(tally.decided)
+        tally.add(None)
+        self.assertTrue(tally.quorum_unreachable)
+        self.assertTrue(tally.decided)
+
+    def test_tie_order_matches_value_tie_counter(self) -> None:
+        votes = ["b", "a", "a", None, "c", "b", "c"]
+        tally = VoteTally(len(votes), 1)
+        counter = ValueTieCounter()
+        for vote in votes:
+            tally.add(vote)
+            if vote is not None:
+                counter[vote] += 1
+
+        self.assertFalse(tally.decided)
+        self.assertEqual([c for c, _ in counter.most_common(1)], tally.leaders())
+        self.assertEqual(["a", "b", "c"], tally.leaders())
+
+
 class MarkovChainTests(unittest.TestCase):
 
     def test_add_event_and_probs(self) -> None:
@@ -0,0 +1,81 @@
+import unittest
+
+from ..errors import GameBudgetExceededError
+from ..game_characters import Player, SanitizedPlayer, Villager, Werewolf
+from ..moderator import EndGameState, Moderator
+from ..watchdog import GameWatchdog, NIGHT
+from typing import Optional, Sequence, Set
+
+
+class IndecisiveWerewolf(Werewolf):
+    """
+    Never agrees with the pack, so the night never ends.
+    """
+
+    def batch_accept_night_suggestion(
+        self,
+        members: Sequence[Player],
+        voted_for: SanitizedPlayer,
+        suggested_by: SanitizedPlayer
+    ) -> Optional[Sequence[bool]]:
+        return [False] * len(members)
+
+
+def make_players(werewolf: Werewolf) -> Set[Player]:
+    villager = Villager()
+    players: Set[Player] = set()
+    for i in range(2):
+        players.add(Player("Werewolf #%s" % i, werewolf))
+    for i in range(4):
+        players.add(Player("Villager #%s" % i, villager))
+    return players
+
+
+class GameWatchdogTest(unittest.TestCase):
+
+    def test_step_budget(self) -> None:
+        watchdog = GameWatchdog(max_steps=3, max_seconds=None)
+        for _ in range(3):
+            watchdog.step(NIGHT)
+        self.assertRaises(GameBudgetExceededError, watchdog.step, NIGHT)
+
+        watchdog.start()
+        watchdog.step(NIGHT)
+        self.assertEqual(1, watchdog.steps)
+
+    def test_time_budget(self) -> None:
+        watchdog = GameWatchdog(max_seconds=0.0)
+        with self.assertRaises(GameBudgetExceededError) as raised:
+            watchdog.step(NIGHT)
+        self.assertEqual(NIGHT, raised.exception.phase)
+
+    def test_no_time_budget_by_default(self) -> None:
+        watchdog = GameWatchdog()
+        # As if the machine had been too busy to run the game for an hour
+        watchdog.started -= 3600
+        watchdog.step(NIGHT)
+        self.assertEqual(1, watchdog.steps)
+
+
+class StalledGameTest(unittest.TestCase):
+
+    def test_endless_night_is_aborted(self) -> None:
+        moderator = Moderator(
+            make_players(IndecisiveWerewolf()), seed=35,
+            watchdog=GameWatchdog(max_steps=50, max_seconds=None)
+        )
+        self.assertEqual(EndGameState.ABORTED, moderator.play())
+        self.assertEqual(EndGameState.ABORTED, moderator.result.outcome)
+
+        stall = moderator.stall
+        assert stall is not None
+        self.assertEqual(35, stall.seed)
+        self.assertEqual({"Villager": 4, "Werewolf": 2}, stall.roster)
+        self.assertEqual(NIGHT, stall.phase)
+        self.assertEqual(1, stall.day)
+        self.assertEqual(51, stall.steps)
+
+    def test_games_within_budget(self) -> None:
+        moderator = Moderator(make_players(Werewolf()), seed=35)
+        self.assertNotEqual(EndGameState.ABORTED, moderator.play())
+        self.assertIsNone(moderator.stall)
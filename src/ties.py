@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections import Counter
+
+from . import rng
+from .defaults import DEFAULT_MAX_REVOTES
+from .type_checking import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .game_characters import SanitizedPlayer
+    from typing import Callable, Dict, Optional, Sequence
+
+RESOLVED_BY_REVOTE: str = "revote"
+
+
+class TieBreaker(ABC):
+    """
+    Decides what happens when the lynch vote ends in a tie. The village votes
+    again among the tied players up to `max_revotes` times; if they are still
+    tied, the `fallback` decides.
+
+    `tally` counts how ties were resolved: by revote or by fallback. Share a
+    TieBreaker among games to get the counts across an experiment.
+    """
+
+    NAME: str = "abstract"
+
+    def __init__(self, max_revotes: int=DEFAULT_MAX_REVOTES):
+        if max_revotes < 0:
+            raise ValueError("max_revotes must not be negative, got %s" % max_revotes)
+        self.max_revotes: int = max_revotes
+        self.tally: Counter = Counter()
+
+    def resolved_by_revote(self) -> None:
+        self.tally[RESOLVED_BY_REVOTE] += 1
+
+    def break_tie(self, tied: Sequence[SanitizedPlayer]) -> Optional[SanitizedPlayer]:
+        choice: Optional[int] = self.break_tie_among([p.persuasiveness for p in tied])
+        return None if choice is None else tied[choice]
+
+    def break_tie_among(self, persuasiveness: Sequence[float]) -> Optional[int]:
+        """
+        Same as `break_tie` but for engines that don't have player objects.
+        """
+        self.tally[self.NAME] += 1
+        return self.fallback(persuasiveness)
+
+    @abstractmethod
+    def fallback(self, persuasiveness: Sequence[float]) -> Optional[int]:
+        """
+        Given the persuasiveness of each player still tied after all revotes,
+        return the index of who gets lynched or None for no lynching today.
+        """
+        pass
+
+    def __str__(self) -> str:
+        return "%s(max_revotes=%s)" % (self.NAME, self.max_revotes)
+
+
+class RandomTieBreaker(TieBreaker):
+
+    NAME = "random"
+
+    def fallback(self, persuasiveness: Sequence[float]) -> Optional[int]:
+        return rng.current().randbelow(len(persuasiveness))
+
+
+class NoLynchTieBreaker(TieBreaker):
+
+    NAME = "no-lynch"
+
+    def fallback(self, persuasiveness: Sequence[float]) -> Optional[int]:
+        return None
+
+
+class RunoffTieBreaker(TieBreaker):
+    """
+    The tied players plead their case. The more persuasive a player is, the
+    less likely they get lynched.
+    """
+
+    NAME = "runoff"
+    # So that perfectly persuasive players can still be lynched if everyone is.
+    MIN_WEIGHT = 0.01
+
+    def fallback(self, persuasiveness: Sequence[float]) -> Optional[int]:
+        return rng.current().weighted_index(
+            [max(1 - p, RunoffTieBreaker.MIN_WEIGHT) for p in persuasiveness]
+        )
+
+
+# Makes the tie breaker of a name, given its max_revotes
+TIE_BREAKERS: Dict[str, Callable[[int], TieBreaker]] = {
+    tie_breaker.NAME: tie_breaker
+    for tie_breaker in (RandomTieBreaker, NoLynchTieBreaker, RunoffTieBreaker)
+}
@@ -0,0 +1,389 @@
+"""
+Round-robin tournaments between strategies. A strategy is what a side brings
+to a game: Player attributes and, optionally, its own Werewolf and Villager
+variants. Every pairing of strategies plays rounds of two games on the same
+seed, each strategy playing the werewolves in one of them, which cancels out
+how much likelier werewolves are to win.
+
+Rounds are played in batches across a process pool. Idle workers take the
+next batch off the pool's shared queue, so that no worker waits on a slow
+pairing while there is other work. Results are read back in the order the
+batches were scheduled, which keeps the ratings, and when every pairing stops,
+independent of the number of workers. A pairing stops getting rounds as soon
+as it is clear which strategy is better, so that most games go to the close
+matchups.
+
+    python -m src.tournament --strategy timid:aggression=0.1 \\
+        --strategy pushy:aggression=0.9,suggestibility=0.1 --workers 4
+"""
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from .game_characters import GameCharacter, Player, SanitizedPlayer, Villager, Werewolf
+from .integer_engine import IntegerGame, Roster
+from .moderator import Moderator
+from .results import EndGameState
+from .stats import RunningMoments
+from .type_checking import TYPE_CHECKING
+
+import math
+import random
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+INITIAL_RATING: float = 1500.0
+# Elo K-factor. Small, since every pairing plays many rounds.
+DEFAULT_K: float = 4.0
+DEFAULT_BATCH_ROUNDS: int = 20
+DEFAULT_MIN_ROUNDS: int = 40
+DEFAULT_MAX_ROUNDS: int = 1000
+# A pairing is settled once the confidence interval of its mean score, at this
+# many standard errors, leaves out an even score. Wider than the usual 95%
+# since the interval is looked at after every batch.
+DEFAULT_Z: float = 3.0
+# Batches scheduled but not read back yet. Scheduling depends on this and not
+# on the number of workers, so it should stay above any sensible worker count.
+DEFAULT_IN_FLIGHT: int = 16
+
+
+class Strategy(object):
+    """
+    Players named `name` that get `attributes` (e.g. {"aggression": 0.5}) and
+    play `werewolf` or `villager`, by default the plain roles.
+    """
+
+    __slots__ = ("name", "attributes", "werewolf", "villager")
+
+    def __init__(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, float]]=None,
+        werewolf: Optional[GameCharacter]=None,
+        villager: Optional[GameCharacter]=None
+    ):
+        self.name: str = name
+        self.attributes: Dict[str, float] = dict(attributes or {})
+        self.werewolf: GameCharacter = werewolf if werewolf else Werewolf()
+        self.villager: GameCharacter = villager if villager else Villager()
+
+    def make_players(self, werewolf: bool, count: int) -> List[Player]:
+        role: GameCharacter = self.werewolf if werewolf else self.villager
+        return [
+            Player.with_attributes("%s Player #%s" % (role, i), role, self.attributes)
+            for i in range(count)
+        ]
+
+    def __str__(self) -> str:
+        return self.name
+
+
+def play_game(
+    werewolves: Strategy,
+    villagers: Strategy,
+    werewolf_count: int,
+    villager_count: int,
+    engine: str,
+    seed: int
+) -> EndGameState:
+    """
+    Play a game where `werewolves` play the werewolf side and `villagers` the
+    villager side.
+    """
+    from .experiment import INTEGER_ENGINE
+
+    players: List[Player] = (
+        werewolves.make_players(True, werewolf_count) +
+        villagers.make_players(False, villager_count)
+    )
+    if engine == INTEGER_ENGINE:
+        return IntegerGame(Roster.from_players(players), seed).play()
+
+    result: EndGameState = Moderator(set(players), seed=seed).play()
+    for player in players:
+        SanitizedPlayer.forget(player)
+    return result
+
+
+def side_score(outcome: EndGameState, werewolf: bool) -> float:
+    """
+    1 if the side won, 0 if it lost and 1/2 for games that did not finish.
+    """
+    if outcome is EndGameState.WEREWOLVES_WON:
+        return float(werewolf)
+    elif outcome is EndGameState.VILLAGERS_WON:
+        return float(not werewolf)
+    return 0.5
+
+
+def play_rounds(
+    first: Strategy,
+    second: Strategy,
+    werewolf_count: int,
+    villager_count: int,
+    engine: str,
+    seeds: range
+) -> List[float]:
+    """
+    The score of `first` in the round of every seed: the mean of its scores as
+    the werewolves and as the villagers.
+    """
+    return [
+        (
+            side_score(play_game(first, second, werewolf_count, villager_count, engine, seed), True)
+            + side_score(
+                play_game(second, first, werewolf_count, villager_count, engine, seed), False
+            )
+        ) / 2
+        for seed in seeds
+    ]
+
+
+class Pairing(object):
+    """
+    The rounds `first` and `second` played so far, scored from the point of
+    view of `first`.
+    """
+
+    __slots__ = ("first", "second", "scores", "scheduled", "settled")
+
+    def __init__(self, first: int, second: int):
+        # Indices of the strategies in the tournament
+        self.first: int = first
+        self.second: int = second
+        self.scores: RunningMoments = RunningMoments()
+        # Rounds handed out to workers, read back or not
+        self.scheduled: int = 0
+        self.settled: bool = False
+
+    @property
+    def rounds(self) -> int:
+        return self.scores.count
+
+    @property
+    def mean_score(self) -> float:
+        return self.scores.mean if self.rounds else math.nan
+
+    def confidence_interval(self, z: float=DEFAULT_Z) -> Tuple[float, float]:
+        if self.rounds < 2:
+            return (0.0, 1.0)
+        half_width: float = z * math.sqrt(self.scores.variance / self.rounds)
+        return (self.mean_score - half_width, self.mean_score + half_width)
+
+    @property
+    def rating_difference(self) -> float:
+        """
+        How many Elo points `first` is better than `second` by, going by the
+        mean score.
+        """
+        score: float = min(max(self.mean_score, 1e-6), 1 - 1e-6)
+        return 400 * math.log10(score / (1 - score))
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+class _InlineExecutor(Executor):
+    """
+    Plays batches right away, in this process.
+    """
+
+    # Positional-only, like Executor.submit's, the way Python 3.7 spells it
+    def submit(self, __fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        future: Future = Future()
+        future.set_result(__fn(*args, **kwargs))
+        return future
+
+
+class Tournament(object):
+    """
+    Every strategy plays every other one, `werewolf_count` werewolves against
+    `villager_count` villagers. Rounds of a pairing are seeded with `seed`,
+    `seed + 1`, ..., so pairings play the same games as far as they can.
+
+    Pairings play `batch_rounds` rounds at a time. They play at least
+    `min_rounds` rounds and at most `max_rounds`, stopping in between once
+    they are settled at `z` standard errors.
+    """
+
+    def __init__(
+        self,
+        strategies: List[Strategy],
+        werewolf_count: int=2,
+        villager_count: int=6,
+        engine: Optional[str]=None,
+        seed: Optional[int]=None,
+        batch_rounds: int=DEFAULT_BATCH_ROUNDS,
+        min_rounds: int=DEFAULT_MIN_ROUNDS,
+        max_rounds: int=DEFAULT_MAX_ROUNDS,
+        z: float=DEFAULT_Z,
+        k: float=DEFAULT_K,
+        max_in_flight: int=DEFAULT_IN_FLIGHT
+    ):
+        from .experiment import ENGINES, OBJECT_ENGINE
+
+        if len(set(strategy.name for strategy in strategies)) != len(strategies):
+            raise ValueError("Strategies need distinct names.")
+        if len(strategies) < 2:
+            raise ValueError("A tournament needs at least two strategies.")
+        if engine is None:
+            engine = OBJECT_ENGINE
+        if engine not in ENGINES:
+            raise ValueError("Unknown engine %s, expected one of %s." % (engine, ENGINES))
+        self.strategies: List[Strategy] = list(strategies)
+        self.werewolf_count: int = werewolf_count
+        self.villager_count: int = villager_count
+        self.engine: str = engine
+        self.seed: int = seed if seed is not None else random.getrandbits(32)
+        self.batch_rounds: int = batch_rounds
+        self.min_rounds: int = min_rounds
+        self.max_rounds: int = max_rounds
+        self.z: float = z
+        self.k: float = k
+        self.max_in_flight: int = max_in_flight
+        self.pairings: List[Pairing] = [
+            Pairing(i, j)
+            for i in range(len(strategies)) for j in range(i + 1, len(strategies))
+        ]
+        self.ratings: List[float] = [INITIAL_RATING] * len(strategies)
+
+    @property
+    def games(self) -> int:
+        return 2 * sum(pairing.rounds for pairing in self.pairings)
+
+    def __record(self, pairing: Pairing, scores: List[float]) -> None:
+        for score in scores:
+            pairing.scores.add(score)
+            first: float = self.ratings[pairing.first]
+            second: float = self.ratings[pairing.second]
+            change: float = self.k * (score - expected_score(first, second))
+            self.ratings[pairing.first] = first + change
+            self.ratings[pairing.second] = second - change
+
+        if pairing.rounds >= self.min_rounds:
+            low, high = pairing.confidence_interval(self.z)
+            pairing.settled = pairing.settled or low > 0.5 or high < 0.5
+
+    def __next_pairing(self) -> Optional[Pairing]:
+        """
+        The open pairing with the fewest rounds handed out.
+        """
+        open_pairings: List[Pairing] = [
+            pairing for pairing in self.pairings
+            if not pairing.settled and pairing.scheduled < self.max_rounds
+        ]
+        return min(open_pairings, key=lambda pairing: pairing.scheduled, default=None)
+
+    def __schedule(self, executor: Executor, in_flight: Deque[Tuple[Pairing, Future]]) -> None:
+        while len(in_flight) < self.max_in_flight:
+            pairing: Optional[Pairing] = self.__next_pairing()
+            if pairing is None:
+                return
+            start: int = self.seed + pairing.scheduled
+            rounds: int = min(self.batch_rounds, self.max_rounds - pairing.scheduled)
+            pairing.scheduled += rounds
+            in_flight.append((pairing, executor.submit(
+                play_rounds, self.strategies[pairing.first], self.strategies[pairing.second],
+                self.werewolf_count, self.villager_count, self.engine,
+                range(start, start + rounds)
+            )))
+
+    def run(self, workers: int=1) -> "Tournament":
+        """
+        Play until every pairing is settled or out of rounds, on `workers`
+        processes; 1 plays in this process.
+        """
+        executor: Executor = ProcessPoolExecutor(workers) if workers > 1 else _InlineExecutor()
+        in_flight: Deque[Tuple[Pairing, Future]] = deque()
+        with executor:
+            self.__schedule(executor, in_flight)
+            while in_flight:
+                pairing, batch = in_flight.popleft()
+                self.__record(pairing, batch.result())
+                self.__schedule(executor, in_flight)
+        return self
+
+    def standings(self) -> List[Tuple[str, float]]:
+        """
+        Strategies by rating, best first.
+        """
+        return sorted(
+            ((strategy.name, rating) for strategy, rating in zip(self.strategies, self.ratings)),
+            key=lambda standing: -standing[1]
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "games": self.games,
+            "standings": [
+                {"strategy": name, "rating": rating} for name, rating in self.standings()
+            ],
+            "pairings": [
+                {
+                    "first": self.strategies[pairing.first].name,
+                    "second": self.strategies[pairing.second].name,
+                    "rounds": pairing.rounds,
+                    "mean_score": pairing.mean_score,
+                    "confidence_interval": pairing.confidence_interval(self.z),
+                    "rating_difference": pairing.rating_difference,
+                    "settled": pairing.settled
+                }
+                for pairing in self.pairings
+            ]
+        }
+
+
+def parse_strategy(spec: str) -> Strategy:
+    """
+    A strategy from NAME or NAME:ATTRIBUTE=VALUE,..., e.g.
+    pushy:aggression=0.9,suggestibility=0.1
+    """
+    name, _, assignments = spec.partition(":")
+    attributes: Dict[str, float] = {}
+    for assignment in filter(None, assignments.split(",")):
+        attribute, _, value = assignment.partition("=")
+        if attribute not in Player.ATTRIBUTES:
+            raise ValueError("Unknown Player attribute %s, expected one of %s" % (
+                attribute, ", ".join(Player.ATTRIBUTES)
+            ))
+        try:
+            attributes[attribute] = float(value)
+        except ValueError:
+            raise ValueError("Expected ATTRIBUTE=VALUE, got %s" % assignment)
+    return Strategy(name, attributes)
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+    from .experiment import ENGINES, OBJECT_ENGINE
+
+    import json
+    import logging
+
+    parser = ArgumentParser(description="Rank WhereWholf strategies in a round-robin tournament")
+    parser.add_argument(
+        "--strategy", "-s", action="append", required=True, type=parse_strategy,
+        help="NAME or NAME:ATTRIBUTE=VALUE,... Repeatable; at least two."
+    )
+    parser.add_argument("--werewolves", "-w", type=int, default=2)
+    parser.add_argument("--villagers", "-v", type=int, default=6)
+    parser.add_argument("--engine", "-e", choices=ENGINES, default=OBJECT_ENGINE)
+    parser.add_argument("--workers", "-j", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--batch-rounds", type=int, default=DEFAULT_BATCH_ROUNDS)
+    parser.add_argument("--min-rounds", type=int, default=DEFAULT_MIN_ROUNDS)
+    parser.add_argument("--max-rounds", type=int, default=DEFAULT_MAX_ROUNDS)
+    parser.add_argument(
+        "--z", type=float, default=DEFAULT_Z,
+        help="Standard errors a pairing's score must be away from even to stop early."
+    )
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    tournament = Tournament(
+        args.strategy, args.werewolves, args.villagers, args.engine, args.seed,
+        args.batch_rounds, args.min_rounds, args.max_rounds, args.z
+    )
+    print(json.dumps(tournament.run(args.workers).summary(), indent=2))
@@ -0,0 +1,315 @@
+"""
+Self-play training of GameCharacter strategies. Learning characters play
+each other, choosing epsilon-greedily from a tabular policy and recording
+what they saw, what they picked and whether their side won; the policy is fit
+to those experiences until it stops moving, then exported as a GameCharacter
+subclass that decides by table lookup:
+
+    trainer = SelfPlayTrainer(seed=0)
+    trainer.train()
+    TabularWerewolf = trainer.export()[Werewolf]
+"""
+from __future__ import annotations
+
+from . import rng
+from .game_characters import GameCharacter, Player, SanitizedPlayer, Villager, Werewolf
+from .moderator import EndGameState, Moderator
+from .rng import GameRandom
+from .type_checking import TYPE_CHECKING
+
+import logging
+
+if TYPE_CHECKING:
+    from typing import Callable, Dict, List, Optional, Sequence, Set, Tuple, Type, Union
+
+    # What a player can tell about another player from the sanitized view: its
+    # (aggression, persuasiveness), bucketed.
+    Features = Tuple[int, int]
+    # The features of every candidate of a decision, in the order given
+    Observation = Tuple[Features, ...]
+    TableKey = Tuple[str, Features]
+    Learner = Union["LearningWerewolf", "LearningVillager"]
+
+NIGHT = "night"
+DAY = "day"
+
+
+def observe(player: SanitizedPlayer, buckets: int) -> Features:
+    def bucket(v: float) -> int:
+        return min(int(v * buckets), buckets - 1)
+
+    return (bucket(player.aggression), bucket(player.persuasiveness))
+
+
+class Experience(object):
+    """
+    A single decision made during self-play. `observation` is the features of
+    the candidates, `action` those of the candidate chosen. `outcome` is 1 if
+    the character's side won the game and 0 otherwise.
+    """
+
+    __slots__ = ("phase", "observation", "action", "outcome")
+
+    def __init__(self, phase: str, observation: Observation, action: Features, outcome: float):
+        self.phase: str = phase
+        self.observation: Observation = observation
+        self.action: Features = action
+        self.outcome: float = outcome
+
+
+def _choose_from_table(
+    table: Dict[TableKey, float],
+    buckets: int,
+    phase: str,
+    players: Sequence[SanitizedPlayer]
+) -> Optional[SanitizedPlayer]:
+    """
+    Pick the player whose features have the highest value in `table`. Ties are
+    broken at random; unseen features are valued as a coin flip.
+    """
+    if not players:
+        return None
+
+    best_value: float = -1
+    best: List[SanitizedPlayer] = []
+    for player in players:
+        value = table.get((phase, observe(player, buckets)), 0.5)
+        if value > best_value:
+            best_value = value
+            best = [player]
+        elif value == best_value:
+            best.append(player)
+
+    return rng.current().choice(best)
+
+
+class TabularPolicy(object):
+    """
+    Estimates, for each phase and candidate features, how often picking such a
+    candidate led to a win.
+    """
+
+    def __init__(self, buckets: int=4):
+        self.buckets: int = buckets
+        self.wins: Dict[TableKey, float] = {}
+        self.visits: Dict[TableKey, int] = {}
+        # Built on first use after every fit
+        self.__table: Optional[Dict[TableKey, float]] = None
+
+    def value(self, phase: str, features: Features) -> float:
+        # Laplace smoothing so that rarely seen features don't get extreme
+        # values.
+        key = (phase, features)
+        return (self.wins.get(key, 0) + 1) / (self.visits.get(key, 0) + 2)
+
+    @property
+    def table(self) -> Dict[TableKey, float]:
+        if self.__table is None:
+            self.__table = {key: self.value(*key) for key in self.visits}
+        return self.__table
+
+    def fit(self, experiences: Sequence[Experience]) -> float:
+        """
+        Update the estimates with the given experiences and return the largest
+        change in any estimate.
+        """
+        before: Dict[TableKey, float] = self.table
+        for experience in experiences:
+            key = (experience.phase, experience.action)
+            self.wins[key] = self.wins.get(key, 0) + experience.outcome
+            self.visits[key] = self.visits.get(key, 0) + 1
+        self.__table = None
+
+        return max(
+            (abs(value - before.get(key, 0.5)) for key, value in self.table.items()),
+            default=0.0
+        )
+
+    def choose(self, phase: str, players: Sequence[SanitizedPlayer]) -> Optional[SanitizedPlayer]:
+        return _choose_from_table(self.table, self.buckets, phase, players)
+
+    def export(self, base: Type[GameCharacter], name: Optional[str]=None) -> Type[GameCharacter]:
+        """
+        Freeze this policy into a `GameCharacter` subclass of `base` that
+        decides by table lookup.
+        """
+        return type(
+            name if name else "Tabular%s" % base.__name__,
+            (TabularStrategy, base),
+            {"policy_table": self.table, "buckets": self.buckets, "__module__": __name__}
+        )
+
+
+class TabularStrategy(object):
+    """
+    Mixin for `GameCharacter`s that decide by looking up `policy_table`. Use
+    `TabularPolicy.export` to make one.
+    """
+
+    policy_table: Dict[TableKey, float] = {}
+    buckets: int = 4
+
+    def night_action(self, players: Sequence[SanitizedPlayer]) -> Optional[SanitizedPlayer]:
+        return _choose_from_table(self.policy_table, self.buckets, NIGHT, players)
+
+    def daytime_behavior(self, players: Sequence[SanitizedPlayer]) -> Optional[SanitizedPlayer]:
+        return _choose_from_table(self.policy_table, self.buckets, DAY, players)
+
+
+class LearningStrategy(object):
+    """
+    Mixin for `GameCharacter`s in self-play. Decides epsilon-greedily using the
+    current policy and remembers every decision made.
+    """
+
+    def __init__(self, policy: TabularPolicy, epsilon: float):
+        self.policy: TabularPolicy = policy
+        self.epsilon: float = epsilon
+        # (phase, observation, action) of every decision
+        self.episode: List[Tuple[str, Observation, Features]] = []
+
+    def __decide(self, phase: str, players: Sequence[SanitizedPlayer]) -> Optional[SanitizedPlayer]:
+        if not players:
+            return None
+
+        game_random: GameRandom = rng.current()
+        pick: Optional[SanitizedPlayer] = (
+            game_random.choice(players) if game_random.random() < self.epsilon else
+            self.policy.choose(phase, players)
+        )
+        assert pick is not None
+        buckets: int = self.policy.buckets
+        self.episode.append((
+            phase, tuple(observe(player, buckets) for player in players), observe(pick, buckets)
+        ))
+        return pick
+
+    def night_action(self, players: Sequence[SanitizedPlayer]) -> Optional[SanitizedPlayer]:
+        return self.__decide(NIGHT, players)
+
+    def daytime_behavior(self, players: Sequence[SanitizedPlayer]) -> Optional[SanitizedPlayer]:
+        return self.__decide(DAY, players)
+
+
+class LearningWerewolf(LearningStrategy, Werewolf):
+    pass
+
+
+class LearningVillager(LearningStrategy, Villager):
+    pass
+
+
+class SelfPlayTrainer(object):
+    """
+    Trains a `TabularPolicy` for werewolves and villagers by having learning
+    characters play against each other. Player attributes are randomized every
+    game so that the policies see a wide range of features.
+
+    Attributes and the seed of every game are drawn from a generator of the
+    trainer's own, seeded with `seed` at the start of every `train`.
+    """
+
+    # Makes the learning character of a role, given its policy and epsilon
+    LEARNERS: Dict[Type[GameCharacter], Callable[[TabularPolicy, float], Learner]] = {
+        Werewolf: LearningWerewolf,
+        Villager: LearningVillager
+    }
+
+    def __init__(
+        self,
+        werewolf_count: int=2,
+        villager_count: int=4,
+        buckets: int=4,
+        epsilon: float=0.2,
+        seed: Optional[int]=None
+    ):
+        self.werewolf_count: int = werewolf_count
+        self.villager_count: int = villager_count
+        self.epsilon: float = epsilon
+        self.policies: Dict[Type[GameCharacter], TabularPolicy] = {
+            Werewolf: TabularPolicy(buckets),
+            Villager: TabularPolicy(buckets)
+        }
+        self.seed: Optional[int] = seed
+        self.rng: GameRandom = GameRandom(seed)
+        self.games_played: int = 0
+
+    def __make_players(self, role: GameCharacter, count: int) -> Set[Player]:
+        return set(
+            Player(
+                "%s Player #%s" % (role, i),
+                role,
+                aggression=self.rng.random(),
+                suggestibility=self.rng.random(),
+                persuasiveness=self.rng.random()
+            ) for i in range(count)
+        )
+
+    def play_game(self) -> Dict[Type[GameCharacter], List[Experience]]:
+        learners: Dict[Type[GameCharacter], Learner] = {
+            character: self.LEARNERS[character](policy, self.epsilon)
+            for character, policy in self.policies.items()
+        }
+        players: Set[Player] = (
+            self.__make_players(learners[Werewolf], self.werewolf_count) |
+            self.__make_players(learners[Villager], self.villager_count)
+        )
+        result: EndGameState = Moderator(set(players), seed=self.rng.randbelow(2 ** 32)).play()
+        self.games_played += 1
+        for player in players:
+            SanitizedPlayer.forget(player)
+        if result is EndGameState.ABORTED:
+            # A game cut short by its watchdog has no winner to learn from.
+            return {character: [] for character in learners}
+
+        winner: Type[GameCharacter] = (
+            Werewolf if result is EndGameState.WEREWOLVES_WON else Villager
+        )
+
+        return {
+            character: [
+                Experience(phase, observation, action, 1 if character is winner else 0)
+                for phase, observation, action in learner.episode
+            ] for character, learner in learners.items()
+        }
+
+    def train(
+        self,
+        games_per_epoch: int=200,
+        max_epochs: int=50,
+        tolerance: float=0.01
+    ) -> int:
+        """
+        Play epochs of self-play games until no estimate moves by more than
+        `tolerance` in an epoch. Returns the number of epochs played.
+        """
+        self.rng = GameRandom(self.seed)
+
+        # Logging dominates the cost of a game; self-play doesn't need it.
+        previous_disable: int = logging.root.manager.disable
+        logging.disable(logging.INFO)
+        try:
+            for epoch in range(1, max_epochs + 1):
+                experiences: Dict[Type[GameCharacter], List[Experience]] = {
+                    character: [] for character in self.policies
+                }
+                for _ in range(games_per_epoch):
+                    for character, game_experiences in self.play_game().items():
+                        experiences[character].extend(game_experiences)
+
+                delta: float = max(
+                    self.policies[character].fit(experiences[character])
+                    for character in self.policies
+                )
+                if delta < tolerance:
+                    return epoch
+        finally:
+            logging.disable(previous_disable)
+
+        return max_epochs
+
+    def export(self) -> Dict[Type[GameCharacter], Type[GameCharacter]]:
+        return {
+            character: policy.export(character)
+            for character, policy in self.policies.items()
+        }
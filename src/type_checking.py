@@ -0,0 +1,7 @@
+"""
+`TYPE_CHECKING` for every module to import: False at runtime, like
+`typing.TYPE_CHECKING`, but without importing `typing`, which is slow to
+import. Type checkers take `if TYPE_CHECKING:` blocks as always taken.
+"""
+
+TYPE_CHECKING = False
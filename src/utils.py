@@ -1,27 +1,45 @@
+from __future__ import annotations
+
 from collections import Counter
 from collections.abc import Iterable as IterableBaseClass
-
-from typing import (
-    Any, Counter as t_Counter, Dict, Iterable, Iterator, List, Mapping,
-    Optional, Set, Sequence, Tuple, Type, TYPE_CHECKING, Union
-)
+from .type_checking import TYPE_CHECKING
 
 import _collections_abc
 import logging
 import os
+import threading
 
 if TYPE_CHECKING:
+    from typing import (
+        Any, Counter as t_Counter, Dict, Iterable, Iterator, List, Mapping,
+        Optional, Set, Sequence, Tuple, Type, Union
+    )
     from .game_characters import GameCharacter, SanitizedPlayer
 
 
 logger: logging.Logger = logging.getLogger("WHEREWHOLF_UTILS")
-logger.setLevel(logging.getLevelName(
-    os.environ.get("WHEREWHOLF_MISC_LOG", "INFO")
-))
-log_format: str = "%(asctime)s - UTIL:%(levelname)s - %(message)s"
-handler: logging.Handler = logging.StreamHandler()
-handler.setFormatter(logging.Formatter(log_format))
-logger.addHandler(handler)
+_configure_lock = threading.Lock()
+
+
+def configure_logger() -> None:
+    """
+    Set up the logger of this module. Called when a game is set up rather than
+    on import so that importing Wherewholf has no side-effects.
+    """
+    if logger.handlers:
+        return
+
+    with _configure_lock:
+        # Another thread may have been first.
+        if logger.handlers:
+            return
+        logger.setLevel(logging.getLevelName(
+            os.environ.get("WHEREWHOLF_MISC_LOG", "INFO")
+        ))
+        log_format: str = "%(asctime)s - UTIL:%(levelname)s - %(message)s"
+        handler: logging.Handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter(log_format))
+        logger.addHandler(handler)
 
 
 class ValueIndex(object):
@@ -33,22 +51,24 @@ class ValueIndex(object):
     """
 
     def __init__(self) -> None:
-        self.value_index: Dict[int, Set[Any]] = {}
+        # The values are used as ordered sets so that ties come out in the
+        # order they were counted, regardless of how the references hash.
+        self.value_index: Dict[int, Dict[Any, None]] = {}
 
-    def __getitem__(self, key: int) -> Set[Any]:
-        return self.value_index[key]
+    def __getitem__(self, key: int) -> Iterable[Any]:
+        return self.value_index[key].keys()
 
     def update_index(self, value: int, reference: Any) -> None:
         if self.value_index.get(value):
-            self.value_index[value].add(reference)
+            self.value_index[value][reference] = None
         else:
-            self.value_index[value] = set((reference,))
+            self.value_index[value] = {reference: None}
 
     def remove_reference(self, index: int, reference: Any) -> None:
-        current_index: Set[Any] = self.value_index.get(index, set())
+        current_index: Dict[Any, None] = self.value_index.get(index, {})
 
         if reference in current_index:
-            current_index.remove(reference)
+            del current_index[reference]
 
     def list_indices(self) -> Sequence[int]:
         return tuple(self.value_index.keys())
@@ -185,6 +205,82 @@ class ValueTieCounter(Counter):
         logger.debug("the most_commmon %s %s" % (n, most_common))
         return most_common
 
+class VoteTally(object):
+    """
+    Counts votes as they come in, out of `voters` expected votes of which at
+    least `quorum` must not be abstentions. It knows when the remaining voters
+    can no longer change the outcome: either someone already has more votes
+    than anyone else could reach, or quorum can't be reached anymore.
+
+    Ties are listed in the order the tied candidates got their last vote, same
+    as `ValueTieCounter.most_common`.
+    """
+
+    __slots__ = ("quorum", "remaining", "total", "counts", "reached", "leader", "top", "runner_up")
+
+    def __init__(self, voters: int, quorum: int):
+        self.quorum: int = quorum
+        # Voters that have yet to vote
+        self.remaining: int = voters
+        # Votes that are not abstentions
+        self.total: int = 0
+        self.counts: Dict[Any, int] = {}
+        # When each candidate got their last vote, for ordering ties
+        self.reached: Dict[Any, int] = {}
+        self.leader: Any = None
+        self.top: int = 0
+        # The most votes of any candidate other than the leader
+        self.runner_up: int = 0
+
+    def add(self, vote: Any) -> None:
+        """
+        Count the next vote; None abstains.
+        """
+        self.remaining -= 1
+        if vote is None:
+            return
+
+        self.total += 1
+        count: int = self.counts.get(vote, 0) + 1
+        self.counts[vote] = count
+        self.reached[vote] = self.total
+
+        if vote == self.leader:
+            self.top = count
+        elif count > self.top:
+            self.runner_up = self.top
+            self.leader = vote
+            self.top = count
+        elif count > self.runner_up:
+            self.runner_up = count
+
+    @property
+    def quorum_reached(self) -> bool:
+        return self.total >= self.quorum
+
+    @property
+    def quorum_unreachable(self) -> bool:
+        return self.total + self.remaining < self.quorum
+
+    @property
+    def decided(self) -> bool:
+        return self.quorum_unreachable or (
+            self.quorum_reached and self.top > self.runner_up + self.remaining
+        )
+
+    def leaders(self) -> List[Any]:
+        """
+        The candidates with the most votes.
+        """
+        return sorted(
+            (candidate for candidate, count in self.counts.items() if count == self.top),
+            key=self.reached.__getitem__
+        )
+
+    def __str__(self) -> str:
+        return "VoteTally(%s, remaining=%s, quorum=%s)" % (self.counts, self.remaining, self.quorum)
+
+
 class MarkovChain(object):
     """
     This class allows you to keep a record of the empirical probability that a
@@ -0,0 +1,92 @@
+"""
+Budgets that keep a single pathological game from stalling a whole experiment.
+"""
+from __future__ import annotations
+
+from .defaults import DEFAULT_MAX_SECONDS, DEFAULT_MAX_STEPS
+from .errors import GameBudgetExceededError
+from .type_checking import TYPE_CHECKING
+
+import time
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Optional
+
+# Phases reported when a budget is exceeded
+DAY: str = "day"
+NIGHT: str = "night"
+NOMINATIONS: str = "nominations"
+VOTES: str = "votes"
+DAY_CONSENSUS: str = "day consensus"
+TIE: str = "tie"
+
+
+class GameWatchdog(object):
+    """
+    Counts the iterations of every decision loop in a game. Raises a
+    GameBudgetExceededError once the game has taken more than `max_steps` steps
+    or, if `max_seconds` is given, more than `max_seconds` seconds of wall
+    time.
+    """
+
+    def __init__(
+        self,
+        max_steps: int=DEFAULT_MAX_STEPS,
+        max_seconds: Optional[float]=DEFAULT_MAX_SECONDS
+    ):
+        self.max_steps: int = max_steps
+        self.max_seconds: Optional[float] = max_seconds
+        self.steps: int = 0
+        self.started: float = time.monotonic()
+
+    def start(self) -> None:
+        self.steps = 0
+        self.started = time.monotonic()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def step(self, phase: str) -> None:
+        self.steps += 1
+        if self.steps > self.max_steps or (
+            self.max_seconds is not None and self.elapsed > self.max_seconds
+        ):
+            raise GameBudgetExceededError(phase, self.steps, self.elapsed)
+
+    def __str__(self) -> str:
+        return "GameWatchdog(max_steps=%s, max_seconds=%s)" % (self.max_steps, self.max_seconds)
+
+
+class StalledGame(object):
+    """
+    Enough about a game that went over budget to replay it: its seed and
+    roster, and where it stalled.
+    """
+
+    __slots__ = ("seed", "roster", "day", "phase", "steps", "elapsed")
+
+    def __init__(
+        self,
+        seed: Optional[int],
+        roster: Dict[str, int],
+        day: int,
+        phase: str,
+        steps: int,
+        elapsed: float
+    ):
+        self.seed: Optional[int] = seed
+        # Number of players per character
+        self.roster: Dict[str, int] = roster
+        self.day: int = day
+        self.phase: str = phase
+        self.steps: int = steps
+        self.elapsed: float = elapsed
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {attr: getattr(self, attr) for attr in self.__slots__}
+
+    def __str__(self) -> str:
+        return "Game (seed=%s, roster=%s) stalled during %s of day %s after %s steps and %.3fs" % (
+            self.seed, self.roster, self.phase, self.day, self.steps, self.elapsed
+        )